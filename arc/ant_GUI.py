@@ -54,10 +54,10 @@ import traceback
 import datetime
 import time
 import ftplib
+import functools
 
 # Import 3rd-Party Libraries
 import PyPDF2
-import requests
 
 # Find module path
 MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
@@ -72,6 +72,9 @@ try:
     from . import watershed_summary
     from . import help_window
     from . import get_all
+    from . import ghcn_daily
+    from . import http_client
+    from . import process_manager
     from .utilities import JLog
 except Exception:
     # Old unfrozen version backwards compatibility step
@@ -81,6 +84,9 @@ except Exception:
     import watershed_summary
     import help_window
     import get_all
+    import ghcn_daily
+    import http_client
+    import process_manager
     # Add utilities folder to path directly
     PYTHON_SCRIPTS_FOLDER = os.path.join(ROOT, 'Python Scripts')
     TEST = os.path.exists(PYTHON_SCRIPTS_FOLDER)
@@ -110,6 +116,21 @@ def click_help_button():
     help_app = help_window.Main()
     help_app.run()
 
+def ends_batches(method):
+    """
+    Wraps a Main method so every anteProcess.Main instance drops the merged record
+    of the batch it started, even if a date of the batch fails
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            for ante_instance in [self.rain_instance, self.snow_instance, self.snow_depth_instance]:
+                if ante_instance is not None:
+                    ante_instance.end_batch()
+    return wrapper
+
 class Main(object):
     """GUI for the Antecedent Precipitation Tool"""
 
@@ -534,6 +555,8 @@ class Main(object):
         """
         Closes the program.
         """
+        # Stop the shared download sub-processes, if they were started
+        process_manager.shutdown_pool()
         self.master.destroy()
     # End of quit_command method
 
@@ -612,6 +635,24 @@ class Main(object):
     # End askfile method
 
     def test_noaa_server(self):
+        # Use the local GHCN-Daily mirror instead, if one is configured
+        mirror_folder = ghcn_daily.mirror_folder()
+        if mirror_folder is not None:
+            self.L.print_title("GHCN-Daily Mirror Status Check")
+            self.L.Wrap('Local mirror folder = {}'.format(mirror_folder))
+            self.ncdc_working = True
+            for file_name in ['ghcnd-stations.txt', 'ghcnd-inventory.txt']:
+                if ghcn_daily.mirror_path(file_name, mirror_folder) is None:
+                    self.L.Wrap('  {} was not found in the mirror!'.format(file_name))
+                    self.ncdc_working = False
+            if self.ncdc_working:
+                self.L.Wrap("  Local mirror READY.  Proceeding with request (NOAA's servers will not be contacted)...")
+            else:
+                self.L.Wrap('  Request terminated, as the local mirror is incomplete.')
+                self.L.Wrap('  Add the missing files, or unset {} to use NOAA\'s servers.'.format(ghcn_daily.MIRROR_ENVIRONMENT_VARIABLE))
+            self.L.print_separator_line()
+            self.L.Wrap('')
+            return
         # Test whether https://www1.ncdc.noaa.gov/pub/data/ghcn/daily is accessible
         if self.ncdc_working is False:
             try:
@@ -619,24 +660,13 @@ class Main(object):
                 self.L.Wrap('Server Base URL = https://www1.ncdc.noaa.gov/pub/data/ghcn/daily')
                 self.L.Wrap("Testing if NOAA's Server is currently accessible...")
                 test_url = "https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/readme.txt"
-                for i in range(5):
-                    if i < 1:
-                        self.L.Wrap('  Attempting to download: {}'.format(test_url))
-                    else:
-                        self.L.Wrap('  Attempt {} of 5 - Downloading: {}'.format((i+1), test_url))
-                    test_connection = requests.get(test_url, timeout=15)
-                    if i > 0:
-                        wait = i * 2
-                        self.L.Wrap('    -Giving the server {} extra seconds to respond'.format(wait))
-                        time.sleep(i)
-                    if test_connection.status_code > 299:
-                        self.L.Wrap('    -Download failed!')
-                        self.ncdc_working = False
-                    else:
-                        self.ncdc_working = True
-                        del test_connection
-                        break
+                self.L.Wrap('  Attempting to download: {}'.format(test_url))
+                # Failed attempts are retried with backoff by http_client
+                test_connection = http_client.get(test_url, timeout=15)
+                self.ncdc_working = True
+                del test_connection
             except Exception:
+                self.L.Wrap('    -Download failed!')
                 self.ncdc_working = False
         # Try FTP
         if self.ncdc_working is False:
@@ -1051,6 +1081,7 @@ class Main(object):
 
 
 
+    @ends_batches
     def calculate_or_add_batch(self, batch, params):
         """
         If batch is False
@@ -1058,7 +1089,7 @@ class Main(object):
         If batch is True
         --Adds current field values to batch list
         """
-        start_time = time.clock()
+        start_time = time.perf_counter()
         # Get Paramaters
         latitude = params[0]
         longitude = params[1]
@@ -1399,6 +1430,9 @@ class Main(object):
                 parts_2_delete = []
                 total_pdfs = len(current_input_list_list)
                 run_count = 0
+                if not watershed_analysis:
+                    # Merge the station records once for every date of the batch
+                    ante_instance.start_batch(current_input_list_list)
                 for current_input_list in current_input_list_list:
                     run_count += 1
                     if watershed_scale == 'Single Point':
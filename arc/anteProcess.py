@@ -43,11 +43,11 @@ import os
 import sys
 import time
 import datetime
-import multiprocessing
 import traceback
 import warnings
 import pickle
 import stat
+import concurrent.futures
 from operator import itemgetter
 
 # Get root folder
@@ -59,9 +59,6 @@ warnings.filterwarnings("ignore")
 
 # Import 3rd Party Libraries
 
-import requests
-import urllib3
-import json
 import numpy
 import pandas
 import ulmo
@@ -73,17 +70,20 @@ import matplotlib.ticker as ticker
 from matplotlib import rcParams
 import pylab
 
-# Stop annoying urllib3 errors for EPQS tests
-# import logging
-# logging.getLogger("urllib3").setLevel(logging.ERROR)
-
 # Import Custom Modules
 try:
     from . import query_climdiv
     from . import process_manager
     from . import date_calcs
     from . import getElev
+    from . import ghcn_daily
     from . import station_manager
+    from . import station_search
+    from . import station_coverage
+    from . import station_fetcher
+    from . import async_fetcher
+    from . import gap_fill
+    from . import normals_cache
     from . import get_forecast
     from . import get_all
     from .utilities import JLog
@@ -93,7 +93,14 @@ except Exception:
     import process_manager
     import date_calcs
     import getElev
+    import ghcn_daily
     import station_manager
+    import station_search
+    import station_coverage
+    import station_fetcher
+    import async_fetcher
+    import gap_fill
+    import normals_cache
     import get_forecast
     import get_all
     # Add utilities folder to path directly
@@ -111,64 +118,23 @@ except Exception:
     import JLog
     import web_wimp_scraper
 
+# Primary station requirements (See Main.getBest)
+PRIMARY_MIN_ANTECEDENT_ROWS = int(90 * 0.75)
+PRIMARY_MIN_ROWS = 6000
+TOLERABLE_DIFFERENCE_PER_THOUSAND = .75
+
+# Lazy station mode - Number of stations downloaded ahead of the one in use
+PREFETCH_COUNT = 3
+
+# gap_fill source of the days filled by linear interpolation
+LINEAR_INTERPOLATION = 'Linear Interpolation'
 
 
 # FUNCTION DEFINITIONS
 
 def get_json_multiple_ways(url):
-    """Tries to pull JSON data from a URL using urllib3 first and then requests"""
-    log = JLog.PrintLog()
-    if 'https://nationalmap.gov/epqs' in url:
-        base_url = 'https://nationalmap.gov/epqs'
-    elif 'https://ned.usgs.gov/epqs' in url:
-        base_url = 'https://ned.usgs.gov/epqs'
-    # Common USGS Error Message
-    temp_unavailable_message = 'The requested service is temporarily unavailable.  Please try later.'
-    unavailable_error_count = 0
-    # Try urllib3
-    # Try Requests module
-    try:
-        log.print_status_message('Querying {}...'.format(base_url))
-        content = requests.get(url, timeout=15)
-        time.sleep(.5)
-        while temp_unavailable_message in content.text:
-            del content
-            unavailable_error_count += 1
-            log.Write('     USGS SERVER:  "{}"'.format(temp_unavailable_message))
-            log.print_status_message('     Retrying query of {}...'.format(base_url))
-            time.sleep(unavailable_error_count)
-            content = requests.get(url)
-            time.sleep(unavailable_error_count)
-            if unavailable_error_count > 4:
-                unavailable_error_count = 0
-                break
-        json_conversion = content.json()
-        return json_conversion
-    except Exception:
-        requests_exception = traceback.format_exc()
-    try:
-        log.print_status_message('Querying {}...'.format(base_url))
-        http = urllib3.PoolManager(cert_reqs='CERT_REQUIRED')
-        response = http.request('GET', url)
-        time.sleep(1)
-        string_data = str(response.data, 'utf-8')
-        while temp_unavailable_message in string_data:
-            del response
-            unavailable_error_count += 1
-            log.Write('     USGS SERVER:  "{}"'.format(temp_unavailable_message))
-            log.print_status_message('     Retrying query of {}...'.format(base_url))
-            time.sleep(unavailable_error_count)
-            response = http.request('GET', url)
-            sleep_duration = 3 + unavailable_error_count
-            time.sleep(sleep_duration)
-            string_data = str(response.data, 'utf-8')
-            if unavailable_error_count > 4:
-                unavailable_error_count = 0
-                break
-        json_conversion = json.loads(string_data)
-        return json_conversion
-    except Exception:
-        pass
+    """Pulls JSON data from a USGS EPQS URL (See getElev.get_json_multiple_ways)"""
+    return getElev.get_json_multiple_ways(url)
 
 def test_usgs_epqs_servers():
     """Tests if either one of the known USGS Elevation Point Query Service (EPQS) Servers are Online"""
@@ -299,66 +265,34 @@ def value_list_to_water_year_table(dates, values):
     return allDays
 
 
-def calc_normal_values(dates, values):
-    n = 0
-    normal_low_values = []
-    normal_high_values = []
-    # Normal Year
-    if len(dates) == (365):
-        while n < (365):
-            day = []
-            for row in values:
-                day.append(row[n])
-            # Calculate Numpy Percentiles for High and Low normal
-            normal_low_values.append(numpy.percentile(day, 30))
-            normal_high_values.append(numpy.percentile(day, 70))
-            n += 1
-    # Leap Year
-    if len(dates) == (366):
-        while n < (365):
-            if n == 151: # Leap day, Feb 29 in a Leap Year
-                # Leap Year Processing - Estimate Feb 29th by Averaging percentiles of 2/28 and 3/1
-                feb_28_rolling_totals = []
-                mar_1_rolling_totals = []
-                for row in values:
-                    # Get day before and day after
-                    feb_28_rolling_totals.append(row[150])
-                    mar_1_rolling_totals.append(row[151])
-                # Get before and after low and high values from values
-                feb_28_normal_low = numpy.percentile(feb_28_rolling_totals, 30)
-                feb_28_normal_high = numpy.percentile(feb_28_rolling_totals, 70)
-                mar_1_normal_low = numpy.percentile(mar_1_rolling_totals, 30)
-                mar_1_normal_high = numpy.percentile(mar_1_rolling_totals, 70)
-                # Split the difference between the two dates
-                Low = (feb_28_normal_low + mar_1_normal_low)/2
-                High = (feb_28_normal_high + mar_1_normal_high)/2
-                # Append the averaged data
-                normal_low_values.append(Low)
-                normal_high_values.append(High)
-            # Even if the above executed (Leap Day), we'd still add n=151 as leap day was missing
-            day = []
-            for row in values:
-                day.append(row[n])
-            # Calculate Numpy Percentiles for High and Low normal
-            normal_low_values.append(numpy.percentile(day, 30))
-            normal_high_values.append(numpy.percentile(day, 70))
-            n += 1
-    # Convert lists to pandas series
-    normal_low_series = pandas.Series(normal_low_values, dates)
-    normal_high_series = pandas.Series(normal_high_values, dates)
-    return normal_low_series, normal_high_series
-
 # CLASS DEFINITIONS
 
 class Main(object):
     def __init__(self, yMax=None):
         self.yMax = yMax
         self.searchDistance = 30 # Miles
-        self.allStations = []
+        self.allStations = station_manager.Registry()
         self.recentStations = []
+        self.primary_station = None
         self.ghcn_station_list = None
+        self.ghcn_station_index = None
+        self.coverage_index = None
         self.oldLatLong = None
         self.PDFs = []
+        # Station downloads - 'threads' (station_fetcher), 'async' (async_fetcher)
+        #  or 'processes' (process_manager)
+        self.download_engine = 'threads'
+        self.download_workers = station_fetcher.DEFAULT_WORKERS
+        self.requests_per_second = station_fetcher.DEFAULT_REQUESTS_PER_SECOND
+        self.fetcher = None
+        self.async_engine = None
+        # Lazy station mode - Stations are downloaded only once they are needed (The next
+        #  PREFETCH_COUNT stations download in the background on the download_engine)
+        self.lazy_stations = True
+        self.prefetching = {}
+        # Batch runs at one site - Dates covered by the batch and the record merged over them
+        self.batch_range = None
+        self.batch_record = None
         self.pdsidv_file = None
         # Create PrintLog object
         self.log = JLog.PrintLog()
@@ -424,9 +358,12 @@ class Main(object):
                     try:
                         with open(pickle_path, 'rb') as handle:
                             self.allStations = pickle.load(handle)
+                        if isinstance(self.allStations, list):
+                            # Cached by a previous version as a list of stations
+                            self.allStations = station_manager.Registry(self.allStations)
                     except:
                         self.log.Wrap('Unserialization failed. Deleting...')
-                        self.allStations = []
+                        self.allStations = station_manager.Registry()
                         os.remove(pickle_path)
         # Calculate Dates
         self.dates = date_calcs.Main(year, month, day)
@@ -526,6 +463,8 @@ class Main(object):
         self.stations = []
 
         if self.ghcn_station_list is None:
+            # Read from a local GHCN-Daily mirror instead of NOAA, if one is configured
+            mirror_folder = ghcn_daily.mirror_folder()
             # Get DataFrame of all available Stations
             pickle_folder = os.path.join(ROOT, 'cached')
             # Ensure pickle_folder exists
@@ -535,7 +474,7 @@ class Main(object):
                 pass
             pickle_path = os.path.join(pickle_folder, 'stations.pickle')
             stations_pickle_exists = os.path.exists(pickle_path)
-            if self.data_type == 'PRCP':
+            if self.data_type == 'PRCP' and mirror_folder is None:
                 if stations_pickle_exists:
                     remove_pickle = False
                     # Call the file stale if it is older than 90 days, because
@@ -561,6 +500,10 @@ class Main(object):
                             self.log.Wrap('Unserializing failed.')
                             self.ghcn_station_list = None
             # Double-check it wasn't created above
+            if self.ghcn_station_list is None and mirror_folder is not None:
+                self.log.Wrap('Reading list of NCDC GHCN daily weather stations from the local mirror ({})...'.format(mirror_folder))
+                self.ghcn_station_list = ghcn_daily.get_stations(self.data_type)
+                self.log.Wrap("")
             if self.ghcn_station_list is None:
                 self.log.Wrap("Downloading list of NCDC GHCN daily weather stations...")
                 self.ghcn_station_list = ulmo.ncdc.ghcn_daily.get_stations(elements=self.data_type,
@@ -572,6 +515,26 @@ class Main(object):
                     # Store Data (serialize)
                     with open(pickle_path, 'wb') as handle:
                         pickle.dump(self.ghcn_station_list, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            # Load or build the spatial index of the station list
+            index_path = os.path.join(pickle_folder, 'stations_index.npz')
+            self.ghcn_station_index = None
+            if self.data_type == 'PRCP' and mirror_folder is None and os.path.exists(index_path):
+                # Returns None unless the saved index matches the station list
+                self.ghcn_station_index = station_search.StationIndex.load(index_path, self.ghcn_station_list)
+            if self.ghcn_station_index is None:
+                self.log.Wrap('Indexing NCDC GHCN daily weather station locations...')
+                self.ghcn_station_index = station_search.StationIndex.from_station_list(self.ghcn_station_list)
+                if self.data_type == 'PRCP' and mirror_folder is None:
+                    try:
+                        self.ghcn_station_index.save(index_path)
+                    except Exception:
+                        self.log.Wrap('Saving station index failed.')
+        if self.coverage_index is None:
+            # Get years of record for each station and element (Skips stations that cannot cover the window)
+            try:
+                self.coverage_index = station_coverage.get_index()
+            except Exception:
+                self.log.Wrap('Station inventory unavailable. All stations within the search distance will be downloaded.')
         if self.image_name is None:
             self.image_name = "N/A"
         if self.image_source is None:
@@ -584,7 +547,7 @@ class Main(object):
             self.getStations()
         else:
             for station in self.recentStations:
-                if station.data is None:
+                if station.data is None and not self.lazy_stations:
                     station.run()
                 station.updateValues(self.site_loc,
                                      self.obs_elevation,
@@ -607,251 +570,202 @@ class Main(object):
     # End setInputs function
 
     def start_multiprocessing(self):
-        """Creates queues and sub-processes"""
+        """Returns the shared pool of sub-processes (Started on first use and kept for later runs)"""
         self.log.print_section('MULTIPROCESSING START')
         self.log.Wrap('Preparing to use sub-processes to accelerate data acquisition...')
-        # Kill any lingering child processes from previous runs
-        for minion in multiprocessing.active_children():
-            minion.terminate()
-        # Set Path to Python Executable
-        executable = sys.executable
-        multiprocessing.set_executable(executable)
-        # Set number of Sub-processes based on CPU_Count
-#        num_minions = multiprocessing.cpu_count()
-        num_minions = 4 # > 4 resulted in many failed FTP downloads that succeeded in-line later
-        # Establish communication queues
-        self.log.Wrap("Establishing Communication Queues...")
-        tasks_queue = multiprocessing.Queue()
-        results_queue = multiprocessing.Queue()
-        # Create minions
-        self.log.Wrap('Creating %d sub-processes...' % num_minions)
-        minions = [process_manager.Minion(tasks_queue, results_queue) for i in range(num_minions)]
-        # Start minions
-        ### MANDATORY CODE TO DEAL WITH GLITCH ###
-        sys.argv = ['']
-        ### MANDATORY CODE TO DEAL WITH GLITCH ###
-            # Glitch states the following:
-            # File "C;\Python27\ArcGIS10.3\Lib\multiprocessing\forking.py",
-            #  line 399, in get_preparation_data
-            #  sys_argv=sys.argv,
-            # AttributeError: 'module' object has no attribute 'argv'
-        num = 0
-        for minion in minions:
-            num += 1
-            minion.start()
-            self.log.Wrap('Sub-process {} started'.format(num))
+        if process_manager.POOL is None:
+            self.log.Wrap('Starting {} sub-processes (Kept running for later requests)...'.format(process_manager.NUM_WORKERS))
+        pool = process_manager.get_pool()
+        started = pool.ensure_workers()
+        if started > 0:
+            self.log.Wrap('{} sub-processes restarted'.format(started))
         self.log.print_separator_line()
         self.log.Wrap('')
-        return tasks_queue, results_queue, minions
+        return pool
     # End of start_multiprocessing function
 
-    def find_and_enqueue_stations(self, tasks_queue):
-        """Locates and enqueus all stations within the selected search distance"""
+    def find_and_enqueue_stations(self, pool, inner_distance=0):
+        """
+        Locates and enqueus all stations within the selected search distance
+        (Only those at least inner_distance away when widening a previous search),
+        returning a Future for each sub-process download
+        """
+        self.log.print_section('ENQUEUEING STATION DATA DOWNLOADS')
+        constructor_class_list = self.find_stations_to_download(inner_distance=inner_distance)
+        return [pool.submit(constructor_class) for constructor_class in constructor_class_list]
+    # End of find_and_enqueue_stations function
+
+    def find_stations_to_download(self, inner_distance=0):
+        """
+        Locates all stations within the selected search distance (Only those at least
+        inner_distance away when widening a previous search)
+        Stations whose data is already on hand are added to self.stations, and a
+        station_manager.Constructor is returned for each of the others
+        """
         # Reset Station Numbering (Affects print display only)
         station_number_for_print = 0
-        self.recentStations = []
-        # Find min and max ranges (Speed up search, Especially for HUC8 Watershed)
-        min_lat = None
-        max_lat = None
-        min_lon = None
-        max_lon = None
-        if self.watershed_analysis:
-            for sampling_coordinates in self.all_sampling_coordinates:
-                if min_lat == None:
-                    min_lat = sampling_coordinates[0]
-                elif sampling_coordinates[0] < min_lat:
-                    min_lat =sampling_coordinates[0]
-                if max_lat == None:
-                    max_lat = sampling_coordinates[0]
-                elif sampling_coordinates[0] > max_lat:
-                    max_lat = sampling_coordinates[0]
-                if min_lon == None:
-                    min_lon = sampling_coordinates[1]
-                elif sampling_coordinates[1] < min_lon:
-                    min_lon = sampling_coordinates[1]
-                if max_lon == None:
-                    max_lon = sampling_coordinates[1]
-                elif sampling_coordinates[1] > max_lon:
-                    max_lon = sampling_coordinates[1]
-        else:
-            min_lat = float(self.site_lat)
-            max_lat = float(self.site_lat)
-            min_lon = float(self.site_long)
-            max_lon = float(self.site_long)
-        # Add 3 to maximums and subtract 3 from the minimums to eliminate most stations quickly
-        min_lat -= 4
-        max_lat += 4
-        min_lon -= 4
-        max_lon += 4
+        if inner_distance == 0:
+            self.recentStations = []
         #  ALL STATIONS WITHIN searchDistance
-        self.log.print_section('ENQUEUEING STATION DATA DOWNLOADS')
-        self.log.Wrap("Searching for weather stations within "+str(self.searchDistance)+" miles...")
+        if inner_distance == 0:
+            self.log.Wrap("Searching for weather stations within "+str(self.searchDistance)+" miles...")
+        else:
+            self.log.Wrap("Searching for weather stations {} to {} miles away...".format(inner_distance, self.searchDistance))
         constructor_class_list = []
-        for index, row in self.ghcn_station_list.iterrows():
-            # Eliminate Stations quickly using buffered min/max lat/lon
-            ballpark = True
-            if row['latitude'] < min_lat:
-                ballpark = False
-            elif row['latitude'] > max_lat:
-                ballpark = False
-            elif row['longitude'] < min_lon:
-                ballpark = False
-            elif row['longitude'] > max_lon:
-                ballpark = False
-            if self.searchDistance > 30:
-                ballpark = True
-            if ballpark:
-                include_station = False
-                location_tuple = (row['latitude'], row['longitude'])
-                distance = great_circle(self.site_loc, location_tuple).miles
-                if not self.watershed_analysis:
-                    if distance < self.searchDistance:
-                        include_station = True
-                if self.watershed_analysis:
-                    for sampling_coordinates in self.all_sampling_coordinates:
-                        sampling_distance = great_circle(sampling_coordinates, location_tuple).miles
-                        if sampling_distance < self.searchDistance:
-                            include_station = True
-                            break
-                if include_station:
-                    station_index = index
-                    name = str(row['name'])
-                    already = False
-                    location = str(row['latitude']) + ", " + str(row['longitude'])
-                    row_elev_meters = row['elevation']
-                    elevation = row_elev_meters*3.28084
-                    elevDiff = abs(self.obs_elevation - elevation)
-                    weightedDiff = distance*((elevDiff/1000)+0.45)
-                    for item in self.allStations:
-                        if item.name == name:
-                            station_number_for_print += 1
-                            self.log.Wrap('Station {} - {} - Data previously acquired'.format(station_number_for_print,
-                                                                                              name))
-                            already = item
-                            already.updateValues(self.site_loc,
-                                                 self.obs_elevation,
-                                                 self.dates.normal_period_data_start_date,
-                                                 self.dates.actual_data_end_date,
-                                                 self.dates.antecedent_period_start_date)
-                            self.stations.append(already)
-                            self.recentStations.append(already)
-                    if already is False:
-                        station_number_for_print += 1
-                        self.log.Wrap('Station {} - {}'.format(station_number_for_print, name))
-                        constructor_class = station_manager.Constructor(self.data_type,
-                                                                        station_index,
-                                                                        name,
-                                                                        location,
-                                                                        location_tuple,
-                                                                        elevation,
-                                                                        distance,
-                                                                        elevDiff,
-                                                                        weightedDiff,
-                                                                        self.dates.normal_period_data_start_date,
-                                                                        self.dates.actual_data_end_date,
-                                                                        self.dates.antecedent_period_start_date)
-                        constructor_class_list.append(constructor_class)
-        enqueue_count = 0
-        for constructor_class in constructor_class_list:
-            tasks_queue.put(constructor_class)
-            enqueue_count += 1
+        if self.watershed_analysis:
+            sampling_coordinates = self.all_sampling_coordinates
+        else:
+            sampling_coordinates = None
+        candidates = station_search.find_stations(station_list=self.ghcn_station_list,
+                                                  site_loc=self.site_loc,
+                                                  site_elevation=self.obs_elevation,
+                                                  search_distance=self.searchDistance,
+                                                  sampling_coordinates=sampling_coordinates,
+                                                  station_index=self.ghcn_station_index,
+                                                  inner_distance=inner_distance)
+        if self.coverage_index is not None:
+            lacking_coverage = self.coverage_index.stations_without_coverage(self.data_type,
+                                                                             self.dates.normal_period_data_start_date[:4],
+                                                                             self.dates.actual_data_end_date[:4])
+        else:
+            lacking_coverage = set()
+        for index, row in candidates.iterrows():
+            station_index = index
+            name = str(row['name'])
+            if station_index in lacking_coverage:
+                self.log.Wrap('Skipping {} - No {} data between {} and {}'.format(name,
+                                                                                  self.data_type,
+                                                                                  self.dates.normal_period_data_start_date[:4],
+                                                                                  self.dates.actual_data_end_date[:4]))
+                continue
+            already = False
+            location = str(row['latitude']) + ", " + str(row['longitude'])
+            location_tuple = (row['latitude'], row['longitude'])
+            distance = row['distance']
+            elevation = row['elevation_feet']
+            elevDiff = row['elevDiff']
+            weightedDiff = row['weightedDiff']
+            if self.allStations.has_data(station_index, self.dates.actual_data_end_date):
+                station_number_for_print += 1
+                self.log.Wrap('Station {} - {} - Data previously acquired'.format(station_number_for_print,
+                                                                                  name))
+                already = self.allStations.get(station_index)
+                already.updateValues(self.site_loc,
+                                     self.obs_elevation,
+                                     self.dates.normal_period_data_start_date,
+                                     self.dates.actual_data_end_date,
+                                     self.dates.antecedent_period_start_date)
+                self.stations.append(already)
+                self.recentStations.append(already)
+            if already is False:
+                station_number_for_print += 1
+                self.log.Wrap('Station {} - {}'.format(station_number_for_print, name))
+                constructor_class = station_manager.Constructor(self.data_type,
+                                                                station_index,
+                                                                name,
+                                                                location,
+                                                                location_tuple,
+                                                                elevation,
+                                                                distance,
+                                                                elevDiff,
+                                                                weightedDiff,
+                                                                self.dates.normal_period_data_start_date,
+                                                                self.dates.actual_data_end_date,
+                                                                self.dates.antecedent_period_start_date)
+                constructor_class_list.append(constructor_class)
         self.log.print_separator_line()
         self.log.Write('')
-        return enqueue_count
-    # End of find_and_enqueue_stations function
-
-    def finish_multiprocessing(self, tasks_queue, results_queue, minions, enqueue_count):
-        """Maintains processing pool until all jobs are complete"""
-        self.log.print_section('MULTIPROCESSING FINISH')
-        count_copy = enqueue_count
-        timer_list = []
-        timer_list.append([time.clock(), count_copy])
-        self.log.Wrap('Waiting for sub-processes to download stations:')
-        while count_copy > 0:
-            # Keep # Minions at original num_minions
-            for minion in minions:
-                if not minion.is_alive():
-                    self.log.Wrap('Sub-process died, creating a replacement...')
-                    count_copy -= 1
-                    minions.remove(minion)
-                    new_minion = process_manager.Minion(tasks_queue, results_queue)
-                    new_minion.start()
-                    minions.append(new_minion)
-            # Pull results_queue to keep queue buffer from overflowing
+        return constructor_class_list
+    # End of find_stations_to_download function
+
+    def get_fetcher(self):
+        """Returns the StationFetcher (Download threads), creating it on first use"""
+        if self.fetcher is None:
+            self.fetcher = station_fetcher.StationFetcher(max_workers=self.download_workers,
+                                                          requests_per_second=self.requests_per_second)
+        return self.fetcher
+
+    def get_async_engine(self):
+        """Returns the AsyncStationEngine (Event loop thread), creating it on first use"""
+        if self.async_engine is None:
+            self.async_engine = async_fetcher.AsyncStationEngine(max_connections=self.download_workers)
+            ghcn_daily.RATE_LIMITER.requests_per_second = self.requests_per_second
+        return self.async_engine
+
+    def submit_download(self, station):
+        """Starts downloading a station in the background, returning the download's Future"""
+        if self.download_engine == 'async':
+            return self.get_async_engine().submit_station(station)
+        return self.get_fetcher().submit(station.ensure_data)
+
+    def finish_downloads(self, downloads):
+        """Collects the stations downloaded by the StationFetcher, AsyncStationEngine or sub-processes as they finish"""
+        self.log.print_section('STATION DATA DOWNLOADS')
+        self.log.Wrap('Waiting for stations to download:')
+        remaining = len(downloads)
+        start_time = time.monotonic()
+        for download in concurrent.futures.as_completed(downloads):
+            remaining -= 1
             try:
-                result = results_queue.get(block=True, timeout=5)
-                if result == "Maxed":
-                    count_copy += 1
-                else:
-                    # Get another chance to download missing data while waiting
-                    if result.data is None:
-                        result.run()
-                    self.stations.append(result)
-                    self.recentStations.append(result)
-                    self.allStations.append(result)
-                count_copy -= 1
-                # Discern avg. pace and approximate time remaining
-                if count_copy < enqueue_count:
-                    try:
-                        timer_list.append([time.clock(), count_copy])
-                        if len(timer_list) > 20:
-                            timer_list.remove(timer_list[0])
-                        time_taken = time.clock() - timer_list[0][0]
-                        tasks_complete = timer_list[0][1] - count_copy
-                        seconds_per_task = time_taken/tasks_complete
-                        seconds_remaining = count_copy * seconds_per_task
-                        remaining_string = time2String(seconds_remaining)
-                        if count_copy < 2:
-                            msg = '{} station remaining.  Approximately {} remaining.'.format(count_copy, remaining_string)
-                        else:
-                            msg = '{} stations left.  Approximately {} remaining.'.format(count_copy, remaining_string)
-                        self.log.print_status_message(msg)
-                    except Exception:
-                        pass
+                result = download.result()
             except Exception:
+                self.log.Wrap(traceback.format_exc())
                 result = None
-                # Discern avg. pace and approximate time remaining
-                if count_copy < enqueue_count:
-                    try:
-                        time_taken = time.clock() - timer_list[0][0]
-                        tasks_complete = timer_list[0][1] - count_copy
-                        seconds_per_task = time_taken/tasks_complete
-                        seconds_remaining = count_copy * seconds_per_task
-                        remaining_string = time2String(seconds_remaining)
-                        if count_copy < 2:
-                            msg = '{} station remaining.  Approximately {} remaining.'.format(count_copy, remaining_string)
-                        else:
-                            msg = '{} stations left.  Approximately {} remaining.'.format(count_copy, remaining_string)
-                        self.log.print_status_message(msg)
-                    except Exception:
-                        pass
-                time.sleep(1)
-        # Add poison pill to queue so we can track when all processes are actually complete
-            # This method is less glitchy than using a joinable queue
-        self.log.Wrap('All jobs complete.  Killing sub-processes...')
-        for minion in minions:
-            if minion.is_alive():
-                tasks_queue.put(None)
-        # Waiting for poison pills to dissapear from queue, meaning the actual tasks_queue are complete
-        self.log.Write('Waiting for sub-processes to close...')
-        while True:
-            size = tasks_queue.qsize()
-            if size < 1:
-                break
-            else:
-                msg = '{0} sub-processes remaining'.format(size)
+            if isinstance(result, dict):
+                # Rebuild the station from its sub-process descriptor
+                result = station_manager.Main.from_descriptor(result)
+                if result.data is None:
+                    # Get another chance to download missing data while waiting
+                    result.run()
+            if result is not None:
+                self.stations.append(result)
+                self.recentStations.append(result)
+                self.allStations.add(result)
+            # Discern avg. pace and approximate time remaining
+            if remaining > 0:
+                seconds_per_task = (time.monotonic() - start_time)/(len(downloads) - remaining)
+                remaining_string = time2String(remaining * seconds_per_task)
+                if remaining < 2:
+                    msg = '{} station remaining.  Approximately {} remaining.'.format(remaining, remaining_string)
+                else:
+                    msg = '{} stations left.  Approximately {} remaining.'.format(remaining, remaining_string)
                 self.log.print_status_message(msg)
-            time.sleep(1)
-        self.log.Write('All sub-processes dead and accounted for.')
+        self.log.Wrap('All downloads complete.')
         self.log.print_separator_line()
         self.log.Write('')
-    # End of finish_multiprocessing function
 
-    def getStations(self):
-        # Start Multiprocessing
-        tasks_queue, results_queue, minions = self.start_multiprocessing()
-        # Find an enqueue stations within the selected search distance
-        enqueue_count = self.find_and_enqueue_stations(tasks_queue)
+    def getStations(self, inner_distance=0):
+        """
+        Downloads all stations within the search distance and sorts them, primary station first.
+        When widening a search (inner_distance > 0), only the stations in the new ring are
+        downloaded and sorted, and the primary station from the original search is kept.
+        In lazy station mode, only the stations needed to find the primary station are
+        downloaded here (The rest are downloaded by createFinalDF as it reaches them).
+        Downloads run on threads or sub-processes, as selected by self.download_engine.
+        """
+        if self.lazy_stations:
+            # List stations within the selected search distance
+            self.log.print_section('LISTING STATIONS')
+            for constructor_class in self.find_stations_to_download(inner_distance=inner_distance):
+                station = constructor_class(lazy=True)
+                self.stations.append(station)
+                self.recentStations.append(station)
+        elif self.download_engine == 'threads':
+            # Start downloading stations within the selected search distance on threads
+            self.log.print_section('STARTING STATION DATA DOWNLOADS')
+            constructor_class_list = self.find_stations_to_download(inner_distance=inner_distance)
+            downloads = self.get_fetcher().submit_stations(constructor_class_list)
+        elif self.download_engine == 'async':
+            # Start downloading stations within the selected search distance on the event loop
+            self.log.print_section('STARTING STATION DATA DOWNLOADS')
+            constructor_class_list = self.find_stations_to_download(inner_distance=inner_distance)
+            stations = [constructor_class(lazy=True) for constructor_class in constructor_class_list]
+            downloads = self.get_async_engine().submit_stations(stations)
+        else:
+            # Start Multiprocessing
+            pool = self.start_multiprocessing()
+            # Find an enqueue stations within the selected search distance
+            downloads = self.find_and_enqueue_stations(pool, inner_distance=inner_distance)
         # WebWimp Use this downtime to pre-load the WebWIMP Querry
                 # Get WebWIMP Wet/Dry Season Determination
         if self.data_type == 'PRCP':
@@ -876,16 +790,26 @@ class Main(object):
                         self.all_sampling_coordinate_elevations = getElev.batch(self.all_sampling_coordinates, epqs_variant=self.epqs_variant)
             except Exception:
                 self.log.Wrap(traceback.format_exc())
-        # Maintain processing pool until all jobs are complete and collect results
-        self.finish_multiprocessing(tasks_queue, results_queue, minions, enqueue_count)
-
-        # find the primary station after multiprocessing finishes
-        need_primary = True
-        try:
-            primary_station = self.getBest(need_primary=need_primary)
-            print(primary_station.location)
-        except:
-            self.log.Wrap("No suitable primary station locations were found by the APT...")
+        if not self.lazy_stations:
+            # Collect the stations as their downloads finish
+            self.finish_downloads(downloads)
+
+        if inner_distance == 0:
+            # find the primary station after multiprocessing finishes
+            need_primary = True
+            if self.lazy_stations:
+                self.fetch_primary_candidates()
+            primary_station = None
+            try:
+                primary_station = self.getBest(need_primary=need_primary)
+                print(primary_station.location)
+            except:
+                self.log.Wrap("No suitable primary station locations were found by the APT...")
+            self.primary_station = primary_station
+        else:
+            # Widened search - keep the primary station from the original search
+            need_primary = False
+            primary_station = self.primary_station
         secondary_stations_sorted_list = []
         if primary_station is not None:
             # Note that the primary station has been found
@@ -896,7 +820,10 @@ class Main(object):
         for station in self.stations:
             # loop through non-primary-stations and recalculate distance, etc.
             # based off of distance from primary station
-            if station.name != primary_station.name:
+            if primary_station is None:
+                # No primary station - keep the weighted difference from the observation point
+                sorted_stations.append([station.weightedDiff, station])
+            elif station.name != primary_station.name:
                 distance = great_circle(primary_station.location, station.location).miles
                 distance = round(distance, 3)
                 station.distance = distance
@@ -907,13 +834,15 @@ class Main(object):
                 station.weightedDiff = weightedDiff
                 sorted_stations.append([station.weightedDiff, station])
         sorted_stations.sort(key=lambda x: x[0], reverse=False)
-        # insert primary station at the top of the list
-        sorted_stations.insert(0, [primary_station.weightedDiff, primary_station])
+        if inner_distance == 0 and primary_station is not None:
+            # insert primary station at the top of the list
+            sorted_stations.insert(0, [primary_station.weightedDiff, primary_station])
         self.stations = []
-        self.log.Wrap('Looking for stations missing data...')
+        if not self.lazy_stations:
+            self.log.Wrap('Looking for stations missing data...')
         for sort_list in sorted_stations:
             station = sort_list[1]
-            if station.data is None:
+            if station.data is None and not self.lazy_stations:
                 self.log.Wrap('  Station download failed for {}'.format(station.name))
                 self.log.Wrap('    Retrying download...')
                 station.run()
@@ -922,7 +851,11 @@ class Main(object):
                 else:
                     self.log.Wrap('      Download successful!')
             self.stations.append(station)
-        # Pickle All Stations for re-use the same day
+        if not self.lazy_stations:
+            self.pickle_station_records()
+
+    def pickle_station_records(self):
+        """Pickles all downloaded stations for re-use the same day"""
         if self.data_type == 'PRCP':
             self.log.Wrap('Attempting to pickle Station Records for future use within 12 hours...')
             pickle_folder = os.path.join(ROOT, 'cached')
@@ -939,6 +872,57 @@ class Main(object):
             except Exception:
                 pass
 
+    def meets_primary_requirements(self, station):
+        """Tests whether a station has enough data to be considered for the primary station"""
+        return station.current_actual_rows >= PRIMARY_MIN_ANTECEDENT_ROWS and station.actual_rows > PRIMARY_MIN_ROWS
+
+    def fetch_station(self, stations, position):
+        """
+        Lazy station mode: Ensures the station at position in stations has been downloaded,
+        downloading the next PREFETCH_COUNT stations in the background meanwhile
+        """
+        for upcoming in stations[position+1:position+1+PREFETCH_COUNT]:
+            if upcoming.data is None and upcoming not in self.prefetching:
+                self.prefetching[upcoming] = self.submit_download(upcoming)
+        station = stations[position]
+        prefetch = self.prefetching.pop(station, None)
+        if prefetch is not None:
+            try:
+                prefetch.result()
+            except Exception:
+                pass # The async engine raises download errors - the download below logs them
+        # Downloads again in line if the background download failed
+        station.ensure_data()
+        if station.data is not None:
+            self.allStations.add(station)
+        return station
+
+    def cancel_prefetching(self):
+        """Lazy station mode: Cancels background downloads that have not started"""
+        for prefetch in self.prefetching.values():
+            prefetch.cancel()
+        self.prefetching = {}
+
+    def fetch_primary_candidates(self):
+        """
+        Lazy station mode: Downloads stations in order of weighted difference until no
+        further station could be chosen as the primary station by getBest
+        (No station can replace the closest station that meets the primary requirements
+         unless its weighted difference is within 4 * TOLERABLE_DIFFERENCE_PER_THOUSAND)
+        """
+        self.log.Wrap('Downloading stations closest to the observation point first...')
+        candidates = sorted(self.stations, key=lambda station: station.weightedDiff)
+        margin = 4 * TOLERABLE_DIFFERENCE_PER_THOUSAND
+        first_qualified = None
+        for position, station in enumerate(candidates):
+            if first_qualified is not None:
+                if station.weightedDiff >= first_qualified.weightedDiff + margin:
+                    break
+            self.fetch_station(candidates, position)
+            if first_qualified is None and self.meets_primary_requirements(station):
+                first_qualified = station
+        self.cancel_prefetching()
+
     def getBest(self, need_primary):
         lowestDiff = 10000
         best_station = None
@@ -947,14 +931,14 @@ class Main(object):
         else:
             if need_primary is True:
                 self.log.Wrap('Searching for primary station...')
-                min_antecedent_rows = int(90 * 0.75)
+                min_antecedent_rows = PRIMARY_MIN_ANTECEDENT_ROWS
                 huge_record_primary = None
                 huge_lowest_diff = lowestDiff
                 medium_record_primary = None
                 medium_lowest_diff = lowestDiff
                 minimum_record_primary = None
                 minimum_lowest_diff = lowestDiff
-                tolerable_difference_per_thousand = .75
+                tolerable_difference_per_thousand = TOLERABLE_DIFFERENCE_PER_THOUSAND
                 for station in self.stations:
                     if station.current_actual_rows >= min_antecedent_rows:
                         if station.actual_rows > 10000:
@@ -965,7 +949,7 @@ class Main(object):
                             if station.weightedDiff < medium_lowest_diff:
                                 medium_lowest_diff = station.weightedDiff
                                 medium_record_primary = station
-                        elif station.actual_rows > 6000:
+                        elif station.actual_rows > PRIMARY_MIN_ROWS:
                             if station.weightedDiff < minimum_lowest_diff:
                                 minimum_lowest_diff = station.weightedDiff
                                 minimum_record_primary = station
@@ -1001,6 +985,76 @@ class Main(object):
             self.stations.remove(best_station)
         return best_station
 
+    def start_batch(self, input_list_list):
+        """
+        Prepares a batch of runs at one site (A list of setInputs input lists), so
+        createFinalDF fills one merged record over the days of every date in the batch
+        and starts each date from its days of that record
+        """
+        start_dates = []
+        end_dates = []
+        for input_list in input_list_list:
+            dates = date_calcs.Main(input_list[3], input_list[4], input_list[5])
+            start_dates.append(dates.normal_period_data_start_date)
+            end_dates.append(dates.actual_data_end_date)
+        self.batch_range = (min(start_dates), max(end_dates))
+        self.batch_record = None
+
+    def end_batch(self):
+        """Drops the merged record of the batch started by start_batch"""
+        self.batch_range = None
+        self.batch_record = None
+
+    def in_batch(self):
+        """Tests whether the current dates lie within the batch started by start_batch"""
+        if self.batch_range is None:
+            return False
+        return self.batch_range[0] <= self.dates.normal_period_data_start_date and self.dates.actual_data_end_date <= self.batch_range[1]
+
+    def fill_batch_record(self):
+        """
+        Returns a gap_fill.GapFiller over the days of the whole batch, filled from every
+        station in self.stations (Filled once, then reused while the stations and their
+        order stay the same)
+        Each day takes the value of the first station that has one, as in createFinalDF,
+        so every date's days of it match the record that date would fill on its own
+        """
+        key = (self.data_type, tuple(station.index for station in self.stations))
+        if self.batch_record is not None and self.batch_record[0] == key:
+            return self.batch_record[1]
+        start_date, end_date = self.batch_range
+        self.log.Wrap('Creating a merged record from {} to {} for every date of the batch...'.format(start_date, end_date))
+        filler = gap_fill.GapFiller(start_date, end_date)
+        # Lazy stations are downloaded and merged one at a time, so later stations
+        #  are only downloaded if they are needed
+        batch_size = 1 if self.lazy_stations else max(len(self.stations), 1)
+        for batch_start in range(0, len(self.stations), batch_size):
+            if filler.null_count() < 1:
+                break # Complete - Later stations could not replace any values
+            if self.lazy_stations:
+                self.fetch_station(self.stations, batch_start)
+            batch = self.stations[batch_start:batch_start + batch_size]
+            windows = [None if station.data is None else station.data.window(start_date, end_date) for station in batch]
+            filler.fill(windows, batch)
+        self.log.Wrap(str(filler.null_count()) + ' null values remaining in the merged record.')
+        self.batch_record = (key, filler)
+        return filler
+
+    def count_source_days(self, filler):
+        """
+        Returns the days each source of a gap_fill.GapFiller filled in the normal
+        period and in the antecedent period
+        """
+        days_normal = filler.counts(self.dates.normal_period_data_start_date, self.dates.normal_period_end_date)
+        days_antecedent = filler.counts(self.dates.antecedent_period_start_date, self.dates.observation_date)
+        return days_normal, days_antecedent
+
+    def count_stations_used(self, filler):
+        """Returns the number of stations that filled days of the normal or antecedent period"""
+        days_normal, days_antecedent = self.count_source_days(filler)
+        used = (days_normal + days_antecedent) > 0
+        return sum(1 for source, source_used in zip(filler.sources, used) if source_used and source is not LINEAR_INTERPOLATION)
+
     def createFinalDF(self):
         # Start to Build Stations Table (continues during iteration below)
         station_table_column_labels =[["Weather Station Name",
@@ -1018,146 +1072,125 @@ class Main(object):
 
         station_table_values = [] # added by JLG
 
-        # CREATE EMPTY DATAFRAME (self.finalDF)
+        # CREATE EMPTY RECORD (Filled from the stations in priority order by gap_fill)
+        evaluated_stations = set() # Stations already used to fill the record (Skipped after widening the search)
         self.log.Wrap("")
-        self.log.Wrap('Creating an empty dataframe from {} to {} to populate with weather station data...'.format(self.dates.normal_period_data_start_date, self.dates.actual_data_end_date))
-        index = pandas.date_range(start=self.dates.normal_period_data_start_date,
-                                  end=self.dates.actual_data_end_date,
-                                  freq='D')
-        self.finalDF = pandas.Series(index=index,
-                                     dtype="object",
-                                     name='value')
-
-        # FILL self.finalDF
+        if self.in_batch():
+            # Batch run - Start from this date's days of the batch record, which
+            #  every station in self.stations has already filled
+            self.log.Wrap('Taking {} to {} from the merged record of the batch...'.format(self.dates.normal_period_data_start_date, self.dates.actual_data_end_date))
+            filler = self.fill_batch_record().copy(self.dates.normal_period_data_start_date,
+                                                   self.dates.actual_data_end_date)
+            evaluated_stations.update(self.stations)
+        else:
+            self.log.Wrap('Creating an empty dataframe from {} to {} to populate with weather station data...'.format(self.dates.normal_period_data_start_date, self.dates.actual_data_end_date))
+            filler = gap_fill.GapFiller(self.dates.normal_period_data_start_date,
+                                        self.dates.actual_data_end_date)
+
+        # FILL THE RECORD
         # Fill in NaN using top station
         n = 0
-        num_stations_used = 0
         if float(self.site_lat) < 50:
             maxSearchDistance = 60      # Maximum distance between observation point and station location
         else: # In AK, where stations are very rare
             maxSearchDistance = 300
         maxNumberOfStations = 15    # Maximum number of stations to use to complete record
-        while self.finalDF.isnull().sum().sum() > 0 and num_stations_used < maxNumberOfStations and self.searchDistance <= maxSearchDistance:
-            for station in self.stations:
-                print(station)
-                n += 1
-                if n == 1:
-                    self.log.Wrap(str(self.finalDF.isnull().sum().sum()) + ' null values.')
-                if self.searchDistance > 60:
-                    need_primary = False
-                # best_station = self.getBest(need_primary=need_primary)
-                # if best_station is not None:
-                    # Note that the primary station has been found
-                    # if need_primary is True:
-                    #     need_primary = False
-                    #     primary_station = best_station # added by JLG
-                        # recalcuate and set source
-                    # Get baseline null value count
-                missing_before_normal = self.finalDF[self.dates.normal_period_data_start_date:self.dates.normal_period_end_date].isnull().sum().sum()
-                missing_before_antecedent = self.finalDF[self.dates.antecedent_period_start_date:self.dates.observation_date].isnull().sum().sum()
-                values = station.Values
-                self.log.Wrap('Attempting to replace null values with values from {}...'.format(station.name))
-                # Fill
-                try:
-                    self.finalDF.fillna(values, inplace=True)
-                except ValueError:
-                    self.log.Wrap('ERROR: No values found for {}. Station will be skipped.'.format(station.name))
-                missingAfter = self.finalDF.isnull().sum().sum()
-                self.log.Wrap(str(missingAfter) + ' null values remaining.')
-                missing_after_normal = self.finalDF[self.dates.normal_period_data_start_date:self.dates.normal_period_end_date].isnull().sum().sum()
-                missing_after_antecedent = self.finalDF[self.dates.antecedent_period_start_date:self.dates.observation_date].isnull().sum().sum()
-                num_rows_normal = missing_before_normal-missing_after_normal
-                num_rows_antecedent = missing_before_antecedent-missing_after_antecedent
-                num_rows = num_rows_normal + num_rows_antecedent
-                if num_rows > 0:
-                    num_stations_used += 1
-                    # BUILD STATIONS TABLE
-                    vals = []
-                    vals.append(station.name)
-                    vals.append(station.location)
-                    vals.append(station.elevation)
-                    vals.append(station.distance)
-                    vals.append(station.elevDiff)
-                    vals.append(station.weightedDiff)
-                    vals.append(num_rows_normal)
-                    vals.append(num_rows_antecedent)
-                    station_table_values.append(vals)
-                    # SAVE RESULTS TO CSV IN OUTPUT DIRECTORY
-                    if self.save_folder is not None:
-                        # Generate output
-                        try:
-                            station_csv_name = '{}_{}.csv'.format(station.name,self.dates.observation_date).replace('/','_') # Slashes keep getting added to file names somehow, causing failures here
-                            station_csv_path = os.path.join(self.stationFolderPath, station_csv_name)
-                            if os.path.isfile(station_csv_path) is False:
-                                self.log.Wrap('Saving station data to CSV in output folder...')
-                                station.Values.to_csv(station_csv_path)
-                        except Exception:
-                            pass # Will add an announcement that station data save failed later
-            if self.finalDF.isnull().sum().sum() > 0:
+        first_pass = True # Runs even when a batch record already used maxNumberOfStations
+        while filler.null_count() > 0 and (first_pass or self.count_stations_used(filler) < maxNumberOfStations) and self.searchDistance <= maxSearchDistance:
+            first_pass = False
+            candidates = [station for station in self.stations if station not in evaluated_stations]
+            # Lazy stations are downloaded and merged one at a time, so later stations
+            #  are only downloaded if they are needed
+            batch_size = 1 if self.lazy_stations else max(len(candidates), 1)
+            for batch_start in range(0, len(candidates), batch_size):
+                if filler.null_count() < 1:
+                    break # Complete - Later stations could not replace any values
+                batch = candidates[batch_start:batch_start + batch_size]
+                evaluated_stations.update(batch)
+                if self.lazy_stations:
+                    self.fetch_station(self.stations, self.stations.index(batch[0]))
+                missing = filler.null_count()
+                if n == 0:
+                    self.log.Wrap(str(missing) + ' null values.')
+                # Fill (Straight from the stations' stored values, in one pass per batch)
+                filled_days = filler.fill([station.Values for station in batch], batch)
+                for station, days in zip(batch, filled_days):
+                    print(station)
+                    n += 1
+                    self.log.Wrap('Attempting to replace null values with values from {}...'.format(station.name))
+                    if station.Values is None:
+                        self.log.Wrap('ERROR: No values found for {}. Station will be skipped.'.format(station.name))
+                    missing -= days
+                    self.log.Wrap(str(missing) + ' null values remaining.')
+                    if missing < 1:
+                        break # Complete - Later stations did not replace any values
+            if filler.null_count() > 0:
                 self.log.Wrap("")
                 self.log.Wrap("No suitable station available to replace null values.")
+                previous_search_distance = self.searchDistance
                 if float(self.site_lat) < 50:
                     self.searchDistance += 10 # Search distance increase interval
                 else:
                     self.searchDistance += 30 # In alaska it will probably go even higher.
-                if self.finalDF.isnull().sum().sum() > 5:
+                if filler.null_count() > 5:
                     if self.searchDistance <= maxSearchDistance:
-                        # Clearing previous table data
-                        station_table_values = []
-                        # Clearing previous dataFrame in case a better fit is found.
-                        self.log.Wrap('Creating an empty dataset to populate with weather data...')
-                        self.log.Wrap("")
-                        index = pandas.date_range(start=self.dates.normal_period_data_start_date,
-                                                  end=self.dates.actual_data_end_date,
-                                                  freq='D')
-                        self.finalDF = pandas.Series(index=index,
-                                                     dtype="object",
-                                                     name='value')
+                        # Keep the values already filled and only add stations from the new ring
                         self.log.Wrap("Widening search...")
-                        num_stations_used = 0
-                        self.getStations()
+                        self.stations = []
+                        self.getStations(inner_distance=previous_search_distance)
         self.searchDistance = 30 # Resetting this so future runs of the tool do not skip the above step.
+        if self.lazy_stations:
+            self.cancel_prefetching()
+            self.pickle_station_records()
         # Fill NaN using linear interpolation
-        if self.finalDF.isnull().sum().sum() > 0:
-            #df.update(secondDF)
+        if filler.null_count() > 0:
             self.log.Wrap("")
             self.log.Wrap('Attempting linear interpolation to fill null values...')
-            missing_before_normal = self.finalDF[self.dates.normal_period_data_start_date:self.dates.normal_period_end_date].isnull().sum().sum()
-            missing_before_antecedent = self.finalDF[self.dates.antecedent_period_start_date:self.dates.observation_date].isnull().sum().sum()
-            interp = self.finalDF.astype(float)
-            try:
-                interp.interpolate(method="time", inplace=True)
-            except Exception:
-                interp.interpolate(inplace=True)
-            self.finalDF.fillna(interp, inplace=True)
-            self.log.Wrap(str(self.finalDF.isnull().sum().sum()) + " null values remaining.")
-            missing_after_normal = self.finalDF[self.dates.normal_period_data_start_date:self.dates.normal_period_end_date].isnull().sum().sum()
-            missing_after_antecedent = self.finalDF[self.dates.antecedent_period_start_date:self.dates.observation_date].isnull().sum().sum()
-            num_rows_normal = missing_before_normal - missing_after_normal
-            num_rows_antecedent = missing_before_antecedent - missing_after_antecedent
-            num_rows = num_rows_normal + num_rows_antecedent
-            if num_rows > 0:
-                num_stations_used += 1
-                # BUILD STATIONS TABLE
-                vals = []
-                vals.append("Linear Interpolation")
-                vals.append("N/A")
-                vals.append("N/A")
-                vals.append("N/A")
-                vals.append("N/A")
-                vals.append("N/A")
-                vals.append(num_rows_normal)
-                vals.append(num_rows_antecedent)
-                station_table_values.append(vals)
-
-        if self.finalDF.isnull().sum().sum() < 1:
+            filler.interpolate(LINEAR_INTERPOLATION)
+            self.log.Wrap(str(filler.null_count()) + " null values remaining.")
+
+        # BUILD STATIONS TABLE (Days each source filled, in the order they were used)
+        days_normal, days_antecedent = self.count_source_days(filler)
+        # Sources of the normal period, in the order they were used (Part of the normals cache key)
+        normal_source_ids = [source if source is LINEAR_INTERPOLATION else source.index for source, days in zip(filler.sources, days_normal) if days > 0]
+        for source, num_rows_normal, num_rows_antecedent in zip(filler.sources, days_normal, days_antecedent):
+            if num_rows_normal + num_rows_antecedent < 1:
+                continue
+            if source is LINEAR_INTERPOLATION:
+                station_table_values.append(["Linear Interpolation", "N/A", "N/A", "N/A", "N/A", "N/A",
+                                             num_rows_normal, num_rows_antecedent])
+                continue
+            station = source
+            station_table_values.append([station.name,
+                                         station.location,
+                                         station.elevation,
+                                         station.distance,
+                                         station.elevDiff,
+                                         station.weightedDiff,
+                                         num_rows_normal,
+                                         num_rows_antecedent])
+            # SAVE RESULTS TO CSV IN OUTPUT DIRECTORY
+            if self.save_folder is not None:
+                # Generate output
+                try:
+                    station_csv_name = '{}_{}.csv'.format(station.name,self.dates.observation_date).replace('/','_') # Slashes keep getting added to file names somehow, causing failures here
+                    station_csv_path = os.path.join(self.stationFolderPath, station_csv_name)
+                    if os.path.isfile(station_csv_path) is False:
+                        self.log.Wrap('Saving station data to CSV in output folder...')
+                        station.Values.to_csv(station_csv_path)
+                except Exception:
+                    pass # Will add an announcement that station data save failed later
+        # The merged record (A daily_series.DailySeries - float32, modified in place below)
+        self.finalDF = filler.record
+
+        if self.finalDF.null_count() < 1:
             self.log.Wrap('No null values within self.finalDF')
 
         else:
             if self.data_type is not 'PRCP':
                 self.log.Wrap('Since this is not for PRCP... filling null values with "0" to allow graph output...')
-                self.finalDF.fillna(0, inplace=True)
-                if self.finalDF.isnull().sum().sum() < 1:
+                self.finalDF.fill_nulls(0)
+                if self.finalDF.null_count() < 1:
                     self.log.Wrap('No null values within self.finalDF')
         self.log.print_separator_line()
         self.log.Wrap('')
@@ -1181,7 +1214,7 @@ class Main(object):
         if self.data_type == 'PRCP':
 #            self.log.Wrap('Converting PRCP values to milimeters...')
             if self.finalDF is not None:
-                self.finalDF = self.finalDF/10.0
+                self.finalDF.scale(0.1)
 #                self.log.Wrap('self.finalDF conversion complete.')
 #            self.log.print_separator_line()
 #            self.log.Wrap('')
@@ -1191,7 +1224,7 @@ class Main(object):
         if self.data_type == 'PRCP':
             self.log.Wrap('Converting PRCP values to inches...')
             if self.finalDF is not None:
-                self.finalDF = self.finalDF * 0.03937008
+                self.finalDF.scale(0.03937008)
                 self.log.Wrap('self.finalDF conversion complete.')
  #           self.log.print_separator_line()
  #           self.log.Wrap('')
@@ -1209,43 +1242,46 @@ class Main(object):
 
         # Calculate rolling 30 day sum for the DataFrame
         self.log.Wrap('calculating 30-day rolling totals...')
-        try:
-            longRolling30day = self.finalDF.rolling(window=30, center=False).sum()
-        except Exception:
-            longRolling30day = pandas.rolling_sum(arg=self.finalDF, window=30, center=False)
         if self.data_type == 'SNWD':
             longRolling30day = self.finalDF
-        # Create version for calculating daily statistics
-        statsRolling30day = longRolling30day[self.dates.normal_period_start_date:self.dates.normal_period_end_date]
+        else:
+            longRolling30day = self.finalDF.rolling_sum(30)
+        # Create version for calculating daily statistics (A view of the rolling totals)
+        statsRolling30day = longRolling30day.between(self.dates.normal_period_start_date, self.dates.normal_period_end_date).values
         # Create version for graphing current water year
-        rolling30day = longRolling30day[self.dates.graph_start_date:self.dates.graph_end_date]
+        rolling30day = longRolling30day.between(self.dates.graph_start_date, self.dates.graph_end_date).to_series()
         # get the max value
         rolling_30_day_max = rolling30day.max()
 
-        #---Convert Normal Period 30-Day Rolling Totals to a 365x30 array---#
-        # Create a list of dates encompassing the 30-water-year Normal Period
-        normal_period_dates = pandas.date_range(self.dates.normal_period_start_date, self.dates.normal_period_end_date)
-        # Convert to 365x30 table
-        allDays = value_list_to_water_year_table(dates=normal_period_dates, values=statsRolling30day)
-
-# Get current-year Normals (And those same normals replicated over the previous and following years for graphing)
-        self.log.Wrap('Calculating Normal High and Normal Low values for each day of the year...')
-        # Create a list of dates in the selected range
-        current_water_year_dates = pandas.date_range(self.dates.current_water_year_start_date, self.dates.current_water_year_end_date)
-        # Get all days Upper and Lower Normal values for the current water year
-        current_normal_low_series, current_normal_high_series = calc_normal_values(dates=current_water_year_dates, values=allDays)
-        # Create a list of dates for the prior water year
+        # Create lists of dates for the prior, current and following water years
         prior_water_year_dates = pandas.date_range(self.dates.prior_water_year_start_date, self.dates.prior_water_year_end_date)
-        # Get all days Upper and Lower Normal values for the current water year
-        prior_normal_low_series, prior_normal_high_series = calc_normal_values(dates=prior_water_year_dates, values=allDays)
-        # Create a list of dates for the following water year
+        current_water_year_dates = pandas.date_range(self.dates.current_water_year_start_date, self.dates.current_water_year_end_date)
         following_water_year_dates = pandas.date_range(self.dates.following_water_year_start_date, self.dates.following_water_year_end_date)
-        # Get all days Upper and Lower Normal values for the current water year
-        following_normal_low_series, following_normal_high_series = calc_normal_values(dates=following_water_year_dates, values=allDays)
+        water_year_dates = prior_water_year_dates.append(current_water_year_dates).append(following_water_year_dates)
+        # Reuse the normals of an earlier run with the same normal period and stations
+        normals_key = normals_cache.make_key(self.data_type,
+                                             self.dates.normal_period_start_date,
+                                             self.dates.normal_period_end_date,
+                                             normal_source_ids)
+        cached_normals = normals_cache.CACHE.get(normals_key)
+        if cached_normals is not None and len(cached_normals[0]) == len(water_year_dates):
+            self.log.Wrap('Using cached Normal High and Normal Low values for each day of the year...')
+            normal_low_series = pandas.Series(cached_normals[0], water_year_dates)
+            normal_high_series = pandas.Series(cached_normals[1], water_year_dates)
+        else:
+            #---Convert Normal Period 30-Day Rolling Totals to a 365x30 array---#
+            # Create a list of dates encompassing the 30-water-year Normal Period
+            normal_period_dates = pandas.date_range(self.dates.normal_period_start_date, self.dates.normal_period_end_date)
+            # Convert to 365x30 table
+            allDays = value_list_to_water_year_table(dates=normal_period_dates, values=statsRolling30day)
 
-        # Append current year to prior year to create final output
-        normal_low_series = prior_normal_low_series.append(current_normal_low_series).append(following_normal_low_series)
-        normal_high_series = prior_normal_high_series.append(current_normal_high_series.append(following_normal_high_series))
+# Get current-year Normals (And those same normals replicated over the previous and following years for graphing)
+            self.log.Wrap('Calculating Normal High and Normal Low values for each day of the year...')
+            normal_low_series, normal_high_series = normals_cache.calc_normal_values(water_year_dates_list=[prior_water_year_dates,
+                                                                                                            current_water_year_dates,
+                                                                                                            following_water_year_dates],
+                                                                                     values=allDays)
+            normals_cache.CACHE.put(normals_key, normal_low_series.values, normal_high_series.values)
 
         # CREATE ANNOTATIONS
         first_point_y_rolling_total = None
@@ -1516,7 +1552,7 @@ class Main(object):
             pickle_list = [Dates,
                            rolling30day,
                            self.dates.graph_start_date,
-                           self.finalDF,
+                           self.finalDF.to_series(),
                            self.dates.graph_end_date,
                            self.forecast_setting,
                            normal_low_series,
@@ -1602,7 +1638,7 @@ class Main(object):
 
         # Plot Data on Graph
         ax1.plot(truncDates.to_pydatetime(),
-                 self.finalDF[self.dates.graph_start_date:self.dates.graph_end_date],
+                 self.finalDF.between(self.dates.graph_start_date, self.dates.graph_end_date).values,
                  color='black',
                  linewidth=1,
                  drawstyle='steps-post',
@@ -0,0 +1,131 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+
+"""
+asyncio engine for downloading GHCN-Daily station files.
+Stations are submitted from any thread and handed back (as a
+concurrent.futures.Future) once their data is stored.  The event loop, on a
+background thread, keeps track of the downloads in progress, so a station
+submitted again while it downloads shares the one download.  The downloads
+themselves are made by ghcn_daily on the engine's worker threads, with the same
+revalidation, parsing and http_client retries, deadline and circuit breaker as
+every other request, while the host's adaptive limit (concurrency_control)
+decides how many are in flight.
+"""
+
+# Import Standard Libraries
+import os
+import sys
+import asyncio
+import threading
+import concurrent.futures
+
+# Find module path
+MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
+# Find ROOT folder
+ROOT = os.path.split(MODULE_PATH)[0]
+
+# Import Custom Libraries
+try:
+    from . import ghcn_daily
+    from . import station_store
+    from . import concurrency_control
+except Exception:
+    sys.path.append(MODULE_PATH)
+    import ghcn_daily
+    import station_store
+    import concurrency_control
+
+DEFAULT_CONNECTIONS = concurrency_control.MAX_LIMIT # Most per host (The adaptive limit decides how many are used)
+
+
+def fetch_data(station):
+    """
+    Downloads a station's data unless it already has it (As station.ensure_data
+    does, but raising the download's error instead of logging it)
+    """
+    with station.fetch_lock:
+        if station.data is None:
+            dly_path = ghcn_daily.get_station_file(station.index)
+            station.set_data(station_store.get(station.index, station.dataType, dly_path))
+    return station
+
+
+class AsyncStationEngine(object):
+    """
+    Downloads stations, tracked by an asyncio event loop running on a background thread
+        - max_connections: Most downloads at once to each host (The number in flight
+          adapts below this, see concurrency_control)
+    """
+    def __init__(self, max_connections=DEFAULT_CONNECTIONS):
+        self.max_connections = max_connections
+        ghcn_daily.HOST_LIMITS.set_maximum(max_connections)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_connections,
+                                                              thread_name_prefix='async_fetcher')
+        self.downloads = {} # Download of each station, by station index (Event loop's thread only)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='async_fetcher', daemon=True)
+        self.thread.start()
+
+    def submit_station(self, station):
+        """
+        Downloads a station (station_manager.Main created with lazy=True), returning a
+        concurrent.futures.Future resolved with the station once its data is set (Or
+        raising the download's error)
+        """
+        return asyncio.run_coroutine_threadsafe(self.download_station(station), self.loop)
+
+    def submit_stations(self, stations):
+        """Downloads several stations, returning their Futures (See submit_station)"""
+        return [self.submit_station(station) for station in stations]
+
+    async def download_station(self, station):
+        """
+        Downloads a station's data on a worker thread (A station submitted again
+        while it downloads waits for the same download)
+        """
+        if station.data is not None:
+            return station
+        download = self.downloads.get(station.index)
+        if download is None:
+            download = self.loop.run_in_executor(self.executor, fetch_data, station)
+            self.downloads[station.index] = download
+            download.add_done_callback(lambda done: self.downloads.pop(station.index, None))
+        # Shielded, so cancelling one submission does not cancel the others
+        await asyncio.shield(download)
+        return station
+
+    def shutdown(self, wait=True):
+        """Cancels the downloads that have not started and stops the event loop"""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
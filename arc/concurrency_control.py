@@ -0,0 +1,208 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+"""
+Adaptive limits on the number of downloads in flight to each host.
+Each limit grows while the server answers quickly and shrinks when responses
+slow down, fail, or are throttled (HTTP 429 / 503), in the manner of TCP's
+additive-increase / multiplicative-decrease congestion control.  The download
+threads (station_fetcher) and the asyncio engine (async_fetcher) both take a
+slot from the same limit for each request, so they settle on the most parallel
+downloads NOAA's server will sustain instead of a fixed number.
+"""
+
+# Import Standard Libraries
+import time
+import threading
+import urllib.parse
+
+INITIAL_LIMIT = 4 # Downloads in flight to a host before any responses are seen
+MIN_LIMIT = 1
+MAX_LIMIT = 32
+ERROR_BACKOFF = 0.5 # Limit multiplier after a failed or throttled request
+LATENCY_BACKOFF = 0.9 # Limit multiplier after a slow response
+LATENCY_TOLERANCE = 2.0 # Responses slower than this multiple of the baseline are slow...
+LATENCY_SLACK = 0.25 # ...and at least this many seconds slower than it
+BASELINE_DRIFT = 0.02 # Share of each slower response blended into the baseline
+
+OK = 'ok'
+ERROR = 'error'
+THROTTLED = 'throttled'
+THROTTLE_STATUSES = (429, 503)
+
+
+def outcome_of_status(status):
+    """Classifies an HTTP status as OK, ERROR (Other 5xx) or THROTTLED (429 / 503)"""
+    if status in THROTTLE_STATUSES:
+        return THROTTLED
+    if status >= 500:
+        return ERROR
+    return OK
+
+
+class Slot(object):
+    """
+    One request's place under an AdaptiveLimit (Released as a context manager,
+    or by calling release)
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.started = time.monotonic()
+        self.latency = None
+        self.outcome = None
+
+    def responded(self, status):
+        """Records the arrival of the response's status line (Time to first byte)"""
+        self.latency = time.monotonic() - self.started
+        self.outcome = outcome_of_status(status)
+
+    def failed(self):
+        """Records a request that failed without a usable response"""
+        self.outcome = ERROR
+
+    def abandoned(self):
+        """Records a request given up for reasons unrelated to the host's load (Limit unchanged)"""
+        self.latency = None
+        self.outcome = OK
+
+    def release(self):
+        """Frees the slot, updating the limit from the request's outcome"""
+        if self.outcome is None:
+            self.outcome = ERROR
+        self.limit.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if exc_type is not None and self.outcome is None:
+            self.failed()
+        self.release()
+        return False
+
+
+class AdaptiveLimit(object):
+    """
+    Additive-increase / multiplicative-decrease limit on the requests in flight to one host
+        - Slow start: The limit grows by 1 per fast response until the first back-off
+        - Then grows by 1/limit per fast response (About 1 per round of requests)
+        - Halved by errors and throttling, and reduced by 10% for slow responses
+        - Reduced at most once per round (Requests started before the last reduction
+          report on the same congestion and are ignored)
+    """
+    def __init__(self, initial=INITIAL_LIMIT, minimum=MIN_LIMIT, maximum=MAX_LIMIT):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self.slow_start = True
+        self.baseline = None # Typical time to first byte of an uncongested request
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def has_room(self):
+        return self.in_flight < int(self.limit)
+
+    def acquire(self, timeout=None):
+        """Blocks until a request may start, returning its Slot (None on timeout)"""
+        with self.condition:
+            if not self.condition.wait_for(self.has_room, timeout):
+                return None
+            self.in_flight += 1
+        return Slot(self)
+
+    def try_acquire(self):
+        """Returns a Slot if a request may start now, otherwise None"""
+        with self.condition:
+            if not self.has_room():
+                return None
+            self.in_flight += 1
+        return Slot(self)
+
+    def release(self, slot):
+        """Frees a slot and adjusts the limit from its outcome"""
+        with self.condition:
+            # Requests that found the limit full are the only evidence more would help
+            was_full = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            if slot.outcome in (ERROR, THROTTLED):
+                self.decrease(slot, ERROR_BACKOFF)
+            elif slot.latency is not None:
+                if self.baseline is None or slot.latency < self.baseline:
+                    self.baseline = slot.latency
+                else:
+                    self.baseline += (slot.latency - self.baseline) * BASELINE_DRIFT
+                slow_latency = max(self.baseline * LATENCY_TOLERANCE, self.baseline + LATENCY_SLACK)
+                if slot.latency > slow_latency:
+                    self.decrease(slot, LATENCY_BACKOFF)
+                elif was_full:
+                    self.increase()
+            self.condition.notify_all()
+
+    def increase(self):
+        if self.slow_start:
+            self.limit += 1
+        else:
+            self.limit += 1.0/self.limit
+        self.limit = min(self.limit, float(self.maximum))
+
+    def decrease(self, slot, factor):
+        if slot.started < self.last_decrease:
+            return
+        self.slow_start = False
+        self.limit = max(self.limit * factor, float(self.minimum))
+        self.last_decrease = time.monotonic()
+
+
+class HostLimits(object):
+    """The AdaptiveLimit of each host (Shared by all threads and event loops)"""
+    def __init__(self, initial=INITIAL_LIMIT, minimum=MIN_LIMIT, maximum=MAX_LIMIT):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limits = {}
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        """Returns the AdaptiveLimit of the host of url"""
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            if host not in self.limits:
+                self.limits[host] = AdaptiveLimit(self.initial, self.minimum, self.maximum)
+            return self.limits[host]
+
+    def set_maximum(self, maximum):
+        """Changes the most requests allowed in flight to any host"""
+        with self.lock:
+            self.maximum = maximum
+            for limit in self.limits.values():
+                with limit.condition:
+                    limit.maximum = maximum
+                    limit.limit = min(limit.limit, float(maximum))
@@ -275,7 +275,7 @@ def shapefile_sample(lat, lon, shapefile):
 
 if __name__ == '__main__':
     import time
-    start_time = time.clock()
+    start_time = time.perf_counter()
     SCRATCH_FOLDER = os.path.join(ROOT, 'Scratch')
     WATERSHED_FOLDER = os.path.join(SCRATCH_FOLDER, 'Cosumnes River Watershed (ESRI)')
     SHAPEFILE = os.path.join(WATERSHED_FOLDER, 'Cosumnes_River_Watershed.shp')
@@ -288,5 +288,5 @@ if __name__ == '__main__':
 #    print(huc)
 #    for point in sampling_points:
 #        print(point)
-    duration = time.clock() - start_time
+    duration = time.perf_counter() - start_time
     print('DevOnly: Processing took {} seconds'.format(duration))
@@ -0,0 +1,133 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+"""
+Compact series of daily values.
+A DailySeries is a float32 array of one value per day from a fixed start date,
+with NaN marking missing days - a quarter of the memory of an object-dtype
+pandas Series, and no index to build or align.  Date slices are views of the
+array and arithmetic is done in place; rolling sums are summed in float64.
+"""
+
+# Import 3rd Party Libraries
+import numpy
+import pandas
+
+
+class DailySeries(object):
+    """
+    Daily values from start_date (One per day, NaN where missing)
+        - values: The values (float32 unless another dtype is given)
+    """
+    def __init__(self, start_date, values, dtype=numpy.float32):
+        self.start_date = numpy.datetime64(start_date, 'D')
+        self.values = numpy.asarray(values, dtype=dtype)
+
+    @classmethod
+    def empty(cls, start_date, end_date, dtype=numpy.float32):
+        """Returns a series from start_date to end_date (Inclusive) with every day missing"""
+        num_days = int((numpy.datetime64(end_date, 'D') - numpy.datetime64(start_date, 'D')).astype(numpy.int64)) + 1
+        return cls(start_date, numpy.full(num_days, numpy.nan, dtype=dtype), dtype=dtype)
+
+    @property
+    def end_date(self):
+        return self.start_date + len(self.values) - 1
+
+    @property
+    def index(self):
+        """DatetimeIndex of the days in the series"""
+        return pandas.date_range(start=pandas.Timestamp(self.start_date), periods=len(self.values), freq='D')
+
+    def __len__(self):
+        return len(self.values)
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.values
+        return self.values.astype(dtype)
+
+    def day_slice(self, start_date=None, end_date=None):
+        """Returns the slice of the days from start_date to end_date (Inclusive, clipped to the series)"""
+        start = 0
+        end = len(self.values)
+        if start_date is not None:
+            start = int((numpy.datetime64(start_date, 'D') - self.start_date).astype(numpy.int64))
+            start = min(max(start, 0), len(self.values))
+        if end_date is not None:
+            end = int((numpy.datetime64(end_date, 'D') - self.start_date).astype(numpy.int64)) + 1
+            end = min(max(end, start), len(self.values))
+        return slice(start, end)
+
+    def between(self, start_date=None, end_date=None):
+        """Returns the days from start_date to end_date (Inclusive) as a DailySeries sharing this one's values"""
+        days = self.day_slice(start_date, end_date)
+        return DailySeries(self.start_date + days.start, self.values[days], dtype=self.values.dtype)
+
+    def isnull(self):
+        """Returns a boolean array of the missing days"""
+        return numpy.isnan(self.values)
+
+    def null_count(self, start_date=None, end_date=None):
+        """Returns the number of missing days from start_date to end_date"""
+        return int(numpy.count_nonzero(numpy.isnan(self.values[self.day_slice(start_date, end_date)])))
+
+    def fill_nulls(self, value):
+        """Replaces the missing days with value (In place)"""
+        self.values[numpy.isnan(self.values)] = value
+
+    def scale(self, factor):
+        """Multiplies the values by factor (In place)"""
+        numpy.multiply(self.values, factor, out=self.values, casting='unsafe')
+
+    def rolling_sum(self, window):
+        """
+        Returns the sum of each day and the window-1 days before it as a float64
+        DailySeries (Missing where any of those days are missing, or for the first
+        window-1 days)
+        """
+        sums = numpy.full(len(self.values), numpy.nan)
+        if len(self.values) >= window:
+            windows = numpy.lib.stride_tricks.sliding_window_view(self.values, window)
+            windows.sum(axis=1, dtype=numpy.float64, out=sums[window - 1:])
+        return DailySeries(self.start_date, sums, dtype=numpy.float64)
+
+    def max(self):
+        """Returns the largest value (Ignoring missing days), or NaN if every day is missing"""
+        if numpy.isnan(self.values).all():
+            return numpy.nan
+        return numpy.nanmax(self.values)
+
+    def to_series(self):
+        """Returns the values as a pandas Series indexed by date"""
+        return pandas.Series(self.values, index=self.index, name='value')
+
+    def to_csv(self, csv_path):
+        """Saves the values to a CSV file (As pandas would save them as a Series)"""
+        self.to_series().to_csv(csv_path)
@@ -0,0 +1,176 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+"""
+Merges the daily values of several weather stations into one record.
+Stations are taken in priority order; each day gets the value of the first
+station that has one.  Candidate stations are aligned into a 2-D array (one row
+per station) and the first valid value of each day is picked in one vectorized
+pass, while an int8 provenance array records which source filled each day so
+the days contributed by each source are counted with a single bincount.
+"""
+
+# Import Standard Libraries
+import os
+import sys
+
+# Import 3rd Party Libraries
+import numpy
+
+# Find module path
+MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
+# Find ROOT folder
+ROOT = os.path.split(MODULE_PATH)[0]
+
+# Import Custom Libraries
+try:
+    from . import station_store
+    from . import daily_series
+except Exception:
+    sys.path.append(MODULE_PATH)
+    import station_store
+    import daily_series
+
+NO_SOURCE = -1 # Provenance of days no source has filled
+
+
+class GapFiller(object):
+    """
+    Merged daily values from start_date to end_date (Inclusive)
+        - record: daily_series.DailySeries of the merged values (NaN where still missing)
+        - values: The float32 array of record
+        - provenance: int8 array of the index (in sources) of the source that filled each day
+        - sources: The sources that filled at least one day, in the order they were used
+    """
+    def __init__(self, start_date, end_date):
+        self.first_day = station_store.day_number(start_date)
+        self.record = daily_series.DailySeries.empty(start_date, end_date)
+        self.values = self.record.values
+        num_days = len(self.values)
+        self.provenance = numpy.full(num_days, NO_SOURCE, dtype=numpy.int8)
+        self.sources = []
+
+    def day_slice(self, start_date=None, end_date=None):
+        """Returns the slice of the days from start_date to end_date (Inclusive)"""
+        start = None if start_date is None else max(station_store.day_number(start_date) - self.first_day, 0)
+        end = None if end_date is None else max(station_store.day_number(end_date) - self.first_day + 1, 0)
+        return slice(start, end)
+
+    def null_count(self, start_date=None, end_date=None):
+        """Returns the number of days still missing between start_date and end_date"""
+        return self.record.null_count(start_date, end_date)
+
+    def counts(self, start_date=None, end_date=None):
+        """Returns the number of days each source filled between start_date and end_date"""
+        provenance = self.provenance[self.day_slice(start_date, end_date)].astype(numpy.intp)
+        return numpy.bincount(provenance + 1, minlength=len(self.sources) + 1)[1:]
+
+    def copy(self, start_date, end_date):
+        """
+        Returns a new GapFiller of the days from start_date to end_date (Which must lie
+        within this one's days), keeping their values, provenance and sources
+        """
+        part = GapFiller(start_date, end_date)
+        days = self.day_slice(start_date, end_date)
+        part.values[:] = self.values[days]
+        part.provenance = self.provenance[days].copy()
+        part.sources = list(self.sources)
+        return part
+
+    def add_sources(self, sources):
+        """Registers sources, returning their indices (Widening provenance if int8 runs out)"""
+        first_index = len(self.sources)
+        self.sources.extend(sources)
+        if len(self.sources) > numpy.iinfo(self.provenance.dtype).max:
+            self.provenance = self.provenance.astype(numpy.int16)
+        return first_index + numpy.arange(len(sources))
+
+    def align(self, window, out):
+        """Copies the valid values of a station_store.StoredWindow into out (Aligned with self.values)"""
+        offset = window.first_day - self.first_day
+        start = max(offset, 0)
+        end = min(offset + len(window.values), len(out))
+        if end <= start:
+            return
+        source = slice(start - offset, end - offset)
+        target = out[start:end]
+        valid = window.valid[source]
+        target[valid] = window.values[source][valid]
+
+    def fill(self, windows, sources):
+        """
+        Fills the missing days from windows (station_store.StoredWindow objects,
+        or None, highest priority first), one source per window
+        Returns the number of days each window filled
+        """
+        missing = numpy.isnan(self.values)
+        filled_days = numpy.zeros(len(windows), dtype=numpy.intp)
+        if len(windows) < 1 or not missing.any():
+            return filled_days
+        # One row per window, in priority order (float32 holds the stored int16 values exactly)
+        stack = numpy.full((len(windows), len(self.values)), numpy.nan, dtype=numpy.float32)
+        for row, window in enumerate(windows):
+            if window is not None:
+                self.align(window, stack[row])
+        has_value = ~numpy.isnan(stack)
+        has_value &= missing
+        fill_days = has_value.any(axis=0)
+        first_row = has_value.argmax(axis=0)[fill_days]
+        day_positions = numpy.flatnonzero(fill_days)
+        self.values[day_positions] = stack[first_row, day_positions]
+        filled_days = numpy.bincount(first_row, minlength=len(windows))
+        # Record provenance for the windows that filled days
+        used_rows = numpy.flatnonzero(filled_days)
+        source_index = numpy.full(len(windows), NO_SOURCE, dtype=numpy.intp)
+        source_index[used_rows] = self.add_sources([sources[row] for row in used_rows])
+        self.provenance[day_positions] = source_index[first_row]
+        return filled_days
+
+    def interpolate(self, source):
+        """
+        Fills missing days by linear interpolation between the days around them (Days
+        after the last value take that value; days before the first stay missing)
+        Returns the number of days filled
+        """
+        missing = numpy.isnan(self.values)
+        known_positions = numpy.flatnonzero(~missing)
+        if len(known_positions) < 1:
+            return 0
+        missing[:known_positions[0]] = False
+        missing_positions = numpy.flatnonzero(missing)
+        if len(missing_positions) < 1:
+            return 0
+        self.values[missing_positions] = numpy.interp(missing_positions, known_positions, self.values[known_positions])
+        self.provenance[missing_positions] = self.add_sources([source])[0]
+        return len(missing_positions)
+
+    def to_series(self):
+        """Returns the merged values as a Series indexed by date"""
+        return self.record.to_series()
@@ -45,9 +45,6 @@ import sys
 import traceback
 
 # Import 3rd Party Libraries
-import json
-import urllib3
-import requests
 from bs4 import BeautifulSoup
 
 # Find module path
@@ -57,9 +54,11 @@ ROOT = os.path.split(MODULE_PATH)[0]
 
 # Import Custom Libraries
 try:
+    from . import http_client
     from .utilities import JLog
     from .utilities import selenium_operations
 except Exception:
+    import http_client
     # Reverse compatibility step - Add utilities folder to path directly
     PYTHON_SCRIPTS_FOLDER = os.path.join(ROOT, 'Python Scripts')
     TEST = os.path.exists(PYTHON_SCRIPTS_FOLDER)
@@ -75,65 +74,32 @@ except Exception:
 
 L = JLog.PrintLog()
 
+# Common USGS Error Message
+TEMP_UNAVAILABLE_MESSAGE = 'The requested service is temporarily unavailable.  Please try later.'
+
 def get_json_multiple_ways(url):
-    """Tries to pull JSON data from a URL using urllib3 first and then requests"""
+    """
+    Pulls JSON data from a URL with the shared http_client (Retrying with backoff
+    while the USGS server reports that it is temporarily unavailable)
+    """
     log = JLog.PrintLog()
+    base_url = url
     if 'https://nationalmap.gov/epqs' in url:
         base_url = 'https://nationalmap.gov/epqs'
     elif 'https://ned.usgs.gov/epqs' in url:
         base_url = 'https://ned.usgs.gov/epqs'
-    # Common USGS Error Message
-    temp_unavailable_message = 'The requested service is temporarily unavailable.  Please try later.'
-    unavailable_error_count = 0
-    # Try urllib3
-    # Try Requests module
-    try:
-        log.print_status_message('Querying {}...'.format(base_url))
-        content = requests.get(url, timeout=15)
-        time.sleep(.5)
-        while temp_unavailable_message in content.text:
-            del content
-            unavailable_error_count += 1
-            log.Write('     USGS SERVER:  "{}"'.format(temp_unavailable_message))
+    def temporarily_unavailable(response):
+        if TEMP_UNAVAILABLE_MESSAGE in response.text:
+            log.Write('     USGS SERVER:  "{}"'.format(TEMP_UNAVAILABLE_MESSAGE))
             log.print_status_message('     Retrying query of {}...'.format(base_url))
-            time.sleep(unavailable_error_count)
-            content = requests.get(url)
-            time.sleep(unavailable_error_count)
-            if unavailable_error_count > 4:
-                unavailable_error_count = 0
-                break
-        json_conversion = content.json()
-        return json_conversion
-    except Exception:
-        requests_exception = traceback.format_exc()
+            return True
+        return False
     try:
         log.print_status_message('Querying {}...'.format(base_url))
-        http = urllib3.PoolManager(cert_reqs='CERT_REQUIRED')
-        response = http.request('GET', url)
-        time.sleep(1)
-        string_data = str(response.data, 'utf-8')
-        while temp_unavailable_message in string_data:
-            del response
-            unavailable_error_count += 1
-            log.Write('     USGS SERVER:  "{}"'.format(temp_unavailable_message))
-            log.print_status_message('     Retrying query of {}...'.format(base_url))
-            time.sleep(unavailable_error_count)
-            response = http.request('GET', url)
-            sleep_duration = 3 + unavailable_error_count
-            time.sleep(sleep_duration)
-            string_data = str(response.data, 'utf-8')
-            if unavailable_error_count > 4:
-                unavailable_error_count = 0
-                break
-        json_conversion = json.loads(string_data)
-        return json_conversion
+        return http_client.get_json(url, timeout=(15, 15), retry_if=temporarily_unavailable)
     except Exception:
         L.Write('    ---Requests Exception Traceback---')
-        L.Write(requests_exception)
-        L.Write('    ----------------------------------')
-        urllib3_exception = traceback.format_exc()
-        L.Write('    ---urllib3 Exception Traceback---')
-        L.Write(urllib3_exception)
+        L.Write(traceback.format_exc())
         L.Write('    ----------------------------------')
 
 
@@ -41,7 +41,6 @@
 # Import Standard Libraries
 import os
 import sys
-import requests
 import time
 import zipfile
 
@@ -54,8 +53,10 @@ ROOT = os.path.split(MODULE_PATH)[0]
 # Import Custom Libraries
 try:
     # Frozen Application Method
+    from . import http_client
     from .utilities import JLog
 except Exception:
+    import http_client
     # Reverse compatibility method - add utilities folder to path directly
     PYTHON_SCRIPTS_FOLDER = os.path.join(ROOT, 'Python Scripts')
     TEST = os.path.exists(PYTHON_SCRIPTS_FOLDER)
@@ -74,7 +75,7 @@ except Exception:
 def parse_version(version_file_path=None, version_url=None):
     """
     If path is provided, reads file and parses version number
-    If url is provided, Uses requests to check the first line of a text file at a URL
+    If url is provided, Uses the shared http_client to check the first line of a text file at a URL
     """
     if not version_file_path is None:
         with open(version_file_path, 'r') as version_file:
@@ -94,8 +95,7 @@ def parse_version(version_file_path=None, version_url=None):
             version_minor = 0
             version_patch = 0
     if not version_url is None:
-        response = requests.get(version_url)
-        time.sleep(.1)
+        response = http_client.get(version_url)
         version_string = response.text.replace('\n','')
         version_list = version_string.split('.')
         version_major = int(version_list[0])
@@ -156,26 +156,14 @@ def ensure_file_exists(file_url, local_file_path, local_check_file=None,
             os.makedirs(download_dir)
         except Exception:
             pass
-        dl_start = time.clock()
-        # Streaming with requests module
-        num_bytes = 0
-        count = 0
-        with requests.get(file_url, stream=True) as r:
-            r.raise_for_status()
-            with open(local_file_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192): 
-                    if chunk: # filter out keep-alive new chunks
-                        f.write(chunk)
-                        num_bytes += 8192
-                        count += 1
-                        if count > 25:
-                            formatted_bytes = sizeof_fmt(num_bytes)
-                            log.print_status_message('    Downloading {}... ({})'.format(file_name, formatted_bytes))
-                            count = 0
+        dl_start = time.perf_counter()
+        # Streaming with the shared http_client
+        def progress(num_bytes):
+            log.print_status_message('    Downloading {}... ({})'.format(file_name, sizeof_fmt(num_bytes)))
+        num_bytes = http_client.download(file_url, local_file_path, progress=progress)
         formatted_bytes = sizeof_fmt(num_bytes)
         log.Wrap('    {} Downloaded ({})'.format(file_name, formatted_bytes))
         sys.stdout.flush()
-        time.sleep(.1)
         # Extract compressed package if selected
         if extract_path is None:
             extracted = ''
@@ -239,26 +227,14 @@ def get_only_newer_version(file_url, local_file_path, local_check_file=None,
             os.makedirs(download_dir)
         except Exception:
             pass
-        dl_start = time.clock()
-        # Streaming with requests module
-        num_bytes = 0
-        count = 0
-        with requests.get(file_url, stream=True) as r:
-            r.raise_for_status()
-            with open(local_file_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192): 
-                    if chunk: # filter out keep-alive new chunks
-                        f.write(chunk)
-                        num_bytes += 8192
-                        count += 1
-                        if count > 25:
-                            formatted_bytes = sizeof_fmt(num_bytes)
-                            log.print_status_message('    Downloading {}... ({})'.format(file_name, formatted_bytes))
-                            count = 0
+        dl_start = time.perf_counter()
+        # Streaming with the shared http_client
+        def progress(num_bytes):
+            log.print_status_message('    Downloading {}... ({})'.format(file_name, sizeof_fmt(num_bytes)))
+        num_bytes = http_client.download(file_url, local_file_path, progress=progress)
         formatted_bytes = sizeof_fmt(num_bytes)
         log.Wrap('    {} Downloaded ({})'.format(file_name, formatted_bytes))
         sys.stdout.flush()
-        time.sleep(.1)
         # Extract compressed package if selected
         if extract_path is None:
             extracted = ''
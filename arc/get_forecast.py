@@ -46,15 +46,8 @@ from __future__ import (print_function, absolute_import)  # Python 3 support
 import os
 import sys
 import datetime
-import time
 import traceback
 
-# Import 3rd Party Libraries
-import urllib3
-import json
-import requests
-
-
 # Find module path
 MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
 # Find ROOT folder
@@ -62,8 +55,10 @@ ROOT = os.path.split(MODULE_PATH)[0]
 
 # import custom libraries
 try:
+    from . import http_client
     from .utilities import JLog
 except Exception:
+    import http_client
     # Reverse compatibility step - Add utilities folder to path directly
     PYTHON_SCRIPTS_FOLDER = os.path.join(ROOT, 'Python Scripts')
     TEST = os.path.exists(PYTHON_SCRIPTS_FOLDER)
@@ -79,30 +74,12 @@ except Exception:
 L = JLog.PrintLog(Indent=2)
 
 def get_json_multiple_ways(url=None):
-    """Tries to pull JSON data from a URL using urllib3 first and then requests"""
-    # Try urllib3
+    """Pulls JSON data from a URL with the shared http_client"""
     try:
-        http = urllib3.PoolManager(cert_reqs='CERT_REQUIRED')
-        response = http.request('GET', url)
-        time.sleep(3)
-        string_data = str(response.data, 'utf-8')
-        json_conversion = json.loads(string_data)
-        return json_conversion
+        return http_client.get_json(url)
     except Exception:
-        urllib3_exception = traceback.format_exc()
-    # Try Requests module
-    try:
-        content = requests.get(url)
-        time.sleep(3)
-        json_conversion = content.json()
-        return json_conversion
-    except Exception:
-        requests_exception = traceback.format_exc()
-        L.Write('    ---urllib3 Exception Traceback---')
-        L.Write(urllib3_exception)
-        L.Write('    ----------------------------------')
         L.Write('    ---Requests Exception Traceback---')
-        L.Write(requests_exception)
+        L.Write(traceback.format_exc())
         L.Write('    ----------------------------------')
 
 class EightDayForecast(object):
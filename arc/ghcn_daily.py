@@ -0,0 +1,399 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+"""
+Native client for NOAA GHCN-Daily files.
+Files are kept on disk with the ETag and Last-Modified headers they were served
+with, and are revalidated with a conditional request (If-None-Match /
+If-Modified-Since) so unchanged files are read from disk instead of downloaded.
+Station (.dly) files are parsed with NumPy, decoding only the requested element.
+When a local mirror of GHCN-Daily is configured, files are read from it and NOAA
+is never contacted.
+"""
+
+# Import Standard Libraries
+import os
+import sys
+import json
+import time
+import threading
+import email.utils
+import urllib.parse
+
+# Import 3rd Party Libraries
+import numpy
+import pandas
+import requests
+
+# Find module path
+MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
+# Find ROOT folder
+ROOT = os.path.split(MODULE_PATH)[0]
+
+# Import Custom Libraries
+try:
+    from . import http_client
+    from . import concurrency_control
+except Exception:
+    sys.path.append(MODULE_PATH)
+    import http_client
+    import concurrency_control
+
+BASE_URL = 'https://www1.ncdc.noaa.gov/pub/data/ghcn/daily'
+
+# Keep files where ulmo looks for them, so both read the same copies
+try:
+    from ulmo.ncdc.ghcn_daily.core import GHCN_DAILY_DIR as STORE_FOLDER
+except Exception:
+    STORE_FOLDER = os.path.join(ROOT, 'cached', 'ghcn_daily')
+
+# Files younger than this are used without contacting the server (0 = always revalidate)
+MAX_AGE_HOURS = 0
+
+SESSION = http_client.SESSION
+
+
+class HostRateLimiter(object):
+    """Spaces out the requests made to each host (Shared by all threads)"""
+    def __init__(self, requests_per_second=None):
+        self.requests_per_second = requests_per_second
+        self.next_request_times = {}
+        self.lock = threading.Lock()
+
+    def reserve(self, url):
+        """Reserves the next request to the host of url, returning the seconds to wait for it"""
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            request_time = max(now, self.next_request_times.get(host, now))
+            if self.requests_per_second:
+                self.next_request_times[host] = request_time + 1.0/self.requests_per_second
+        return request_time - now
+
+    def defer(self, url, seconds):
+        """Holds back all requests to the host of url for seconds (e.g. for a Retry-After header)"""
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            resume_time = time.monotonic() + seconds
+            self.next_request_times[host] = max(resume_time, self.next_request_times.get(host, resume_time))
+
+    def wait(self, url):
+        """Blocks until another request may be made to the host of url"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+
+RATE_LIMITER = HostRateLimiter()
+# Downloads in flight to each host, adapted to how well the host keeps up
+HOST_LIMITS = concurrency_control.HostLimits()
+
+
+def configure_session(pool_size, requests_per_second=None):
+    """
+    Sizes the shared session's connection pool for pool_size threads, caps the
+    downloads in flight to each host at pool_size and sets the rate limit
+    """
+    adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=max(pool_size, http_client.POOL_SIZE))
+    SESSION.mount('https://', adapter)
+    SESSION.mount('http://', adapter)
+    RATE_LIMITER.requests_per_second = requests_per_second
+    HOST_LIMITS.set_maximum(pool_size)
+
+
+def note_throttling(url, status, retry_after):
+    """Holds back requests to a host that throttled a request (429 / 503)"""
+    if status in concurrency_control.THROTTLE_STATUSES:
+        RATE_LIMITER.defer(url, http_client.retry_after_seconds(retry_after))
+
+# Local mirror of GHCN-Daily (Set by the APT_GHCN_MIRROR environment variable, or
+#  a "ghcn_mirror" folder next to "cached") holding ghcnd-stations.txt,
+#  ghcnd-inventory.txt and the station .dly files (Loose, or in "all" / an
+#  unpacked "ghcnd_all" folder)
+MIRROR_ENVIRONMENT_VARIABLE = 'APT_GHCN_MIRROR'
+DEFAULT_MIRROR_FOLDER = os.path.join(ROOT, 'ghcn_mirror')
+MIRROR_SUBFOLDERS = ['', 'all', 'ghcnd_all']
+
+
+class MirrorFileMissing(IOError):
+    """Raised when a file is requested that the local mirror does not have"""
+
+
+def mirror_folder():
+    """Returns the local mirror folder in use, or None when files come from NOAA"""
+    folder = os.environ.get(MIRROR_ENVIRONMENT_VARIABLE)
+    if folder:
+        return folder
+    if os.path.isdir(DEFAULT_MIRROR_FOLDER):
+        return DEFAULT_MIRROR_FOLDER
+    return None
+
+
+def mirror_path(file_name, folder=None):
+    """Returns the path of a file within the local mirror, or None if the mirror lacks it"""
+    if folder is None:
+        folder = mirror_folder()
+    if folder is None:
+        return None
+    for subfolder in MIRROR_SUBFOLDERS:
+        file_path = os.path.join(folder, subfolder, file_name)
+        if os.path.isfile(file_path):
+            return file_path
+    return None
+
+
+def file_url(file_name):
+    """Returns the NOAA URL of a GHCN-Daily file (Station files live in the 'all' folder)"""
+    if file_name.startswith('ghcnd-'):
+        return '{}/{}'.format(BASE_URL, file_name)
+    return '{}/all/{}'.format(BASE_URL, file_name)
+
+
+def local_path(file_name):
+    """Returns the path of a GHCN-Daily file within the local store"""
+    return os.path.join(STORE_FOLDER, file_name)
+
+
+def read_validators(file_path):
+    """Returns the ETag / Last-Modified headers saved with a stored file"""
+    try:
+        with open(file_path + '.json', 'r') as validators_file:
+            return json.load(validators_file)
+    except Exception:
+        return {}
+
+
+def write_validators(file_path, response):
+    """Saves the ETag / Last-Modified headers of a response next to the stored file"""
+    save_validators(file_path, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+
+def save_validators(file_path, etag, last_modified):
+    """Saves the ETag / Last-Modified headers a file was served with next to the stored file"""
+    validators = {}
+    if etag:
+        validators['etag'] = etag
+    if last_modified:
+        validators['last_modified'] = last_modified
+    with open(file_path + '.json', 'w') as validators_file:
+        json.dump(validators, validators_file)
+
+
+def conditional_headers(file_path, max_age_hours=None):
+    """
+    Returns (fresh, headers) for a stored file
+        - fresh: The file is younger than max_age_hours and can be used as is
+        - headers: Request headers asking for the file only if it changed since it was stored
+    """
+    if max_age_hours is None:
+        max_age_hours = MAX_AGE_HOURS
+    headers = {}
+    if os.path.exists(file_path):
+        age_hours = (time.time() - os.path.getmtime(file_path))/60/60
+        if age_hours < max_age_hours:
+            return True, headers
+        validators = read_validators(file_path)
+        if 'etag' in validators:
+            headers['If-None-Match'] = validators['etag']
+        if 'last_modified' in validators:
+            headers['If-Modified-Since'] = validators['last_modified']
+        else:
+            headers['If-Modified-Since'] = email.utils.formatdate(os.path.getmtime(file_path), usegmt=True)
+    return False, headers
+
+
+def temp_path_for(file_path):
+    """Returns a temporary path to download file_path to (Unique to the process and thread)"""
+    return '{}.{}.{}.part'.format(file_path, os.getpid(), threading.get_ident())
+
+
+def get_file(file_name, max_age_hours=None, timeout=(15, 120), deadline=http_client.DOWNLOAD_DEADLINE):
+    """
+    Ensures a current copy of a GHCN-Daily file is in the local store and returns its path.
+        - Files are read from the local mirror instead, when one is configured
+        - Files younger than max_age_hours are returned without contacting the server
+        - Otherwise the server is asked for the file only if it changed since it was stored
+        - Failed requests are retried by http_client (Backoff, deadline and circuit breaker)
+    """
+    folder = mirror_folder()
+    if folder is not None:
+        file_path = mirror_path(file_name, folder)
+        if file_path is None:
+            raise MirrorFileMissing('{} is not in the GHCN-Daily mirror ({})'.format(file_name, folder))
+        return file_path
+    file_path = local_path(file_name)
+    fresh, headers = conditional_headers(file_path, max_age_hours)
+    if fresh:
+        return file_path
+    url = file_url(file_name)
+    def attempt(remaining):
+        RATE_LIMITER.wait(url)
+        with HOST_LIMITS.get(url).acquire() as slot:
+            response = SESSION.get(url, headers=headers, timeout=http_client.clip_timeout(timeout, remaining), stream=True)
+            slot.responded(response.status_code)
+            with response:
+                if response.status_code == 304:
+                    # Unchanged - restart the age of the stored copy
+                    os.utime(file_path, None)
+                    return file_path
+                note_throttling(url, response.status_code, response.headers.get('Retry-After'))
+                http_client.check_status(response)
+                try:
+                    os.makedirs(STORE_FOLDER)
+                except Exception:
+                    pass
+                temp_path = temp_path_for(file_path)
+                try:
+                    with open(temp_path, 'wb') as stored_file:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            if chunk:
+                                stored_file.write(chunk)
+                except requests.RequestException:
+                    slot.failed()
+                    raise
+                os.replace(temp_path, file_path)
+                write_validators(file_path, response)
+        return file_path
+    return http_client.call_with_retries(url, attempt, deadline=deadline)
+
+
+def get_station_file(station_id, max_age_hours=None):
+    """Ensures a current copy of a station's .dly file is stored and returns its path"""
+    return get_file('{}.dly'.format(station_id), max_age_hours=max_age_hours)
+
+
+RECORD_LENGTH = 269 # Characters in each line of a .dly file
+MISSING_VALUE = -9999
+
+
+def parse_fixed_width_integers(chars, missing=MISSING_VALUE):
+    """
+    Decodes right-aligned integer fields (e.g. '  -12') from a 2-D array of
+    ASCII codes, one field per row (Fields without any digit decode as missing)
+    """
+    digits = chars.astype(numpy.int64) - 48
+    is_digit = (digits >= 0) & (digits <= 9)
+    powers = 10 ** numpy.arange(chars.shape[-1] - 1, -1, -1, dtype=numpy.int64)
+    magnitude = (numpy.where(is_digit, digits, 0) * powers).sum(axis=-1)
+    negative = (chars == ord('-')).any(axis=-1)
+    values = numpy.where(negative, -magnitude, magnitude)
+    return numpy.where(is_digit.any(axis=-1), values, missing)
+
+
+def parse_dly(dly_text, element):
+    """
+    Parses the text of a GHCN-Daily .dly file, keeping only the records of
+    element (PRCP, SNOW, SNWD...)
+    Returns a Series of the element's reported daily values (Missing days are
+    omitted) indexed by date
+    Lines shorter than a full record (e.g. the end of a partial download) are skipped
+    """
+    element = element.encode() if not isinstance(element, bytes) else element
+    lines = dly_text.splitlines()
+    if not lines:
+        return pandas.Series([], index=pandas.DatetimeIndex([]), dtype=numpy.float64, name='value')
+    lines = numpy.array(lines, dtype='S{}'.format(RECORD_LENGTH))
+    lines = lines[numpy.char.str_len(lines) == RECORD_LENGTH]
+    records = lines.view(numpy.uint8).reshape(len(lines), RECORD_LENGTH)
+    # Filter record lines by element code before decoding anything else
+    records = records[(records[:, 17:21] == numpy.frombuffer(element, dtype=numpy.uint8)).all(axis=1)]
+    if len(records) < 1:
+        return pandas.Series([], index=pandas.DatetimeIndex([]), dtype=numpy.float64, name='value')
+    years = parse_fixed_width_integers(records[:, 11:15])
+    months = parse_fixed_width_integers(records[:, 15:17])
+    # Value fields start at column 21 and repeat every 8 characters (value + 3 flags)
+    day_slots = records[:, 21:RECORD_LENGTH].reshape(len(records), 31, 8)[:, :, 0:5]
+    values = parse_fixed_width_integers(day_slots)
+    # Drop missing values and the slots past the end of each month
+    month_starts = ((years - 1970) * 12 + months - 1).astype('datetime64[M]')
+    month_lengths = ((month_starts + 1).astype('datetime64[D]') - month_starts.astype('datetime64[D]')).astype(numpy.int64)
+    days = numpy.arange(31)
+    valid = (values != MISSING_VALUE) & (days[numpy.newaxis, :] < month_lengths[:, numpy.newaxis])
+    dates = month_starts.astype('datetime64[D]')[:, numpy.newaxis] + days[numpy.newaxis, :]
+    dates = dates[valid]
+    values = values[valid].astype(numpy.float64)
+    order = numpy.argsort(dates, kind='mergesort')
+    return pandas.Series(values[order], index=pandas.DatetimeIndex(dates[order].astype('datetime64[ns]')), name='value')
+
+
+def get_element(station_id, element, max_age_hours=None):
+    """
+    Returns a station's daily series of element (see parse_dly), revalidating
+    the stored station file first
+    """
+    file_path = get_station_file(station_id, max_age_hours=max_age_hours)
+    with open(file_path, 'rb') as dly_file:
+        return parse_dly(dly_file.read(), element)
+
+
+STATION_LIST_COLUMNS = [('id', (0, 11)),
+                        ('country', (0, 2)),
+                        ('network', (2, 3)),
+                        ('network_id', (3, 11)),
+                        ('latitude', (12, 20)),
+                        ('longitude', (21, 30)),
+                        ('elevation', (31, 37)),
+                        ('state', (38, 40)),
+                        ('name', (41, 71)),
+                        ('gsn_flag', (72, 75)),
+                        ('hcn_flag', (76, 79)),
+                        ('wm_oid', (80, 85))]
+
+
+def read_station_list(stations_path, inventory_path=None, element=None):
+    """
+    Parses ghcnd-stations.txt into a DataFrame indexed by station ID (Same
+    columns as ulmo's station list), keeping only the stations the inventory
+    lists with element when both are given
+    """
+    stations = pandas.read_fwf(stations_path,
+                               colspecs=[colspec for name, colspec in STATION_LIST_COLUMNS],
+                               names=[name for name, colspec in STATION_LIST_COLUMNS],
+                               dtype={'id': str, 'country': str, 'network': str, 'network_id': str,
+                                      'state': str, 'name': str, 'gsn_flag': str, 'hcn_flag': str,
+                                      'wm_oid': str},
+                               header=None)
+    if inventory_path is not None and element is not None:
+        element = element.encode() if not isinstance(element, bytes) else element
+        with open(inventory_path, 'rb') as inventory_file:
+            station_ids = set(line[0:11].decode() for line in inventory_file if line[31:35] == element)
+        stations = stations[stations['id'].isin(station_ids)]
+    return stations.set_index('id', drop=False)
+
+
+def get_stations(element):
+    """Returns the list of stations reporting element (See read_station_list)"""
+    stations_path = get_file('ghcnd-stations.txt')
+    inventory_path = get_file('ghcnd-inventory.txt')
+    return read_station_list(stations_path, inventory_path, element)
+
+
+if __name__ == '__main__':
+    print(get_element('USC00044484', 'PRCP'))
@@ -0,0 +1,293 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+"""
+Shared HTTP client for the Antecedent Precipitation Tool.
+All web requests go through one pooled requests.Session.  Each call has a
+deadline covering all of its attempts; failed attempts (connection errors,
+timeouts, HTTP 429 and 5xx) are retried after an exponential backoff with full
+jitter (Or the server's Retry-After), and a per-host circuit breaker stops
+calling a host that keeps failing until it has had time to recover (Calls wait
+for it to close again rather than failing, while their deadline allows).
+Successful calls return immediately - there are no fixed sleeps.
+"""
+
+# Import Standard Libraries
+import os
+import time
+import random
+import threading
+import email.utils
+import urllib.parse
+
+# Import 3rd Party Libraries
+import requests
+
+TIMEOUT = (10, 60) # Seconds to connect, and between bytes received
+DEADLINE = 120 # Seconds allowed for a call, including all retries
+DOWNLOAD_DEADLINE = 900 # Seconds allowed for a file download, including all retries
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 0.5 # Seconds - The longest wait before attempt n+1 is BACKOFF_BASE * 2**n...
+BACKOFF_CAP = 15 # ...up to BACKOFF_CAP
+DEFAULT_RETRY_AFTER = 5 # Seconds to hold back after a 429 / 503 without a Retry-After header
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BREAKER_FAILURES = 5 # Consecutive failed attempts that open a host's circuit breaker
+BREAKER_RESET = 30 # Seconds an open circuit breaker waits before letting a trial request through
+BREAKER_POLL = 1 # Seconds between checks while another call makes an open breaker's trial request
+POOL_SIZE = 32 # Connections kept per host
+CHUNK_SIZE = 65536
+PROGRESS_BYTES = 25 * 8192 # Bytes between progress calls of download (As often as the old 8 KB chunk loops printed)
+
+SESSION = requests.Session()
+SESSION.mount('https://', requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE))
+SESSION.mount('http://', requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE))
+
+
+class RetryableStatus(requests.HTTPError):
+    """
+    Raised for responses with a status in RETRY_STATUSES (Or rejected by a retry_if check)
+    host_failed is False when the host answered but was busy (Retried without counting
+    against its circuit breaker)
+    """
+    def __init__(self, message, response=None, retry_after=None, host_failed=True):
+        requests.HTTPError.__init__(self, message, response=response)
+        self.retry_after = retry_after
+        self.host_failed = host_failed
+
+
+class CircuitOpen(IOError):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class DeadlineExceeded(IOError):
+    """Raised when a call's deadline passes before an attempt succeeds"""
+
+
+class CircuitBreaker(object):
+    """
+    Tracks the failures of one host
+        - Closed: Requests are made
+        - Open (After BREAKER_FAILURES consecutive failures): Requests are refused for BREAKER_RESET seconds
+        - Half-open: One trial request is made, closing the breaker if it succeeds and re-opening it if not
+    """
+    def __init__(self, failure_threshold=BREAKER_FAILURES, reset_seconds=BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Returns True if a request may be made now"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.trial_running = True
+            return True
+
+    def seconds_until_trial(self):
+        """Returns the seconds to wait before the breaker may let a request through"""
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            if self.trial_running:
+                return BREAKER_POLL
+            return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+BREAKERS = {}
+BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(url):
+    """Returns the CircuitBreaker of the host of url"""
+    host = urllib.parse.urlsplit(url).netloc
+    with BREAKERS_LOCK:
+        if host not in BREAKERS:
+            BREAKERS[host] = CircuitBreaker()
+        return BREAKERS[host]
+
+
+def retry_after_seconds(value):
+    """Seconds requested by a Retry-After header value (Seconds or an HTTP date)"""
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_time.timestamp() - time.time())
+    except Exception:
+        return DEFAULT_RETRY_AFTER
+
+
+def backoff_delay(attempt_number, retry_after=None):
+    """Seconds to wait after failed attempt attempt_number (0 = first), with full jitter"""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt_number))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def clip_timeout(timeout, remaining):
+    """Shortens a requests timeout (Seconds, or (connect, read) seconds) to fit the time remaining"""
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+def check_status(response):
+    """
+    Raises RetryableStatus (Closing the response) if its status is in
+    RETRY_STATUSES, or requests.HTTPError for other error statuses
+    """
+    if response.status_code in RETRY_STATUSES:
+        retry_after = None
+        if response.status_code in (429, 503):
+            retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+        response.close()
+        raise RetryableStatus('{} {} for {}'.format(response.status_code, response.reason, response.url),
+                              response=response, retry_after=retry_after)
+    response.raise_for_status()
+
+
+RETRYABLE_ERRORS = (requests.ConnectionError,
+                    requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                    RetryableStatus)
+
+
+def call_with_retries(url, attempt, deadline=DEADLINE, max_attempts=MAX_ATTEMPTS):
+    """
+    Calls attempt(remaining_seconds) until it returns, retrying the failures in
+    RETRYABLE_ERRORS after a backoff while the deadline and max_attempts allow
+    (url selects the host's circuit breaker - While it is open, the call waits for
+     its trial request, raising CircuitOpen only if the deadline would pass first)
+    """
+    breaker = get_breaker(url)
+    end_time = time.monotonic() + deadline
+    attempt_number = 0
+    while True:
+        remaining = end_time - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded('No response from {} within {} seconds'.format(url, deadline))
+        if not breaker.allow():
+            # Wait for the breaker to let a trial request through (Not counted as an
+            #  attempt) while the deadline allows
+            wait = breaker.seconds_until_trial()
+            if time.monotonic() + wait >= end_time:
+                raise CircuitOpen('Requests to {} are paused after repeated failures'.format(urllib.parse.urlsplit(url).netloc))
+            time.sleep(wait)
+            continue
+        try:
+            result = attempt(remaining)
+        except RETRYABLE_ERRORS as error:
+            if getattr(error, 'host_failed', True):
+                breaker.record_failure()
+            attempt_number += 1
+            delay = backoff_delay(attempt_number - 1, getattr(error, 'retry_after', None))
+            if attempt_number >= max_attempts or time.monotonic() + delay >= end_time:
+                raise
+            time.sleep(delay)
+            continue
+        except Exception:
+            # The host answered (e.g. 404) - it is working
+            breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+
+def get(url, headers=None, timeout=TIMEOUT, deadline=DEADLINE, stream=False, retry_if=None, max_attempts=MAX_ATTEMPTS):
+    """
+    GETs url, returning the requests.Response
+        - Error statuses raise requests.HTTPError (After retries, for RETRY_STATUSES)
+        - retry_if(response) may return True to retry a response whose status is OK
+          (A busy answer - Not counted against the host's circuit breaker)
+    """
+    def attempt(remaining):
+        response = SESSION.get(url, headers=headers, timeout=clip_timeout(timeout, remaining), stream=stream)
+        check_status(response)
+        if retry_if is not None and retry_if(response):
+            response.close()
+            raise RetryableStatus('Unusable response from {}'.format(url), response=response, host_failed=False)
+        return response
+    return call_with_retries(url, attempt, deadline=deadline, max_attempts=max_attempts)
+
+
+def get_json(url, **kwargs):
+    """GETs url and decodes its JSON (Keyword arguments as for get)"""
+    return get(url, **kwargs).json()
+
+
+def download(url, file_path, progress=None, timeout=TIMEOUT, deadline=DOWNLOAD_DEADLINE, max_attempts=MAX_ATTEMPTS):
+    """
+    Streams url to file_path (Replaced only once the download completes), returning
+    the number of bytes written.  progress(num_bytes) is called every PROGRESS_BYTES.
+    """
+    temp_path = '{}.{}.part'.format(file_path, os.getpid())
+    def attempt(remaining):
+        num_bytes = 0
+        next_progress = PROGRESS_BYTES
+        with SESSION.get(url, timeout=clip_timeout(timeout, remaining), stream=True) as response:
+            check_status(response)
+            with open(temp_path, 'wb') as local_file:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if chunk: # filter out keep-alive new chunks
+                        local_file.write(chunk)
+                        num_bytes += len(chunk)
+                        if progress is not None and num_bytes >= next_progress:
+                            progress(num_bytes)
+                            next_progress = num_bytes + PROGRESS_BYTES
+        os.replace(temp_path, file_path)
+        return num_bytes
+    try:
+        return call_with_retries(url, attempt, deadline=deadline, max_attempts=max_attempts)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
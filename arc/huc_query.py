@@ -448,7 +448,7 @@ def get_huc2_package(huc2):
 
 if __name__ == '__main__':
     import time
-    start_time = time.clock()
+    start_time = time.perf_counter()
 #    huc, sampling_points, huc_square_miles = id_and_sample(lat=40.5454,
 #                                                           lon=-110.239,
 #                                                           watershed_scale="HUC8")
@@ -482,7 +482,7 @@ if __name__ == '__main__':
 #    print('Sampling Points:')
 #    for point in sampling_points:
 #        print(' {}'.format(point))
-#    duration = time.clock() - start_time
+#    duration = time.perf_counter() - start_time
 #    print('Processing took {} seconds'.format(duration))
 
 
@@ -0,0 +1,109 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+
+"""
+Calculates the Normal Low and Normal High values (30th and 70th percentiles of
+the normal period's 30-day rolling totals) of the prior, current and following
+water years, and keeps them in memory.  Every observation date of the same
+water year whose record was merged from the same stations gets the same values,
+so batch runs over many dates calculate them once.
+"""
+
+# Import Standard Libraries
+import collections
+
+# Import 3rd Party Libraries
+import numpy
+import pandas
+
+MEMORY_SIZE = 64 # Tables kept (Least recently used dropped first)
+
+
+def make_key(data_type, normal_period_start_date, normal_period_end_date, station_ids):
+    """
+    Returns the cache key of a normal period's tables - The data type, the period and
+    the IDs of the stations that filled it (In the order they were used)
+    """
+    return (data_type,
+            str(normal_period_start_date),
+            str(normal_period_end_date),
+            tuple(str(station_id) for station_id in station_ids))
+
+
+def calc_normal_values(water_year_dates_list, values):
+    """
+    Returns the Normal Low and Normal High series (30th and 70th percentiles of each
+    day of the water year, from the water year table values) over the water years of
+    water_year_dates_list, all calculated in one pass
+    Feb 29 of leap years is estimated by averaging the percentiles of Feb 28 and Mar 1
+    """
+    # Percentiles of every day of the water year at once (Row 0 - Low, Row 1 - High)
+    normals = numpy.percentile(values, [30, 70], axis=0)
+    leap_day = (normals[:, 150] + normals[:, 151])/2
+    leap_year_normals = numpy.insert(normals, 151, leap_day, axis=1)
+    tables = []
+    for dates in water_year_dates_list:
+        if len(dates) == 366:
+            tables.append(leap_year_normals)
+        else:
+            tables.append(normals)
+    all_normals = numpy.concatenate(tables, axis=1)
+    all_dates = water_year_dates_list[0].append(list(water_year_dates_list[1:]))
+    # Convert to pandas series
+    normal_low_series = pandas.Series(all_normals[0], all_dates)
+    normal_high_series = pandas.Series(all_normals[1], all_dates)
+    return normal_low_series, normal_high_series
+
+
+class NormalsCache(object):
+    """Normal Low and Normal High values by make_key key"""
+    def __init__(self, memory_size=MEMORY_SIZE):
+        self.memory_size = memory_size
+        self.memory = collections.OrderedDict()
+
+    def get(self, key):
+        """Returns the (normal_low, normal_high) arrays of key, or None if not cached"""
+        if key not in self.memory:
+            return None
+        self.memory.move_to_end(key)
+        return self.memory[key]
+
+    def put(self, key, normal_low, normal_high):
+        """Caches the normal_low and normal_high arrays of key, dropping the least recently used beyond memory_size"""
+        self.memory[key] = (numpy.asarray(normal_low, dtype=numpy.float64),
+                            numpy.asarray(normal_high, dtype=numpy.float64))
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+
+# Shared by every anteProcess.Main instance
+CACHE = NormalsCache()
@@ -39,14 +39,21 @@
 ##  ------------------------------- ##
 ######################################
 
-""" This code provides the subprocess minions for the Antecedent Precipitation Tool """
+"""
+This code provides the subprocess minions for the Antecedent Precipitation Tool,
+and the long-lived pool of them shared by the whole application
+"""
 
 import os
 import sys
 import multiprocessing
+import multiprocessing.connection
 import traceback
-import time
+import atexit
 import warnings
+import threading
+import collections
+import concurrent.futures
 multiprocessing.freeze_support()
 
 # Find module path
@@ -70,50 +77,285 @@ except Exception:
         sys.path.append(UTILITIES_FOLDER)
     import JLog
 
-class Minion(multiprocessing.Process):
-    """Multiprocessing worker class"""
-    def __init__(self, task_queue, result_queue):
-        multiprocessing.Process.__init__(self)
-        self.task_queue = task_queue
-        self.result_queue = result_queue
-        self.proc_name = None
-        self.log = None
-    def start_log(self):
-        """Instantiates Logging class"""
-        # Create PrintLog
-        self.log = JLog.PrintLog()
-        self.proc_name = self.name
-    def run(self):
-        warnings.filterwarnings("ignore")
-#        f = open(os.devnull, 'w')
-#        sys.stderr = f
-        num_jobs = 0
-        max_jobs = 100  # Max jobs before terminating
-        sleep_time = 1
+NUM_WORKERS = 4 # > 4 resulted in many failed FTP downloads that succeeded in-line later
+MAX_JOBS = 100 # Tasks each worker runs before it is replaced
+LIVENESS_INTERVAL = 2 # Seconds before the collector picks up newly started workers
+# Modules imported once by the fork server, so workers start with them loaded
+PRELOAD_MODULES = ['numpy', 'pandas', 'requests']
+if __package__:
+    PRELOAD_MODULES.append(__package__ + '.station_manager')
+else:
+    PRELOAD_MODULES.append('station_manager')
+
+
+class WorkerError(Exception):
+    """A task failed in a worker process, or the worker running it died"""
+
+
+def work(task_connection, result_connection, result_lock, max_jobs=MAX_JOBS):
+    """
+    Runs the (task_id, task) items sent on task_connection until a None item, reporting on result_connection:
+        ('done', task_id, pid, result) or ('failed', task_id, pid, traceback)
+        ('maxed', None, pid, None) before the report of its last task, when it exits after max_jobs tasks
+    """
+    warnings.filterwarnings("ignore")
+    pid = os.getpid()
+    def report(message):
+        # Sent before returning (Unlike Queue.put), so a report always precedes the worker's exit
+        with result_lock:
+            result_connection.send(message)
+    num_jobs = 0
+    while True:
+        try:
+            next_task = task_connection.recv()
+        except EOFError:
+            break
+        if next_task is None:
+            # Poison pill means shutdown
+            break
+        task_id, task = next_task
+        try:
+            result = task()
+            # Hand back a small descriptor (The data stays in the station store)
+            if hasattr(result, 'to_descriptor'):
+                result = result.to_descriptor()
+            message = ('done', task_id, pid, result)
+        except Exception:
+            message = ('failed', task_id, pid, traceback.format_exc())
+        num_jobs += 1
+        if num_jobs >= max_jobs:
+            report(('maxed', None, pid, None))
+            report(message)
+            break
+        report(message)
+
+
+def get_context():
+    """
+    Returns the multiprocessing context for worker processes
+        - forkserver (Workers are forked from a server that preloaded PRELOAD_MODULES)
+        - spawn where forkserver is unavailable (Windows)
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(PRELOAD_MODULES)
+        return context
+    # Set Path to Python Executable
+    multiprocessing.set_executable(sys.executable)
+    return multiprocessing.get_context('spawn')
+
+
+class Worker(object):
+    """A worker process, the connection its tasks are sent on, and the task it is running"""
+    def __init__(self, context, results_writer, results_lock, max_jobs=MAX_JOBS):
+        self.task_reader, self.task_writer = context.Pipe(duplex=False)
+        self.process = context.Process(target=work, args=(self.task_reader, results_writer, results_lock, max_jobs))
+        self.process.daemon = True
+        self.process.start()
+        self.pid = self.process.pid
+        self.task_id = None     # Task sent to the worker and not yet reported
+        self.retiring = False   # Exits after reporting its current task
+
+
+class WorkerPool(object):
+    """
+    Long-lived worker processes, started once and shared by every anteProcess
+    instance and run (See get_pool)
+    Tasks are submitted as concurrent.futures.Future objects.  Each task is sent to
+    an idle worker, so the pool always knows which task every worker is running: a
+    collector thread resolves the Futures as results arrive, and fails the task of
+    any worker that dies
+    """
+    def __init__(self, num_workers=NUM_WORKERS, max_jobs=MAX_JOBS):
+        self.num_workers = num_workers
+        self.max_jobs = max_jobs
+        self.context = get_context()
+        self.results_reader, self.results_writer = self.context.Pipe(duplex=False)
+        self.results_lock = self.context.Lock()
+        self.workers = {}       # Worker PID: Worker
+        self.futures = {}       # Task ID: Future
+        self.pending = collections.deque() # (Task ID, task) not yet sent to a worker
+        self.next_task_id = 0
+        self.closed = False
+        self.lock = threading.RLock()
+        ### MANDATORY CODE TO DEAL WITH GLITCH ###
+        sys.argv = ['']
+        ### MANDATORY CODE TO DEAL WITH GLITCH ###
+            # Glitch states the following:
+            # File "C;\Python27\ArcGIS10.3\Lib\multiprocessing\forking.py",
+            #  line 399, in get_preparation_data
+            #  sys_argv=sys.argv,
+            # AttributeError: 'module' object has no attribute 'argv'
+        self.ensure_workers()
+        self.collector = threading.Thread(target=self.collect, name='process_manager collector', daemon=True)
+        self.collector.start()
+
+    def ensure_workers(self):
+        """Starts workers to replace any that have exited or are retiring, returning the number started"""
+        with self.lock:
+            if self.closed:
+                return 0
+            started = 0
+            while len([worker for worker in self.workers.values() if not worker.retiring]) < self.num_workers:
+                worker = Worker(self.context, self.results_writer, self.results_lock, self.max_jobs)
+                self.workers[worker.pid] = worker
+                started += 1
+            return started
+
+    def submit(self, task):
+        """Queues a task (A picklable callable) for the workers, returning its Future"""
+        future = concurrent.futures.Future()
+        with self.lock:
+            self.next_task_id += 1
+            task_id = self.next_task_id
+            self.futures[task_id] = future
+            self.pending.append((task_id, task))
+            self.ensure_workers()
+            self.dispatch()
+        return future
+
+    def dispatch(self):
+        """Sends pending tasks to idle workers"""
+        with self.lock:
+            for worker in list(self.workers.values()):
+                if not self.pending:
+                    break
+                if worker.task_id is not None or worker.retiring:
+                    continue
+                task_id, task = self.pending.popleft()
+                try:
+                    worker.task_writer.send((task_id, task))
+                except (OSError, EOFError):
+                    # The worker has exited - Send the task to a replacement instead
+                    worker.retiring = True
+                    self.pending.appendleft((task_id, task))
+                    self.ensure_workers()
+                    return self.dispatch()
+                except Exception:
+                    # The task cannot be pickled
+                    future = self.futures.pop(task_id, None)
+                    if future is not None:
+                        future.set_exception(WorkerError(traceback.format_exc()))
+                    continue
+                worker.task_id = task_id
+
+    def collect(self):
+        """
+        Resolves the Futures of tasks as their results arrive, and fails those of
+        workers that die (Runs on the collector thread)
+        """
         while True:
+            with self.lock:
+                sentinels = [worker.process.sentinel for worker in self.workers.values()]
+            ready = multiprocessing.connection.wait([self.results_reader] + sentinels, timeout=LIVENESS_INTERVAL)
+            if not self.drain_results():
+                return
+            if len(ready) > 0 and not self.fail_lost_tasks():
+                return
+
+    def drain_results(self):
+        """Handles every result already sent, returning False once the shutdown marker arrives"""
+        while self.results_reader.poll():
+            message = self.results_reader.recv()
+            if message is None:
+                return False
+            self.handle_result(*message)
+        return True
+
+    def handle_result(self, kind, task_id, pid, value):
+        """Resolves a task's Future from a worker's report, and sends the worker its next task"""
+        with self.lock:
+            worker = self.workers.get(pid)
+            if kind == 'maxed':
+                if worker is not None:
+                    worker.retiring = True
+                self.ensure_workers()
+                self.dispatch()
+                return
+            if worker is not None and worker.task_id == task_id:
+                worker.task_id = None
+            future = self.futures.pop(task_id, None)
+            self.dispatch()
+        if future is None:
+            return
+        if kind == 'done':
+            future.set_result(value)
+        else:
+            future.set_exception(WorkerError(value))
+
+    def fail_lost_tasks(self):
+        """
+        Fails the tasks of workers that died while running them, and replaces those workers
+        Returns False if the shutdown marker arrived meanwhile
+        """
+        with self.lock:
+            dead = [worker for worker in self.workers.values() if not worker.process.is_alive()]
+            for worker in dead:
+                # Send no more tasks to it
+                worker.retiring = True
+        if not dead:
+            return True
+        # A worker reports its last task before exiting, so any report a dead worker
+        #  sent since the last drain is waiting in the pipe
+        running = self.drain_results()
+        lost = []
+        with self.lock:
+            for worker in dead:
+                self.workers.pop(worker.pid, None)
+                if worker.task_id is not None:
+                    future = self.futures.pop(worker.task_id, None)
+                    if future is not None:
+                        lost.append(future)
+            self.ensure_workers()
+            self.dispatch()
+        for future in lost:
+            future.set_exception(WorkerError('The sub-process running this task died'))
+        return running
+
+    def shutdown(self):
+        """Stops the workers (Joining each) and the collector thread"""
+        with self.lock:
+            self.closed = True
+            workers = list(self.workers.values())
+            self.workers = {}
+            self.pending.clear()
+        for worker in workers:
             try:
-                next_task = self.task_queue.get()
-                sleep_time = 1
-            except Exception:
-                time.sleep(sleep_time)
-                if sleep_time < 10:
-                    sleep_time += .5
-            if next_task is None:
-                # Poison pill means shutdown
-                break
-            try:
-                result = next_task()
+                worker.task_writer.send(None)
             except Exception:
-#                sys.stderr = sys.__stderr__
-                self.start_log()
-                self.log.Wrap('------------------------------------------')
-                self.log.Wrap("EXCEPTION:")
-                self.log.Wrap(traceback.format_exc())
-                self.log.Wrap('------------------------------------------')
-            self.result_queue.put(result)
-            num_jobs += 1
-            if num_jobs > max_jobs:
-                self.result_queue.put("Maxed")
-                break
-        return
-# End of Minion
+                pass
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+        with self.results_lock:
+            self.results_writer.send(None)
+        self.collector.join()
+        with self.lock:
+            futures = list(self.futures.values())
+            self.futures = {}
+        for future in futures:
+            future.cancel()
+
+
+POOL = None
+
+
+def get_pool():
+    """Returns the shared WorkerPool, starting it on first use"""
+    global POOL
+    if POOL is None:
+        POOL = WorkerPool()
+    return POOL
+
+
+def shutdown_pool():
+    """Stops the shared WorkerPool, if it was started"""
+    global POOL
+    if POOL is not None:
+        POOL.shutdown()
+        POOL = None
+
+
+atexit.register(shutdown_pool)
@@ -47,12 +47,9 @@ Downloads, updates, and querries climdiv data from NOAA
 # Import Standard Libraries
 import os
 import sys
-import urllib3
 import stat
-import time
 import datetime
 import traceback
-import requests
 
 # Find module path
 MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
@@ -62,9 +59,11 @@ ROOT = os.path.split(MODULE_PATH)[0]
 # Import Custom Libraries
 try:
     # Frozen Application Method
+    from . import http_client
     from . import query_shapefile_at_point
     from .utilities import JLog
 except Exception:
+    import http_client
     import query_shapefile_at_point
     # Reverse compatibility step - Add utilities folder to path directly
     PYTHON_SCRIPTS_FOLDER = os.path.join(ROOT, 'Python Scripts')
@@ -140,10 +139,8 @@ def ensure_current_pdsidv_file():
     if check_server is True:
         # Query ProcDate
         log.Wrap('  Querying the name and date of the latest PDSI file...')
-        # urllib3
-        http = urllib3.PoolManager(cert_reqs='CERT_REQUIRED')
-        response = http.request('GET', proc_date_url)
-        proc_date = str(response.data.split(b"\n")[0], 'utf-8')
+        response = http_client.get(proc_date_url)
+        proc_date = str(response.content.split(b"\n")[0], 'utf-8')
         current_file_name = 'climdiv-pdsidv-v1.0.0-{}'.format(str(proc_date))
         current_file_path = os.path.join(CLIM_DIV_FOLDER, current_file_name)
         log.Wrap('    Latest file = {}'.format(current_file_name))
@@ -165,24 +162,12 @@ def ensure_current_pdsidv_file():
             # Download Latest Dataset
             current_file_url = '{}/{}'.format(base_url, current_file_name)
             log.Wrap('  Connecting to latest PDSI file on server...')
-            # Streaming with requests module
-            num_bytes = 0
-            count = 0
-            with requests.get(current_file_url, stream=True) as r:
-                r.raise_for_status()
-                log.Wrap('  Writing PDSI file to local drive...')
-                with open(current_file_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192): 
-                        if chunk: # filter out keep-alive new chunks
-                            f.write(chunk)
-                            num_bytes += 8192
-                            count += 1
-                            if count > 25:
-                                formatted_bytes = sizeof_fmt(num_bytes)
-                                log.print_status_message('  Downloading file... ({} bytes)'.format(formatted_bytes))
-                                count = 0
+            # Streaming with the shared http_client
+            log.Wrap('  Writing PDSI file to local drive...')
+            def progress(num_bytes):
+                log.print_status_message('  Downloading file... ({} bytes)'.format(sizeof_fmt(num_bytes)))
+            http_client.download(current_file_url, current_file_path, progress=progress)
             sys.stdout.flush()
-            time.sleep(.1)
         # Clear out any old versions of the pdsidv file
         log.Wrap('  Searching for extraneous PDSI files on local drive...')
         for root, directories, file_names in os.walk(CLIM_DIV_FOLDER):
@@ -0,0 +1,173 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+"""
+Builds an index of the years each GHCN station reported each element, from
+NOAA's ghcnd-inventory.txt, so stations that cannot cover the analysis window
+are skipped before their data is downloaded.
+"""
+
+# Import Standard Libraries
+import os
+import sys
+import time
+import stat
+
+# Import 3rd Party Libraries
+import numpy
+
+# Find module path
+MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
+# Find ROOT folder
+ROOT = os.path.split(MODULE_PATH)[0]
+
+# Import Custom Libraries
+try:
+    from . import ghcn_daily
+    from .utilities import JLog
+except Exception:
+    import ghcn_daily
+    # Reverse compatibility step - Add utilities folder to path directly
+    PYTHON_SCRIPTS_FOLDER = os.path.join(ROOT, 'Python Scripts')
+    TEST = os.path.exists(PYTHON_SCRIPTS_FOLDER)
+    if TEST:
+        UTILITIES_FOLDER = os.path.join(PYTHON_SCRIPTS_FOLDER, 'utilities')
+        sys.path.append(UTILITIES_FOLDER)
+    else:
+        ARC_FOLDER = os.path.join(ROOT, 'arc')
+        UTILITIES_FOLDER = os.path.join(ARC_FOLDER, 'utilities')
+        sys.path.append(UTILITIES_FOLDER)
+    import JLog
+
+CACHED_FOLDER = os.path.join(ROOT, 'cached')
+INDEX_PATH = os.path.join(CACHED_FOLDER, 'inventory_index.npz')
+MAX_AGE_DAYS = 90 # Same refresh interval as the cached station list
+
+
+def file_age_days(file_path):
+    """Returns the number of days since a file was last modified"""
+    return (time.time() - os.stat(file_path)[stat.ST_MTIME])/60/60/24
+
+
+def parse_inventory(inventory_path):
+    """
+    Parses the fixed-width ghcnd-inventory.txt records with NumPy
+    Returns (station_ids, elements, first_years, last_years) arrays
+    """
+    with open(inventory_path, 'rb') as inventory_file:
+        lines = inventory_file.read().splitlines()
+    records = numpy.array(lines, dtype='S45')
+    columns = records.view('S1').reshape(len(records), 45)
+    station_ids = columns[:, 0:11].copy().view('S11').ravel()
+    elements = columns[:, 31:35].copy().view('S4').ravel()
+    first_years = columns[:, 36:40].copy().view('S4').ravel().astype(numpy.int16)
+    last_years = columns[:, 41:45].copy().view('S4').ravel().astype(numpy.int16)
+    return station_ids, elements, first_years, last_years
+
+
+class CoverageIndex(object):
+    """First and last year of record for each station and element"""
+    def __init__(self, station_ids, elements, first_years, last_years):
+        self.station_ids = station_ids
+        self.elements = elements
+        self.first_years = first_years
+        self.last_years = last_years
+        self.cached_queries = {}
+
+    @classmethod
+    def from_inventory(cls, inventory_path):
+        """Builds the index from a ghcnd-inventory.txt file"""
+        return cls(*parse_inventory(inventory_path))
+
+    @classmethod
+    def load(cls, index_path):
+        """Loads a saved index"""
+        with numpy.load(index_path) as saved:
+            return cls(saved['station_ids'],
+                       saved['elements'],
+                       saved['first_years'],
+                       saved['last_years'])
+
+    def save(self, index_path):
+        """Saves the index to a compressed NumPy archive"""
+        temp_path = index_path + '.tmp.npz'
+        numpy.savez(temp_path,
+                    station_ids=self.station_ids,
+                    elements=self.elements,
+                    first_years=self.first_years,
+                    last_years=self.last_years)
+        os.replace(temp_path, index_path)
+
+    def stations_without_coverage(self, element, start_year, end_year):
+        """
+        Returns the set of station IDs whose record of element does not overlap
+        start_year through end_year.  Stations missing from the inventory are not
+        included, so they are still downloaded.
+        """
+        key = (element, int(start_year), int(end_year))
+        if key not in self.cached_queries:
+            of_element = self.elements == element.encode()
+            outside = (self.last_years < int(start_year)) | (self.first_years > int(end_year))
+            station_ids = self.station_ids[of_element & outside]
+            self.cached_queries[key] = set(station_id.decode() for station_id in station_ids)
+        return self.cached_queries[key]
+
+
+def get_index():
+    """
+    Returns the CoverageIndex, refreshing the inventory from the GHCN-Daily
+    store and rebuilding the index when it is missing or older than MAX_AGE_DAYS
+    (Always built from the mirror's inventory when a local mirror is in use)
+    """
+    log = JLog.PrintLog()
+    if ghcn_daily.mirror_folder() is not None:
+        # The cached index describes NOAA's inventory, not the mirror's
+        log.Wrap('Indexing station inventory of the local GHCN-Daily mirror...')
+        return CoverageIndex.from_inventory(ghcn_daily.get_file('ghcnd-inventory.txt'))
+    if os.path.exists(INDEX_PATH) and file_age_days(INDEX_PATH) < MAX_AGE_DAYS:
+        try:
+            return CoverageIndex.load(INDEX_PATH)
+        except Exception:
+            log.Wrap('Cached station inventory index unreadable. Rebuilding...')
+    log.Wrap('Checking NCDC GHCN daily station inventory...')
+    inventory_path = ghcn_daily.get_file('ghcnd-inventory.txt', max_age_hours=MAX_AGE_DAYS*24)
+    log.Wrap('Indexing station inventory (Years of record by element)...')
+    coverage_index = CoverageIndex.from_inventory(inventory_path)
+    try:
+        coverage_index.save(INDEX_PATH)
+    except Exception:
+        log.Wrap('Saving station inventory index failed.')
+    return coverage_index
+
+
+if __name__ == '__main__':
+    INDEX = get_index()
+    print(len(INDEX.station_ids))
+    print(len(INDEX.stations_without_coverage('PRCP', 1987, 2018)))
@@ -0,0 +1,89 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+
+"""
+Downloads weather stations on a pool of threads.
+Station downloads spend nearly all of their time waiting on NOAA's server, so
+threads sharing one HTTP session (See ghcn_daily) replace the sub-processes of
+process_manager without their start-up and result pickling costs.  Threads
+beyond the host's current concurrency limit wait for a free slot.
+"""
+
+# Import Standard Libraries
+import os
+import sys
+import concurrent.futures
+
+# Find module path
+MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
+# Find ROOT folder
+ROOT = os.path.split(MODULE_PATH)[0]
+
+# Import Custom Libraries
+try:
+    from . import ghcn_daily
+    from . import concurrency_control
+except Exception:
+    sys.path.append(MODULE_PATH)
+    import ghcn_daily
+    import concurrency_control
+
+# Enough threads for the host's adaptive limit at its largest (It starts at
+#  concurrency_control.INITIAL_LIMIT and only grows while the server keeps up)
+DEFAULT_WORKERS = concurrency_control.MAX_LIMIT
+DEFAULT_REQUESTS_PER_SECOND = 10 # Per host
+
+
+class StationFetcher(object):
+    """
+    Pool of download threads
+        - max_workers: Most stations downloaded at once (The number of downloads in
+          flight adapts below this to how well the server keeps up, see concurrency_control)
+        - requests_per_second: Most requests started per second to each host
+    """
+    def __init__(self, max_workers=DEFAULT_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        ghcn_daily.configure_session(pool_size=max_workers,
+                                     requests_per_second=requests_per_second)
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, function, *args, **kwargs):
+        """Runs function on a download thread, returning its Future"""
+        return self.pool.submit(function, *args, **kwargs)
+
+    def submit_stations(self, constructor_classes):
+        """Downloads the station of each station_manager.Constructor, returning their Futures"""
+        return [self.pool.submit(constructor_class) for constructor_class in constructor_classes]
+
+    def shutdown(self, wait=True):
+        """Stops the download threads once their current downloads finish"""
+        self.pool.shutdown(wait=wait)
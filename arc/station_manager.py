@@ -50,12 +50,11 @@ by selected type and date range.
 import os
 import sys
 import traceback
-import time
+import datetime
+import threading
 
 # Import third-party modules
 from geopy.distance import great_circle
-import ulmo
-import numpy
 
 # Find module path
 MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
@@ -64,8 +63,12 @@ ROOT = os.path.split(MODULE_PATH)[0]
 
 # Import custom modules from Utilities folder
 try:
+    from . import ghcn_daily
+    from . import station_store
     from .utilities import JLog
 except Exception:
+    import ghcn_daily
+    import station_store
     # Reverse compatibility step - Add utilities folder to path directly
     PYTHON_SCRIPTS_FOLDER = os.path.join(ROOT, 'Python Scripts')
     TEST = os.path.exists(PYTHON_SCRIPTS_FOLDER)
@@ -78,6 +81,13 @@ except Exception:
         sys.path.append(UTILITIES_FOLDER)
     import JLog
 
+TRIM_MEMO_SIZE = 32 # Most trimmed date ranges kept on each station
+
+# Station details handed back by sub-processes (Main's arguments, in order)
+DESCRIPTOR_FIELDS = ['dataType', 'index', 'name', 'location', 'locationTuple', 'elevation',
+                     'distance', 'elevDiff', 'weightedDiff', 'StartDate', 'EndDate',
+                     'currentRollingStartDate']
+
 # CLASS DEFINITIONS
 class Constructor(object):
     """
@@ -103,10 +113,10 @@ class Constructor(object):
         self.EndDate = EndDate
         self.currentRollingStartDate = currentRollingStartDate
 
-    def __call__(self):
+    def __call__(self, lazy=False):
         aclass = Main(self.dataType, self.index, self.name, self.location, self.locationTuple,
                       self.elevation, self.distance, self.elevDiff, self.weightedDiff,
-                      self.StartDate, self.EndDate, self.currentRollingStartDate)
+                      self.StartDate, self.EndDate, self.currentRollingStartDate, lazy=lazy)
         return aclass
 
 
@@ -116,10 +126,11 @@ class Main(object):
     Downloads the data from NOAA's servers, calculates the relationship 
     between the station location and a given point, and slices the data
     by selected type and date range.
+    (With lazy=True, only the station's details are set until ensure_data is called)
     """
     def __init__(self, dataType, index, name, location, locationTuple, elevation,
                  distance, elevDiff, weightedDiff, StartDate, EndDate,
-                 currentRollingStartDate):
+                 currentRollingStartDate, lazy=False):
         self.L = JLog.PrintLog()
         self.dataType = dataType
         self.index = index
@@ -134,89 +145,132 @@ class Main(object):
         self.EndDate = EndDate
         self.currentRollingStartDate = currentRollingStartDate
         self.data = None
+        self.retrieved_date = None
         self.Values = None
         self.actual_rows = 0
         self.current_actual_rows = 0
-        self.run()
+        self.trim_memo = {}
+        self.fetch_lock = threading.Lock()
+        if not lazy:
+            self.run()
     # End of __init__
 
+    def __getstate__(self):
+        # Trimmed windows are cheap to rebuild and the log is recreated, so both are left out of pickles
+        state = self.__dict__.copy()
+        state['trim_memo'] = {}
+        state.pop('fetch_lock', None)
+        state.pop('L', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.trim_memo = {}
+        self.fetch_lock = threading.Lock()
+        self.L = JLog.PrintLog()
+
+    def to_descriptor(self):
+        """
+        Returns a small dict describing the station and where its data is stored, for
+        handing a station downloaded by a sub-process back to the parent (See from_descriptor)
+        """
+        descriptor = {}
+        for name in DESCRIPTOR_FIELDS:
+            descriptor[name] = getattr(self, name)
+        descriptor['retrieved_date'] = self.retrieved_date
+        descriptor['store_path'] = None if self.data is None else self.data.file_path
+        return descriptor
+
+    @classmethod
+    def from_descriptor(cls, descriptor):
+        """Rebuilds a station from to_descriptor's dict, mapping its data from the station store"""
+        station = cls(*[descriptor[name] for name in DESCRIPTOR_FIELDS], lazy=True)
+        if descriptor['store_path'] is not None:
+            station.data = station_store.StoredValues(descriptor['store_path'])
+            station.retrieved_date = descriptor['retrieved_date']
+            station.trimData()
+        return station
+
     def run(self):
         """Download All Station Data and send it to the trimData function"""
-        tries = 5
-        while tries > 0:
-            try:
-                self.data = ulmo.ncdc.ghcn_daily.get_data(self.index,
-                                                          elements=self.dataType,
-                                                          update=True,
-                                                          as_dataframe=True)
-                tries = 0
-                self.trimData()
-            except Exception:
-                #self.L.Write(traceback.format_exc())
-                tries -= 1
-                time.sleep(2)
+        try:
+            # Revalidate the locally stored station file (Retried with backoff by
+            #  http_client), then map its dataType values
+            dly_path = ghcn_daily.get_station_file(self.index)
+            self.set_data(station_store.get(self.index, self.dataType, dly_path))
+        except ghcn_daily.MirrorFileMissing:
+            self.L.Wrap('The station "{}" is not in the local GHCN-Daily mirror'.format(self.name))
+        except Exception as error:
+            #self.L.Write(traceback.format_exc())
+            self.L.Wrap('Download failed for {} ({})'.format(self.name, repr(error)))
     # End of Run
 
+    def set_data(self, data):
+        """Sets the station's downloaded data (station_store.StoredValues) and trims it"""
+        self.data = data
+        self.trim_memo = {}
+        self.retrieved_date = datetime.date.today().strftime('%Y-%m-%d')
+        self.trimData()
+
+    def ensure_data(self):
+        """Downloads the station's data unless it already has it (Safe to call from several threads)"""
+        with self.fetch_lock:
+            if self.data is None:
+                self.run()
+        return self.data is not None
+
     def trimData(self):
-        """Trims data to current date range"""
+        """Trims data to current date range (Reusing the results of previous trims of the same range)"""
+        window_key = (self.StartDate, self.EndDate, self.currentRollingStartDate)
+        if window_key in self.trim_memo:
+            self.Values, self.actual_rows, self.current_actual_rows = self.trim_memo[window_key]
+            return
         self.Values = None
         self.actual_rows = 0
         self.current_actual_rows = 0
+        if self.data is None:
+            # Not downloaded yet (Lazy stations are trimmed once their data arrives)
+            return
         # GET VALUES
         try:
-            # Copying prcp data
-            try:
-                df_copy = self.data[self.dataType].copy()
-            except KeyError:
-                self.L.Write('The station "{}" lacked PRCP data (Likely a server-side glitch)'.format(self.name))
-                keys = self.data.keys()
-                self.L.Write('  For debugging: The following data types were found: {}'.format(keys))
-                num_rows = 0
-            try:
-                # Slicing relevant rows
-                self.Values = df_copy.loc[self.StartDate:self.EndDate, 'value']
-                del df_copy
-                self.Values.replace('', numpy.nan, inplace=True)
-                self.Values.dropna(inplace=True)
-                # Index Values and count rows
-                self.Values.index = self.Values.index.to_timestamp()
-                num_rows = len(self.Values.index)
-                # Filter out any station with a year with no precipitation
-                if self.dataType == 'PRCP':
-                    days = 365
-                    daySum = 0
-                    for row in self.Values.iteritems():
-                        if days < 1:
-                            if daySum < 1:
-                                self.L.Wrap("Whole year of Zeros!  ---Excluding This Dataset---")
-                                num_rows = 0
-                                break
-                            days = 365
-                            daySum = 0
-                        days -= 1
-                        daySum += row[1]
-            except UnboundLocalError:
-                print("UnboundLocalError")
-                pass
+            if len(self.data) < 1:
+                self.L.Write('The station "{}" lacked {} data (Likely a server-side glitch)'.format(self.name, self.dataType))
+                return
+            # Slicing relevant days (A view of the stored values)
+            self.Values = self.data.window(self.StartDate, self.EndDate)
+            # Counting rows (From the station's running counts)
+            summary = self.data.summary()
+            num_rows = summary.count(self.StartDate, self.EndDate)
+            # Filter out any station with a year with no precipitation
+            if self.dataType == 'PRCP':
+                if summary.has_zero_year(self.StartDate, self.EndDate):
+                    self.L.Wrap("Whole year of Zeros!  ---Excluding This Dataset---")
+                    num_rows = 0
             if num_rows > 1:
-                num_null = self.Values.isnull().sum().sum()
-                self.actual_rows = num_rows - num_null
-                # Slicing just current year rows to perform separate tests
-                df_copy = self.Values.copy()
-                current_values = df_copy.loc[self.currentRollingStartDate:self.EndDate]
-                current_values.replace('', numpy.nan, inplace=True)
-                current_values.dropna(inplace=True)
-                current_num_rows = len(current_values.index)
-                test = current_num_rows > 1
-                if test:
-                    current_num_null = current_values.isnull().sum().sum()
-                    self.current_actual_rows = current_num_rows - current_num_null
-                del df_copy
+                self.actual_rows = num_rows
+                # Counting just current year rows to perform separate tests
+                current_num_rows = summary.count(self.currentRollingStartDate, self.EndDate)
+                if current_num_rows > 1:
+                    self.current_actual_rows = current_num_rows
+            self.remember_trim(window_key)
         except Exception as exc_str:
 #            self.L.Write(traceback.format_exc())
             self.L.Write(exc_str)
     # End of trimData
 
+    def remember_trim(self, window_key):
+        """
+        Saves the results of a trim for reuse, dropping those of ranges that no longer
+        overlap it and the oldest beyond TRIM_MEMO_SIZE
+        """
+        start_date, end_date = window_key[0], window_key[1]
+        for key in list(self.trim_memo):
+            if key[1] < start_date or key[0] > end_date:
+                del self.trim_memo[key]
+        while len(self.trim_memo) >= TRIM_MEMO_SIZE:
+            del self.trim_memo[next(iter(self.trim_memo))]
+        self.trim_memo[window_key] = (self.Values, self.actual_rows, self.current_actual_rows)
+
     def updateValues(self, site_loc, site_elev, StartDate, EndDate, currentRollingStartDate):
         """Updates station values based on new location and date range"""
         self.distance = round(great_circle(site_loc, self.locationTuple).miles, 3)
@@ -237,6 +291,49 @@ class Main(object):
         return '{}'.format(self.name)
 
 
+class Registry(object):
+    """
+    Stations whose data has already been downloaded, keyed by GHCN station ID.
+    Replaces scanning a list of stations by name, which let two stations with the
+    same name shadow each other.
+    """
+    def __init__(self, stations=None):
+        self.stations = {}
+        if stations is not None:
+            for station in stations:
+                self.add(station)
+
+    def add(self, station):
+        """Adds (or replaces) a station"""
+        self.stations[station.index] = station
+
+    def get(self, station_id):
+        """Returns the station with the given ID, or None"""
+        return self.stations.get(station_id)
+
+    def has_data(self, station_id, end_date):
+        """
+        Tests whether the station's data is already on hand for a window ending on end_date
+        (Data downloaded before end_date cannot include the end of that window)
+        """
+        station = self.stations.get(station_id)
+        if station is None or station.data is None:
+            return False
+        retrieved_date = getattr(station, 'retrieved_date', None)
+        if retrieved_date is None:
+            return False
+        return retrieved_date >= end_date
+
+    def __contains__(self, station_id):
+        return station_id in self.stations
+
+    def __iter__(self):
+        return iter(self.stations.values())
+
+    def __len__(self):
+        return len(self.stations)
+
+
 ########################################################################
 
 if __name__ == '__main__':
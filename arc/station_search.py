@@ -0,0 +1,275 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+"""
+Vectorized search of NOAA's GHCN station list.
+Calculates the great-circle distance from a point to every station in one
+array operation, rather than calling geopy once per station, and maintains a
+persistent spherical index of the station list for radius and k-nearest queries.
+"""
+
+# Import Standard Libraries
+import os
+
+# Import 3rd Party Libraries
+import numpy
+
+# Mean earth radius (km) and km-to-mile divisor used by geopy.distance.great_circle
+EARTH_RADIUS_KM = 6371.009
+KM_PER_MILE = 1.609344
+
+
+def _central_angle(lat1, lng1, lat2, lng2):
+    """Central angle (radians) between points given in radians (arrays broadcast)"""
+    sin_lat1, cos_lat1 = numpy.sin(lat1), numpy.cos(lat1)
+    sin_lat2, cos_lat2 = numpy.sin(lat2), numpy.cos(lat2)
+    delta_lng = lng2 - lng1
+    cos_delta_lng, sin_delta_lng = numpy.cos(delta_lng), numpy.sin(delta_lng)
+    return numpy.arctan2(numpy.sqrt((cos_lat2 * sin_delta_lng) ** 2 +
+                                    (cos_lat1 * sin_lat2 -
+                                     sin_lat1 * cos_lat2 * cos_delta_lng) ** 2),
+                         sin_lat1 * sin_lat2 + cos_lat1 * cos_lat2 * cos_delta_lng)
+
+
+def great_circle_miles(lat, lon, latitudes, longitudes):
+    """
+    Returns the great-circle distance (miles) from one point to an array of points.
+    Uses the same formula and constants as geopy.distance.great_circle
+    """
+    lat1 = numpy.radians(float(lat))
+    lng1 = numpy.radians(float(lon))
+    lat2 = numpy.radians(numpy.asarray(latitudes, dtype=numpy.float64))
+    lng2 = numpy.radians(numpy.asarray(longitudes, dtype=numpy.float64))
+    return EARTH_RADIUS_KM * _central_angle(lat1, lng1, lat2, lng2) / KM_PER_MILE
+
+
+def great_circle_matrix(point_latitudes, point_longitudes, latitudes, longitudes):
+    """
+    Returns a (points x stations) array of great-circle distances in miles
+    """
+    lat1 = numpy.radians(numpy.asarray(point_latitudes, dtype=numpy.float64))[:, numpy.newaxis]
+    lng1 = numpy.radians(numpy.asarray(point_longitudes, dtype=numpy.float64))[:, numpy.newaxis]
+    lat2 = numpy.radians(numpy.asarray(latitudes, dtype=numpy.float64))[numpy.newaxis, :]
+    lng2 = numpy.radians(numpy.asarray(longitudes, dtype=numpy.float64))[numpy.newaxis, :]
+    return EARTH_RADIUS_KM * _central_angle(lat1, lng1, lat2, lng2) / KM_PER_MILE
+
+
+def unit_vectors(latitudes, longitudes):
+    """Converts arrays of latitudes and longitudes to unit-sphere (x, y, z) coordinates"""
+    lat = numpy.radians(numpy.asarray(latitudes, dtype=numpy.float64))
+    lon = numpy.radians(numpy.asarray(longitudes, dtype=numpy.float64))
+    cos_lat = numpy.cos(lat)
+    return numpy.column_stack((cos_lat * numpy.cos(lon),
+                               cos_lat * numpy.sin(lon),
+                               numpy.sin(lat)))
+
+
+class StationIndex(object):
+    """
+    Spherical index over the GHCN station list.
+    Stations are stored as unit vectors sorted by latitude, so a radius query
+    only measures the stations within the latitude band the radius can reach.
+    All results are row positions within the station list the index was built from.
+    (A sorted band instead of a k-d or ball tree: neither SciPy nor scikit-learn
+     ships with the tool, and over the ~125k GHCN stations a binary search plus one
+     vectorized pass over the band - a few thousand stations for a 30 mile radius -
+     takes about 0.1 ms, less than walking a tree written in Python would)
+    """
+    def __init__(self, station_ids, latitudes, longitudes):
+        self.station_ids = numpy.asarray(station_ids).astype(str)
+        latitudes = numpy.asarray(latitudes, dtype=numpy.float64)
+        longitudes = numpy.asarray(longitudes, dtype=numpy.float64)
+        self.order = numpy.argsort(latitudes, kind='mergesort')
+        self.sorted_latitudes = latitudes[self.order]
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.vectors = unit_vectors(latitudes, longitudes)
+
+    @classmethod
+    def from_station_list(cls, station_list):
+        """Builds an index from an ulmo GHCN station DataFrame"""
+        return cls(station_ids=station_list.index.values,
+                   latitudes=station_list['latitude'].values,
+                   longitudes=station_list['longitude'].values)
+
+    @classmethod
+    def load(cls, index_path, station_list):
+        """Loads a saved index, returning None if its stations or their locations do not match station_list"""
+        try:
+            with numpy.load(index_path) as saved:
+                station_ids = saved['station_ids']
+                latitudes = saved['latitudes']
+                longitudes = saved['longitudes']
+        except Exception:
+            return None
+        if len(station_ids) != len(station_list):
+            return None
+        if not numpy.array_equal(station_ids, station_list.index.values.astype(str)):
+            return None
+        if not (numpy.array_equal(latitudes, station_list['latitude'].values.astype(numpy.float64)) and
+                numpy.array_equal(longitudes, station_list['longitude'].values.astype(numpy.float64))):
+            return None
+        return cls(station_ids, latitudes, longitudes)
+
+    def save(self, index_path):
+        """Saves the index next to the pickled station list"""
+        temp_path = index_path + '.tmp.npz'
+        numpy.savez(temp_path,
+                    station_ids=self.station_ids,
+                    latitudes=self.latitudes,
+                    longitudes=self.longitudes)
+        os.replace(temp_path, index_path)
+
+    def query_radius(self, lat, lon, miles):
+        """
+        Returns (row positions, distances in miles) of all stations closer than
+        miles to (lat, lon), in station list order
+        """
+        angle = miles * KM_PER_MILE / EARTH_RADIUS_KM
+        band = numpy.degrees(angle) + 1e-6
+        lat = float(lat)
+        lon = float(lon)
+        first = numpy.searchsorted(self.sorted_latitudes, lat - band, side='left')
+        last = numpy.searchsorted(self.sorted_latitudes, lat + band, side='right')
+        rows = self.order[first:last]
+        # Chord length test on the unit sphere (with slack) before the exact distance
+        chord_limit = 2 * numpy.sin(min(angle, numpy.pi) / 2) + 1e-9
+        offsets = self.vectors[rows] - unit_vectors([lat], [lon])[0]
+        rows = rows[numpy.einsum('ij,ij->i', offsets, offsets) <= chord_limit ** 2]
+        rows.sort()
+        distances = great_circle_miles(lat, lon, self.latitudes[rows], self.longitudes[rows])
+        within = distances < miles
+        return rows[within], distances[within]
+
+    def query_nearest(self, lat, lon, k):
+        """
+        Returns (row positions, distances in miles) of the k stations nearest
+        to (lat, lon), nearest first
+        (Measures every station with one vectorized dot product - about 1 ms over
+         the GHCN list, so no band is needed)
+        """
+        k = min(int(k), len(self.station_ids))
+        if k < 1:
+            return numpy.array([], dtype=numpy.int64), numpy.array([])
+        cosines = self.vectors.dot(unit_vectors([lat], [lon])[0])
+        rows = numpy.argpartition(-cosines, k - 1)[:k]
+        distances = great_circle_miles(lat, lon, self.latitudes[rows], self.longitudes[rows])
+        nearest = numpy.argsort(distances, kind='mergesort')
+        return rows[nearest], distances[nearest]
+
+
+def nearest_sampling_points(sampling_coordinates, search_distance, latitudes=None,
+                            longitudes=None, station_index=None):
+    """
+    Finds every station within search_distance miles of any sampling point in one pass.
+    Candidates come from the union of station_index radius queries (or, without an
+    index, from the latitude band covering all points), and a single points-by-candidates
+    distance matrix is measured.
+    Returns (row positions, nearest sampling point number, distance in miles to it)
+    """
+    point_latitudes = numpy.array([float(point[0]) for point in sampling_coordinates])
+    point_longitudes = numpy.array([float(point[1]) for point in sampling_coordinates])
+    empty = numpy.array([], dtype=numpy.int64)
+    if len(point_latitudes) < 1:
+        return empty, empty, numpy.array([])
+    if station_index is not None:
+        latitudes = station_index.latitudes
+        longitudes = station_index.longitudes
+        rows = [numpy.array([], dtype=numpy.int64)]
+        for lat, lon in zip(point_latitudes, point_longitudes):
+            rows.append(station_index.query_radius(lat, lon, search_distance)[0])
+        rows = numpy.unique(numpy.concatenate(rows))
+    else:
+        latitudes = numpy.asarray(latitudes, dtype=numpy.float64)
+        longitudes = numpy.asarray(longitudes, dtype=numpy.float64)
+        band = numpy.degrees(search_distance * KM_PER_MILE / EARTH_RADIUS_KM) + 1e-6
+        rows = numpy.flatnonzero((latitudes >= point_latitudes.min() - band) &
+                                 (latitudes <= point_latitudes.max() + band))
+    if len(rows) < 1:
+        return empty, empty, numpy.array([])
+    matrix = great_circle_matrix(point_latitudes, point_longitudes,
+                                 latitudes[rows], longitudes[rows])
+    nearest_point = numpy.argmin(matrix, axis=0)
+    nearest_distance = matrix[nearest_point, numpy.arange(len(rows))]
+    within = nearest_distance < search_distance
+    return rows[within], nearest_point[within], nearest_distance[within]
+
+
+def find_stations(station_list, site_loc, site_elevation, search_distance,
+                  sampling_coordinates=None, station_index=None, inner_distance=0):
+    """
+    Returns the rows of station_list (ulmo GHCN station DataFrame) located within
+    search_distance miles of site_loc, in their original order, with added columns:
+        distance - miles from site_loc
+        elevation_feet - station elevation converted from meters to feet
+        elevDiff - absolute elevation difference (ft) from site_elevation
+        weightedDiff - distance weighted by elevation difference
+    If sampling_coordinates is given (Watershed Analysis), a station is included
+    when it is within search_distance of any sampling point instead, and the
+    columns nearest_sampling_point and sampling_distance are added.
+    If station_index (a StationIndex built from station_list) is given, only the
+    stations it returns are measured.
+    If inner_distance is given, stations closer than inner_distance are left out,
+    so a widened search returns only the ring of stations it added.
+    """
+    latitudes = station_list['latitude'].values
+    longitudes = station_list['longitude'].values
+    if sampling_coordinates is None:
+        if station_index is None:
+            distance = great_circle_miles(site_loc[0], site_loc[1], latitudes, longitudes)
+            rows = numpy.flatnonzero(distance < search_distance)
+            distance = distance[rows]
+        else:
+            rows, distance = station_index.query_radius(site_loc[0], site_loc[1], search_distance)
+    else:
+        rows, nearest_point, sampling_distance = nearest_sampling_points(sampling_coordinates,
+                                                                         search_distance,
+                                                                         latitudes=latitudes,
+                                                                         longitudes=longitudes,
+                                                                         station_index=station_index)
+        distance = great_circle_miles(site_loc[0], site_loc[1], latitudes[rows], longitudes[rows])
+    if inner_distance > 0:
+        if sampling_coordinates is None:
+            ring = distance >= inner_distance
+        else:
+            ring = sampling_distance >= inner_distance
+            nearest_point = nearest_point[ring]
+            sampling_distance = sampling_distance[ring]
+        rows = rows[ring]
+        distance = distance[ring]
+    candidates = station_list.iloc[rows].copy()
+    candidates['distance'] = distance
+    if sampling_coordinates is not None:
+        candidates['nearest_sampling_point'] = nearest_point
+        candidates['sampling_distance'] = sampling_distance
+    candidates['elevation_feet'] = candidates['elevation'] * 3.28084
+    candidates['elevDiff'] = (site_elevation - candidates['elevation_feet']).abs()
+    candidates['weightedDiff'] = candidates['distance'] * ((candidates['elevDiff'] / 1000) + 0.45)
+    return candidates
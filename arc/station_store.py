@@ -0,0 +1,309 @@
+#  This software was developed by United States Army Corps of Engineers (USACE)
+#  employees in the course of their official duties.  USACE used copyrighted,
+#  open source code to develop this software, as such this software
+#  (per 17 USC § 101) is considered "joint work."  Pursuant to 17 USC § 105,
+#  portions of the software developed by USACE employees in the course of their
+#  official duties are not subject to copyright protection and are in the public
+#  domain.
+#
+#  USACE assumes no responsibility whatsoever for the use of this software by
+#  other parties, and makes no guarantees, expressed or implied, about its
+#  quality, reliability, or any other characteristic.
+#
+#  The software is provided "as is," without warranty of any kind, express or
+#  implied, including but not limited to the warranties of merchantability,
+#  fitness for a particular purpose, and noninfringement.  In no event shall the
+#  authors or U.S. Government be liable for any claim, damages or other
+#  liability, whether in an action of contract, tort or otherwise, arising from,
+#  out of or in connection with the software or the use or other dealings in the
+#  software.
+#
+#  Public domain portions of this software can be redistributed and/or modified
+#  freely, provided that any derivative works bear some notice that they are
+#  derived from it, and any modified versions bear some notice that they have
+#  been modified.
+#
+#  Copyrighted portions of the software are annotated within the source code.
+#  Open Source Licenses, included in the source code, apply to the applicable
+#  copyrighted portions.  Copyrighted portions of the software are not in the
+#  public domain.
+
+
+"""
+On-disk store of each station's daily values for one element.
+Each file holds a header, the values as int16 (one per day, at a fixed offset
+from EPOCH) and a bitmap of missing days, so a date range is read as a
+memory-mapped slice instead of being parsed into pandas.
+"""
+
+# Import Standard Libraries
+import os
+import sys
+import zlib
+import threading
+
+# Import 3rd Party Libraries
+import numpy
+import pandas
+
+# Find module path
+MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
+# Find ROOT folder
+ROOT = os.path.split(MODULE_PATH)[0]
+
+# Import Custom Libraries
+try:
+    from . import ghcn_daily
+except Exception:
+    sys.path.append(MODULE_PATH)
+    import ghcn_daily
+
+STORE_FOLDER = os.path.join(ROOT, 'cached', 'station_store')
+EPOCH = numpy.datetime64('1700-01-01', 'D') # Day 0 (Earlier than any GHCN-Daily record)
+MAGIC = b'APT1'
+HEADER = numpy.dtype([('magic', 'S4'),
+                      ('first_day', '<i4'),  # Days from EPOCH to the first stored value
+                      ('num_days', '<i4'),   # Number of stored values
+                      ('source_stamp', '<u4')]) # Identifies the .dly file the values came from
+
+
+def day_number(date):
+    """Returns the number of days from EPOCH to date"""
+    return int((numpy.datetime64(date, 'D') - EPOCH).astype(numpy.int64))
+
+
+def store_path(station_id, element, stamp):
+    """
+    Returns the path of a station's stored element values
+    (Named by source stamp, so a rebuilt file never replaces one that is still mapped)
+    """
+    return os.path.join(STORE_FOLDER, '{}.{}.{:08x}.i2'.format(station_id, element, stamp))
+
+
+def source_stamp(dly_path):
+    """
+    Returns a number identifying the contents of a stored .dly file
+    (From its ETag / Last-Modified headers, which do not change when an
+     unchanged file is revalidated, or its size and time when they are missing)
+    """
+    validators = ghcn_daily.read_validators(dly_path)
+    if validators:
+        stamp = '{}|{}'.format(validators.get('etag', ''), validators.get('last_modified', ''))
+    else:
+        stamp = '{}|{}'.format(os.path.getsize(dly_path), int(os.path.getmtime(dly_path)))
+    return zlib.crc32(stamp.encode())
+
+
+def write(station_id, element, series, stamp=0):
+    """
+    Stores a Series of daily values (As returned by ghcn_daily.parse_dly)
+    The file is written to a temporary path and then moved into place, so
+    readers never see a partial file
+    """
+    days = ((series.index.values.astype('datetime64[D]') - EPOCH).astype(numpy.int64))
+    values = series.values
+    if len(values) > 0 and (values.min() < -32768 or values.max() > 32767):
+        raise ValueError('{} {} values exceed the int16 range of the station store'.format(station_id, element))
+    if len(days) > 0:
+        first_day = int(days[0])
+        num_days = int(days[-1]) - first_day + 1
+    else:
+        first_day = 0
+        num_days = 0
+    stored_values = numpy.zeros(num_days, dtype='<i2')
+    missing = numpy.ones(num_days, dtype=bool)
+    stored_values[days - first_day] = values
+    missing[days - first_day] = False
+    header = numpy.zeros(1, dtype=HEADER)
+    header['magic'] = MAGIC
+    header['first_day'] = first_day
+    header['num_days'] = num_days
+    header['source_stamp'] = stamp
+    try:
+        os.makedirs(STORE_FOLDER)
+    except Exception:
+        pass
+    file_path = store_path(station_id, element, stamp)
+    temp_path = '{}.{}.{}.part'.format(file_path, os.getpid(), threading.get_ident())
+    with open(temp_path, 'wb') as store_file:
+        store_file.write(header.tobytes())
+        store_file.write(stored_values.tobytes())
+        store_file.write(numpy.packbits(missing).tobytes())
+    os.replace(temp_path, file_path)
+    return file_path
+
+
+class StoredValues(object):
+    """Memory-mapped values of one station and element"""
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.cached_summary = None
+        self.open()
+
+    def open(self):
+        """Maps the stored file"""
+        header = numpy.fromfile(self.file_path, dtype=HEADER, count=1)
+        if len(header) < 1 or header['magic'][0] != MAGIC:
+            raise ValueError('{} is not a station store file'.format(self.file_path))
+        self.first_day = int(header['first_day'][0])
+        self.num_days = int(header['num_days'][0])
+        self.source_stamp = int(header['source_stamp'][0])
+        if self.num_days > 0:
+            self.values = numpy.memmap(self.file_path, dtype='<i2', mode='r',
+                                       offset=HEADER.itemsize, shape=(self.num_days,))
+            self.missing_bits = numpy.memmap(self.file_path, dtype=numpy.uint8, mode='r',
+                                             offset=HEADER.itemsize + 2*self.num_days,
+                                             shape=((self.num_days + 7)//8,))
+        else:
+            self.values = numpy.zeros(0, dtype='<i2')
+            self.missing_bits = numpy.zeros(0, dtype=numpy.uint8)
+
+    def window(self, start_date, end_date):
+        """Returns the StoredWindow of the days from start_date to end_date (Inclusive)"""
+        start = max(day_number(start_date), self.first_day)
+        end = min(day_number(end_date), self.first_day + self.num_days - 1)
+        if end < start:
+            return StoredWindow(start, self.values[0:0], numpy.zeros(0, dtype=bool))
+        first = start - self.first_day
+        last = end - self.first_day + 1
+        # Unpack only the bytes of the bitmap covering the window
+        bits = numpy.unpackbits(self.missing_bits[first//8:(last + 7)//8])
+        missing = bits[first % 8:first % 8 + last - first]
+        return StoredWindow(start, self.values[first:last], missing == 0)
+
+    def day_range(self, start_date, end_date):
+        """Returns the positions of the stored days from start_date to end_date, as (first, last + 1)"""
+        first = min(max(day_number(start_date) - self.first_day, 0), self.num_days)
+        last = max(min(day_number(end_date) - self.first_day + 1, self.num_days), first)
+        return first, last
+
+    def summary(self):
+        """Returns the StoredSummary of the values (Computed on first use)"""
+        if self.cached_summary is None:
+            self.cached_summary = StoredSummary(self)
+        return self.cached_summary
+
+    def __len__(self):
+        return self.num_days
+
+    def __getstate__(self):
+        # Memory maps are re-opened from the file rather than copied into the pickle
+        return {'file_path': self.file_path}
+
+    def __setstate__(self, state):
+        self.file_path = state['file_path']
+        self.cached_summary = None
+        self.open()
+
+
+class StoredSummary(object):
+    """
+    Running counts and totals of a station's stored values, computed once so the
+    statistics of any window are a few lookups instead of a pass over its days
+    """
+    def __init__(self, stored):
+        self.stored = stored
+        valid = numpy.unpackbits(stored.missing_bits, count=stored.num_days) == 0
+        # Number of days with values before each stored day
+        self.valid_prefix = numpy.zeros(stored.num_days + 1, dtype=numpy.int64)
+        numpy.cumsum(valid, out=self.valid_prefix[1:])
+        # Total of the values before each value (Counting only days with values)
+        valid_values = numpy.asarray(stored.values)[valid].astype(numpy.int64)
+        self.value_prefix = numpy.zeros(len(valid_values) + 1, dtype=numpy.int64)
+        numpy.cumsum(valid_values, out=self.value_prefix[1:])
+
+    def count(self, start_date, end_date):
+        """Returns the number of days with values from start_date to end_date"""
+        first, last = self.stored.day_range(start_date, end_date)
+        return int(self.valid_prefix[last] - self.valid_prefix[first])
+
+    def has_zero_year(self, start_date, end_date):
+        """
+        Tests whether any block of 365 consecutive values from start_date to end_date
+        totals less than 1 (Blocks start at the first value, and the last block only
+        counts if a value follows it)
+        """
+        first, last = self.stored.day_range(start_date, end_date)
+        first_value = self.valid_prefix[first]
+        num_values = self.valid_prefix[last] - first_value
+        num_blocks = (num_values - 1)//365 if num_values > 0 else 0
+        if num_blocks < 1:
+            return False
+        edges = first_value + 365*numpy.arange(num_blocks + 1)
+        return bool((numpy.diff(self.value_prefix[edges]) < 1).any())
+
+
+class StoredWindow(object):
+    """Values of one station for a range of days (A view of the stored values)"""
+    def __init__(self, first_day, values, valid):
+        self.first_day = first_day
+        self.values = values
+        self.valid = valid
+
+    @property
+    def dates(self):
+        """Dates of the days in the window"""
+        return EPOCH + self.first_day + numpy.arange(len(self.values))
+
+    def valid_values(self):
+        """Returns the values of the days that were not missing, as floats"""
+        return self.values[self.valid].astype(numpy.float64)
+
+    def to_series(self):
+        """Returns the values of the days that were not missing as a Series indexed by date"""
+        index = pandas.DatetimeIndex(self.dates[self.valid].astype('datetime64[ns]'))
+        return pandas.Series(self.valid_values(), index=index, name='value')
+
+    def to_csv(self, csv_path):
+        """Saves the values that were not missing to a CSV file"""
+        self.to_series().to_csv(csv_path)
+
+    def __len__(self):
+        return int(numpy.count_nonzero(self.valid))
+
+    def __getstate__(self):
+        # Copy the (small) window out of the memory map
+        return {'first_day': self.first_day,
+                'values': numpy.array(self.values),
+                'valid': self.valid}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+
+def remove_outdated(station_id, element, stamp):
+    """Removes stored files of a station's element built from other .dly files"""
+    current_name = os.path.basename(store_path(station_id, element, stamp))
+    prefix = '{}.{}.'.format(station_id, element)
+    for file_name in os.listdir(STORE_FOLDER):
+        if file_name.startswith(prefix) and file_name.endswith('.i2') and file_name != current_name:
+            try:
+                os.remove(os.path.join(STORE_FOLDER, file_name))
+            except Exception:
+                pass # Still mapped (Windows) - removed on a later rebuild
+
+
+def get(station_id, element, dly_path):
+    """
+    Returns the StoredValues of a station's element, building the stored
+    file from the station's .dly file when it is missing or out of date
+    """
+    stamp = source_stamp(dly_path)
+    file_path = store_path(station_id, element, stamp)
+    if os.path.exists(file_path):
+        try:
+            return StoredValues(file_path)
+        except Exception:
+            pass
+    with open(dly_path, 'rb') as dly_file:
+        series = ghcn_daily.parse_dly(dly_file.read(), element)
+    write(station_id, element, series, stamp=stamp)
+    remove_outdated(station_id, element, stamp)
+    return StoredValues(file_path)
+
+
+if __name__ == '__main__':
+    STORED = get('USC00044484', 'PRCP', ghcn_daily.get_station_file('USC00044484'))
+    WINDOW = STORED.window('1987-09-01', '2018-10-15')
+    print(len(WINDOW))
+    print(WINDOW.to_series())
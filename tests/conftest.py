@@ -0,0 +1,29 @@
+"""Makes the modules in arc importable by the tests, and isolates each test's shared state"""
+
+import os
+import sys
+
+import pytest
+
+ARC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'arc')
+UTILITIES_FOLDER = os.path.join(ARC_FOLDER, 'utilities')
+for folder in (ARC_FOLDER, UTILITIES_FOLDER):
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+
+import JLog
+import http_client
+import ghcn_daily
+import concurrency_control
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch, tmp_path):
+    """
+    Writes the log under tmp_path (Instead of the Logs folder of the working tree) and
+    gives each test its own circuit breakers, host limits and rate limiter
+    """
+    monkeypatch.setattr(JLog, 'ROOT_FOLDER', str(tmp_path))
+    monkeypatch.setattr(http_client, 'BREAKERS', {})
+    monkeypatch.setattr(ghcn_daily, 'HOST_LIMITS', concurrency_control.HostLimits())
+    monkeypatch.setattr(ghcn_daily, 'RATE_LIMITER', ghcn_daily.HostRateLimiter())
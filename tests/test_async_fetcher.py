@@ -0,0 +1,135 @@
+import threading
+import http.server
+
+import pytest
+import requests
+
+import async_fetcher
+import http_client
+import ghcn_daily
+import station_store
+import station_manager
+
+
+def dly_line(station_id, month, element, value):
+    line = '{:11}{:04d}{:02d}{:4}'.format(station_id, 2020, month, element)
+    return (line + '{:>5}   '.format(value) * 31).encode()
+
+
+def dly_text(station_id):
+    """Two months of PRCP (Interleaved with SNOW records) for the station"""
+    return b'\n'.join([dly_line(station_id, 1, 'PRCP', 1),
+                       dly_line(station_id, 1, 'SNOW', 9),
+                       dly_line(station_id, 3, 'PRCP', 3)]) + b'\n'
+
+
+class DlyHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves a .dly file for any station ID (404 for MISSING, 304 when the ETag
+    matches, 500 while server.failures lasts), recording the requests
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requested.append((self.path, self.headers.get('If-None-Match')))
+            self.server.failures -= 1
+            fail = self.server.failures >= 0
+        station_id = self.path.rsplit('/', 1)[-1][:-4]
+        etag = '"{}"'.format(station_id)
+        if fail:
+            self.send_empty(500)
+        elif station_id.startswith('MISSING'):
+            self.send_empty(404)
+        elif self.headers.get('If-None-Match') == etag:
+            self.send_empty(304)
+        else:
+            body = dly_text(station_id)
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    def send_empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    dly_server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), DlyHandler)
+    dly_server.requested = []
+    dly_server.failures = 0
+    dly_server.lock = threading.Lock()
+    thread = threading.Thread(target=dly_server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.delenv(ghcn_daily.MIRROR_ENVIRONMENT_VARIABLE, raising=False)
+    monkeypatch.setattr(ghcn_daily, 'DEFAULT_MIRROR_FOLDER', str(tmp_path / 'no_mirror'))
+    monkeypatch.setattr(ghcn_daily, 'BASE_URL', 'http://127.0.0.1:{}'.format(dly_server.server_port))
+    monkeypatch.setattr(ghcn_daily, 'STORE_FOLDER', str(tmp_path / 'ghcn_daily'))
+    monkeypatch.setattr(station_store, 'STORE_FOLDER', str(tmp_path / 'station_store'))
+    monkeypatch.setattr(http_client, 'backoff_delay', lambda attempt_number, retry_after=None: 0)
+    yield dly_server
+    dly_server.shutdown()
+    dly_server.server_close()
+
+
+@pytest.fixture
+def engine():
+    async_engine = async_fetcher.AsyncStationEngine()
+    yield async_engine
+    async_engine.shutdown()
+
+
+def lazy_station(station_id):
+    return station_manager.Main('PRCP', station_id, station_id, '0, 0', (0, 0), 0, 0, 0, 0,
+                                '2020-01-01', '2020-03-31', '2020-01-01', lazy=True)
+
+
+def test_stations_arrive_once(server, engine):
+    stations = [lazy_station('USC0000000{}'.format(number)) for number in range(6)]
+    futures = engine.submit_stations(stations + stations)
+    assert [future.result(timeout=30) for future in futures] == stations + stations
+    assert len(server.requested) == 6
+    for station in stations:
+        assert station.actual_rows == 62
+        assert station.ensure_data()
+    assert len(server.requested) == 6
+
+
+def test_store_keeps_only_element(server, engine):
+    station = engine.submit_station(lazy_station('USC00000001')).result(timeout=30)
+    window = station.data.window('2020-01-01', '2020-03-31')
+    assert sorted(set(window.valid_values())) == [1, 3]
+    assert len(window) == 62
+    assert ghcn_daily.read_validators(ghcn_daily.local_path('USC00000001.dly')) == {'etag': '"USC00000001"'}
+
+
+def test_stations_arrive_through_server_errors(server, engine):
+    server.failures = 3
+    station = engine.submit_station(lazy_station('USC00000001')).result(timeout=30)
+    assert station.actual_rows == 62
+    assert len(server.requested) == 4
+
+
+def test_unchanged_file_is_revalidated(server, engine):
+    engine.submit_station(lazy_station('USC00000001')).result(timeout=30)
+    station = engine.submit_station(lazy_station('USC00000001')).result(timeout=30)
+    assert station.actual_rows == 62
+    assert server.requested == [('/all/USC00000001.dly', None),
+                                ('/all/USC00000001.dly', '"USC00000001"')]
+
+
+def test_failed_download_raises(server, engine):
+    station = lazy_station('MISSING0001')
+    with pytest.raises(requests.HTTPError):
+        engine.submit_station(station).result(timeout=30)
+    assert station.data is None
+    # The lock was released, so the station can still be fetched another way
+    assert station.fetch_lock.acquire(timeout=1)
+    station.fetch_lock.release()
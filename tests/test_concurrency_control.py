@@ -0,0 +1,44 @@
+import concurrency_control
+import ghcn_daily
+import station_fetcher
+import async_fetcher
+
+URL = 'http://ghcn.test/pub/data/ghcn/daily/all/USC00000001.dly'
+
+
+def run_round(limit, status=200):
+    """Starts as many requests as the limit allows, then completes them all with status"""
+    slots = []
+    while True:
+        slot = limit.try_acquire()
+        if slot is None:
+            break
+        slots.append(slot)
+    for slot in slots:
+        slot.responded(status)
+    for slot in slots:
+        slot.release()
+    return len(slots)
+
+
+def test_limit_grows_past_initial_under_sustained_success():
+    ghcn_daily.configure_session(pool_size=station_fetcher.DEFAULT_WORKERS)
+    limit = ghcn_daily.HOST_LIMITS.get(URL)
+    assert run_round(limit) == concurrency_control.INITIAL_LIMIT
+    for round_number in range(10):
+        run_round(limit)
+    assert run_round(limit) > concurrency_control.INITIAL_LIMIT
+    for round_number in range(100):
+        run_round(limit)
+    assert run_round(limit) == concurrency_control.MAX_LIMIT
+
+
+def test_async_engine_leaves_room_to_grow():
+    engine = async_fetcher.AsyncStationEngine()
+    try:
+        limit = ghcn_daily.HOST_LIMITS.get(URL)
+        assert limit.maximum == concurrency_control.MAX_LIMIT
+        assert int(limit.limit) == concurrency_control.INITIAL_LIMIT
+    finally:
+        engine.shutdown()
+
@@ -0,0 +1,72 @@
+import numpy
+import pandas
+
+import daily_series
+
+
+def test_empty():
+    series = daily_series.DailySeries.empty('2020-02-27', '2020-03-01')
+    assert len(series) == 4
+    assert series.values.dtype == numpy.float32
+    assert series.end_date == numpy.datetime64('2020-03-01')
+    assert series.null_count() == 4
+    assert numpy.isnan(series.max())
+
+
+def test_between_shares_values():
+    series = daily_series.DailySeries('2020-01-01', [1, 2, 3, 4, 5])
+    part = series.between('2020-01-02', '2020-01-03')
+    assert part.start_date == numpy.datetime64('2020-01-02')
+    assert list(part.values) == [2, 3]
+    part.values[0] = 20
+    assert series.values[1] == 20
+
+
+def test_day_slice_clips_to_the_series():
+    series = daily_series.DailySeries('2020-01-01', [1, 2, 3])
+    assert series.day_slice() == slice(0, 3)
+    assert series.day_slice('2019-12-01', '2020-01-02') == slice(0, 2)
+    assert series.day_slice('2020-01-02', '2020-02-01') == slice(1, 3)
+    assert series.day_slice('2020-02-01', '2020-03-01') == slice(3, 3)
+    assert series.day_slice('2020-01-03', '2020-01-01') == slice(2, 2)
+
+
+def test_null_count_and_fill_nulls():
+    series = daily_series.DailySeries('2020-01-01', [1, numpy.nan, numpy.nan, 4])
+    assert series.null_count() == 2
+    assert series.null_count('2020-01-03') == 1
+    series.fill_nulls(0)
+    assert list(series.values) == [1, 0, 0, 4]
+
+
+def test_scale_in_place():
+    series = daily_series.DailySeries('2020-01-01', [10, numpy.nan, 30])
+    values = series.values
+    series.scale(0.5)
+    assert series.values is values
+    assert list(series.values[[0, 2]]) == [5, 15]
+    assert numpy.isnan(series.values[1])
+
+
+def test_rolling_sum():
+    series = daily_series.DailySeries('2020-01-01', [1, 2, 3, numpy.nan, 5, 6, 7])
+    sums = series.rolling_sum(3)
+    assert sums.values.dtype == numpy.float64
+    expected = pandas.Series(series.values, dtype=numpy.float64).rolling(3).sum()
+    assert numpy.array_equal(sums.values, expected.values, equal_nan=True)
+    assert numpy.isnan(sums.values[[0, 1, 3, 4, 5]]).all()
+    assert list(sums.values[[2, 6]]) == [6, 18]
+
+
+def test_rolling_sum_shorter_than_window():
+    sums = daily_series.DailySeries('2020-01-01', [1, 2]).rolling_sum(3)
+    assert len(sums) == 2
+    assert numpy.isnan(sums.values).all()
+
+
+def test_to_series():
+    series = daily_series.DailySeries('2020-02-28', [1, numpy.nan, 3])
+    pandas_series = series.to_series()
+    assert list(pandas_series.index) == list(pandas.date_range('2020-02-28', '2020-03-01'))
+    assert pandas_series.name == 'value'
+    assert pandas_series.max() == series.max() == 3
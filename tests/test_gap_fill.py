@@ -0,0 +1,141 @@
+import numpy
+
+import date_calcs
+import gap_fill
+import station_store
+
+
+def window(start_date, values):
+    """Builds a StoredWindow from a list of values (None where missing)"""
+    valid = numpy.array([value is not None for value in values])
+    stored = numpy.array([0 if value is None else value for value in values], dtype='<i2')
+    return station_store.StoredWindow(station_store.day_number(start_date), stored, valid)
+
+
+def test_fill_takes_first_source_with_a_value():
+    filler = gap_fill.GapFiller('2020-01-01', '2020-01-05')
+    filled_days = filler.fill([window('2020-01-01', [1, None, None, 4, None]),
+                               window('2020-01-01', [10, 20, None, 40, None]),
+                               window('2020-01-02', [200, 300, 400])],
+                              ['A', 'B', 'C'])
+    assert list(filled_days) == [2, 1, 1]
+    assert list(filler.values[:4]) == [1, 20, 300, 4]
+    assert numpy.isnan(filler.values[4])
+    assert filler.sources == ['A', 'B', 'C']
+    assert list(filler.provenance) == [0, 1, 2, 0, gap_fill.NO_SOURCE]
+    assert list(filler.counts()) == [2, 1, 1]
+    assert list(filler.counts('2020-01-02', '2020-01-03')) == [0, 1, 1]
+    assert filler.null_count() == 1
+
+
+def test_fill_only_adds_sources_that_filled_days():
+    filler = gap_fill.GapFiller('2020-01-01', '2020-01-03')
+    filler.fill([window('2020-01-01', [1, 2, 3])], ['A'])
+    filled_days = filler.fill([window('2020-01-01', [7, 8, 9]), None], ['B', 'C'])
+    assert list(filled_days) == [0, 0]
+    assert filler.sources == ['A']
+    assert list(filler.values) == [1, 2, 3]
+
+
+def test_fill_clips_windows_to_the_record():
+    filler = gap_fill.GapFiller('2020-01-03', '2020-01-04')
+    filler.fill([window('2020-01-01', [1, 2, 3, 4, 5, 6])], ['A'])
+    assert list(filler.values) == [3, 4]
+    filler = gap_fill.GapFiller('2020-01-03', '2020-01-04')
+    assert list(filler.fill([window('2020-02-01', [1])], ['A'])) == [0]
+    assert filler.null_count() == 2
+
+
+def test_interpolate():
+    filler = gap_fill.GapFiller('2020-01-01', '2020-01-07')
+    filler.fill([window('2020-01-02', [2, None, None, 8, None])], ['A'])
+    assert filler.interpolate('Interpolated') == 4
+    assert numpy.isnan(filler.values[0])
+    assert list(filler.values[1:]) == [2, 4, 6, 8, 8, 8]
+    assert list(filler.provenance) == [gap_fill.NO_SOURCE, 0, 1, 1, 0, 1, 1]
+    assert filler.sources == ['A', 'Interpolated']
+
+
+def test_interpolate_without_values():
+    filler = gap_fill.GapFiller('2020-01-01', '2020-01-03')
+    assert filler.interpolate('Interpolated') == 0
+    assert filler.sources == []
+
+
+def test_copy():
+    filler = gap_fill.GapFiller('2020-01-01', '2020-01-05')
+    filler.fill([window('2020-01-01', [1, None, 3, None, 5]),
+                 window('2020-01-01', [None, 2, None, None, None])], ['A', 'B'])
+    part = filler.copy('2020-01-02', '2020-01-04')
+    assert list(part.values[:2]) == [2, 3]
+    assert numpy.isnan(part.values[2])
+    assert list(part.counts()) == [1, 1]
+    part.fill([window('2020-01-04', [4])], ['C'])
+    assert numpy.isnan(filler.values[3])
+    assert filler.sources == ['A', 'B']
+
+
+def test_provenance_widens_past_int8():
+    filler = gap_fill.GapFiller('2020-01-01', '2020-12-31')
+    num_sources = 200
+    windows = [window(numpy.datetime64('2020-01-01') + day, [day]) for day in range(num_sources)]
+    filler.fill(windows, list(range(num_sources)))
+    assert filler.provenance.dtype == numpy.int16
+    assert list(filler.provenance[:num_sources]) == list(range(num_sources))
+    assert list(filler.counts()) == [1] * num_sources
+
+
+def station_windows(num_stations, start_date, end_date, seed):
+    """Synthetic stations with random gaps, some starting late and some ending early"""
+    rng = numpy.random.default_rng(seed)
+    first_day = station_store.day_number(start_date)
+    num_days = station_store.day_number(end_date) - first_day + 1
+    windows = []
+    for _ in range(num_stations):
+        start = rng.integers(0, num_days // 4)
+        end = rng.integers(num_days // 2, num_days)
+        values = rng.integers(0, 500, size=end - start + 1).astype('<i2')
+        valid = rng.random(end - start + 1) > rng.uniform(0.1, 0.9)
+        windows.append(station_store.StoredWindow(first_day + start, values, valid))
+    return windows
+
+
+def per_date_run(dates, windows, sources):
+    """Fills one date's record the way a single run does (One station at a time until complete)"""
+    filler = gap_fill.GapFiller(dates.normal_period_data_start_date, dates.actual_data_end_date)
+    for window, source in zip(windows, sources):
+        if filler.null_count() < 1:
+            break
+        filler.fill([window], [source])
+    filler.interpolate('Interpolated')
+    return filler
+
+
+def run_results(dates, filler):
+    """Values, source of each day and the station table rows of a filled record"""
+    day_sources = [None if index == gap_fill.NO_SOURCE else filler.sources[index] for index in filler.provenance]
+    days_normal = filler.counts(dates.normal_period_data_start_date, dates.normal_period_end_date)
+    days_antecedent = filler.counts(dates.antecedent_period_start_date, dates.observation_date)
+    table = [(source, normal, antecedent) for source, normal, antecedent in zip(filler.sources, days_normal, days_antecedent)
+             if normal + antecedent > 0]
+    return filler.values, day_sources, table
+
+
+def test_batch_record_matches_per_date_runs():
+    observation_dates = [(2019, 7, 15), (2020, 2, 29), (2020, 5, 3), (2021, 1, 10)]
+    all_dates = [date_calcs.Main(*observation_date) for observation_date in observation_dates]
+    batch_start = min(dates.normal_period_data_start_date for dates in all_dates)
+    batch_end = max(dates.actual_data_end_date for dates in all_dates)
+    windows = station_windows(8, '1985-01-01', '2021-12-31', seed=3)
+    sources = ['Station {}'.format(number) for number in range(len(windows))]
+    # Batch run - Every station fills the record of the whole batch at once
+    batch_record = gap_fill.GapFiller(batch_start, batch_end)
+    batch_record.fill(windows, sources)
+    for dates in all_dates:
+        batch_filler = batch_record.copy(dates.normal_period_data_start_date, dates.actual_data_end_date)
+        batch_filler.interpolate('Interpolated')
+        batch_values, batch_day_sources, batch_table = run_results(dates, batch_filler)
+        values, day_sources, table = run_results(dates, per_date_run(dates, windows, sources))
+        assert numpy.array_equal(batch_values, values, equal_nan=True)
+        assert batch_day_sources == day_sources
+        assert batch_table == table
@@ -0,0 +1,54 @@
+import numpy
+import pandas
+
+import ghcn_daily
+
+
+def dly_line(station_id, year, month, element, values):
+    """Builds one 269 character .dly record from up to 31 value strings (Blank flags)"""
+    line = '{:11}{:04d}{:02d}{:4}'.format(station_id, year, month, element)
+    for value in values + ['-9999'] * (31 - len(values)):
+        line += '{:>5}   '.format(value)
+    assert len(line) == ghcn_daily.RECORD_LENGTH
+    return line.encode()
+
+
+def test_parse_fixed_width_integers():
+    fields = numpy.array([b'  -12', b'  345', b'00007', b'     '], dtype='S5').view(numpy.uint8).reshape(4, 5)
+    assert list(ghcn_daily.parse_fixed_width_integers(fields)) == [-12, 345, 7, ghcn_daily.MISSING_VALUE]
+
+
+def test_parse_dly_keeps_only_element():
+    text = b'\n'.join([dly_line('USC00000001', 2020, 1, 'PRCP', ['5', '0', '-9999', '12']),
+                       dly_line('USC00000001', 2020, 1, 'SNOW', ['30'])])
+    series = ghcn_daily.parse_dly(text, 'PRCP')
+    assert list(series.index) == list(pandas.to_datetime(['2020-01-01', '2020-01-02', '2020-01-04']))
+    assert list(series.values) == [5.0, 0.0, 12.0]
+
+
+def test_parse_dly_drops_days_past_month_end():
+    text = dly_line('USC00000001', 2021, 2, 'PRCP', ['1'] * 31)
+    series = ghcn_daily.parse_dly(text, 'PRCP')
+    assert len(series) == 28
+    assert series.index[-1] == pandas.Timestamp('2021-02-28')
+
+
+def test_parse_dly_blank_fields_are_missing():
+    text = dly_line('USC00000001', 2020, 3, 'PRCP', ['4', '', '6'])
+    series = ghcn_daily.parse_dly(text, 'PRCP')
+    assert list(series.index.day) == [1, 3]
+    assert list(series.values) == [4.0, 6.0]
+
+
+def test_parse_dly_skips_short_lines():
+    full = dly_line('USC00000001', 2020, 4, 'PRCP', ['7'])
+    # The end of a partial download - cut off after the first two days
+    partial = dly_line('USC00000001', 2020, 5, 'PRCP', ['8', '9'])[:37]
+    series = ghcn_daily.parse_dly(full + b'\n' + partial, 'PRCP')
+    assert list(series.index) == [pandas.Timestamp('2020-04-01')]
+    assert list(series.values) == [7.0]
+
+
+def test_parse_dly_empty():
+    assert len(ghcn_daily.parse_dly(b'', 'PRCP')) == 0
+    assert len(ghcn_daily.parse_dly(b'short line', 'PRCP')) == 0
@@ -0,0 +1,184 @@
+import threading
+import concurrent.futures
+
+import pytest
+import requests
+
+import http_client
+import ghcn_daily
+import station_store
+import station_manager
+
+URL = 'http://ghcn.test/pub/data/ghcn/daily'
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    """No backoff, and a fresh breaker for the test host that reopens quickly"""
+    monkeypatch.setattr(http_client, 'backoff_delay', lambda attempt_number, retry_after=None: 0)
+    monkeypatch.setattr(http_client, 'BREAKER_POLL', 0.01)
+    breaker = http_client.CircuitBreaker(failure_threshold=3, reset_seconds=0.2)
+    monkeypatch.setitem(http_client.BREAKERS, 'ghcn.test', breaker)
+    return breaker
+
+
+def failing_attempt(failures, result='ok'):
+    """Returns an attempt function that raises ConnectionError for its first failures calls"""
+    calls = []
+    def attempt(remaining):
+        calls.append(remaining)
+        if len(calls) <= failures:
+            raise requests.ConnectionError('refused')
+        return result
+    return attempt, calls
+
+
+def test_retries_until_success(fast_retries):
+    attempt, calls = failing_attempt(2)
+    assert http_client.call_with_retries(URL, attempt, deadline=10) == 'ok'
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_attempts(fast_retries):
+    attempt, calls = failing_attempt(10)
+    with pytest.raises(requests.ConnectionError):
+        http_client.call_with_retries(URL, attempt, deadline=10, max_attempts=2)
+    assert len(calls) == 2
+
+
+def test_waits_for_open_breaker(fast_retries):
+    # Other calls opened the breaker
+    for _ in range(3):
+        fast_retries.record_failure()
+    assert not fast_retries.allow()
+    attempt, calls = failing_attempt(0)
+    assert http_client.call_with_retries(URL, attempt, deadline=10) == 'ok'
+    assert len(calls) == 1
+    assert fast_retries.opened_at is None
+
+
+def test_open_breaker_fails_fast_past_deadline(fast_retries):
+    fast_retries.reset_seconds = 60
+    for _ in range(3):
+        fast_retries.record_failure()
+    attempt, calls = failing_attempt(0)
+    with pytest.raises(http_client.CircuitOpen):
+        http_client.call_with_retries(URL, attempt, deadline=1)
+    assert calls == []
+
+
+def dly_text(station_id):
+    """One month of PRCP records (1 to 31 tenths of a mm)"""
+    line = '{:11}{:04d}{:02d}PRCP'.format(station_id, 2020, 1)
+    for day in range(1, 32):
+        line += '{:>5}   '.format(day)
+    return line.encode() + b'\n'
+
+
+class FakeResponse(object):
+    def __init__(self, url, content):
+        self.url = url
+        self.status_code = 200
+        self.reason = 'OK'
+        self.headers = {}
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=None):
+        chunk_size = chunk_size or max(len(self.content), 1)
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class FlakySession(object):
+    """Refuses the first failures requests (From any thread), then serves .dly files"""
+    def __init__(self, failures):
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        with self.lock:
+            self.failures -= 1
+            fail = self.failures >= 0
+        if fail:
+            raise requests.ConnectionError('503 burst')
+        station_id = url.rsplit('/', 1)[-1][:-4]
+        return FakeResponse(url, dly_text(station_id))
+
+
+def test_stations_arrive_through_a_burst_of_failures(fast_retries, monkeypatch, tmp_path):
+    monkeypatch.delenv(ghcn_daily.MIRROR_ENVIRONMENT_VARIABLE, raising=False)
+    monkeypatch.setattr(ghcn_daily, 'DEFAULT_MIRROR_FOLDER', str(tmp_path / 'no_mirror'))
+    monkeypatch.setattr(ghcn_daily, 'BASE_URL', URL)
+    monkeypatch.setattr(ghcn_daily, 'STORE_FOLDER', str(tmp_path / 'ghcn_daily'))
+    monkeypatch.setattr(station_store, 'STORE_FOLDER', str(tmp_path / 'station_store'))
+    # Enough failures to open the breaker, but fewer than one call's attempts (So no
+    #  station can run out of attempts however the failures fall between the threads)
+    monkeypatch.setattr(ghcn_daily, 'SESSION', FlakySession(failures=http_client.MAX_ATTEMPTS - 1))
+    stations = []
+    for number in range(8):
+        stations.append(station_manager.Main('PRCP', 'USC0000000{}'.format(number), 'Station {}'.format(number),
+                                             '0, 0', (0, 0), 0, 0, 0, 0,
+                                             '2020-01-01', '2020-01-31', '2020-01-01', lazy=True))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        arrived = list(pool.map(lambda station: station.ensure_data(), stations))
+    assert arrived == [True] * 8
+    assert all(station.actual_rows == 31 for station in stations)
+
+
+class FileSession(object):
+    """Serves content for every URL"""
+    def __init__(self, content):
+        self.content = content
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        return FakeResponse(url, self.content)
+
+
+def test_download_reports_progress_every_progress_bytes(monkeypatch, tmp_path):
+    content = b'x' * (10 * http_client.CHUNK_SIZE + 1)
+    monkeypatch.setattr(http_client, 'SESSION', FileSession(content))
+    reported = []
+    file_path = str(tmp_path / 'file.zip')
+    assert http_client.download(URL + '/file.zip', file_path, progress=reported.append) == len(content)
+    with open(file_path, 'rb') as downloaded:
+        assert downloaded.read() == content
+    # Each call comes after at least PROGRESS_BYTES more, instead of after every chunk
+    assert 0 < len(reported) <= len(content) // http_client.PROGRESS_BYTES
+    assert all(later - earlier >= http_client.PROGRESS_BYTES for earlier, later in zip([0] + reported, reported))
+
+
+class BusySession(object):
+    """Answers that the service is busy for the first busy requests, then answers OK"""
+    def __init__(self, busy):
+        self.busy = busy
+        self.calls = 0
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.calls += 1
+        if self.calls <= self.busy:
+            return FakeResponse(url, b'busy')
+        return FakeResponse(url, b'ok')
+
+
+def test_busy_answers_do_not_open_the_breaker(fast_retries, monkeypatch):
+    monkeypatch.setattr(http_client, 'SESSION', BusySession(busy=http_client.MAX_ATTEMPTS - 1))
+    breaker_failures = []
+    def busy(response):
+        breaker_failures.append(fast_retries.failures)
+        return response.content == b'busy'
+    assert http_client.get(URL, retry_if=busy).content == b'ok'
+    # More busy answers than the breaker's threshold, none of them counted
+    assert http_client.MAX_ATTEMPTS - 1 > fast_retries.failure_threshold
+    assert breaker_failures == [0] * http_client.MAX_ATTEMPTS
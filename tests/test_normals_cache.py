@@ -0,0 +1,67 @@
+import numpy
+import pandas
+
+import normals_cache
+
+
+def water_year_dates(year):
+    """Dates of the water year ending on Sep 30 of year"""
+    return pandas.date_range('{}-10-01'.format(year - 1), '{}-09-30'.format(year))
+
+
+def day_normals(values, day):
+    """30th and 70th percentiles of one day of the water year table"""
+    return numpy.percentile(values[:, day], 30), numpy.percentile(values[:, day], 70)
+
+
+def test_calc_normal_values_common_years():
+    values = numpy.random.default_rng(0).gamma(2, 1, size=(30, 365))
+    dates_list = [water_year_dates(2018), water_year_dates(2019)]
+    normal_low, normal_high = normals_cache.calc_normal_values(dates_list, values)
+    assert len(normal_low) == len(normal_high) == 730
+    assert list(normal_low.index) == list(dates_list[0]) + list(dates_list[1])
+    for day in (0, 150, 151, 364):
+        low, high = day_normals(values, day)
+        assert normal_low.iloc[day] == normal_low.iloc[365 + day] == low
+        assert normal_high.iloc[day] == normal_high.iloc[365 + day] == high
+
+
+def test_calc_normal_values_leap_year():
+    values = numpy.random.default_rng(1).gamma(2, 1, size=(30, 365))
+    dates_list = [water_year_dates(2019), water_year_dates(2020), water_year_dates(2021)]
+    normal_low, normal_high = normals_cache.calc_normal_values(dates_list, values)
+    assert len(normal_low) == 365 + 366 + 365
+    leap_year_low = normal_low['2019-10-01':'2020-09-30']
+    leap_year_high = normal_high['2019-10-01':'2020-09-30']
+    # Feb 29 is the average of Feb 28 and Mar 1
+    feb_28_low, feb_28_high = day_normals(values, 150)
+    mar_1_low, mar_1_high = day_normals(values, 151)
+    assert leap_year_low['2020-02-28'] == feb_28_low
+    assert leap_year_low['2020-02-29'] == (feb_28_low + mar_1_low)/2
+    assert leap_year_high['2020-02-29'] == (feb_28_high + mar_1_high)/2
+    assert leap_year_low['2020-03-01'] == mar_1_low
+    # Days after Feb 29 keep their day of the water year
+    assert leap_year_low['2020-09-30'] == normal_low['2021-09-30'] == day_normals(values, 364)[0]
+    assert normal_low['2019-09-30'] == day_normals(values, 364)[0]
+
+
+def test_make_key_depends_on_period_stations_and_type():
+    key = normals_cache.make_key('Rainfall', '1990-10-01', '2020-09-30', ['USC00000001', 'USC00000002'])
+    assert key == normals_cache.make_key('Rainfall', '1990-10-01', '2020-09-30', ['USC00000001', 'USC00000002'])
+    assert key != normals_cache.make_key('Rainfall', '1990-10-01', '2020-09-30', ['USC00000002', 'USC00000001'])
+    assert key != normals_cache.make_key('Rainfall', '1990-10-01', '2020-09-30', ['USC00000001'])
+    assert key != normals_cache.make_key('Rainfall', '1989-10-01', '2019-09-30', ['USC00000001', 'USC00000002'])
+    assert key != normals_cache.make_key('Snowfall', '1990-10-01', '2020-09-30', ['USC00000001', 'USC00000002'])
+
+
+def test_cache_drops_least_recently_used():
+    cache = normals_cache.NormalsCache(memory_size=2)
+    cache.put('a', [1, 2], [3, 4])
+    cache.put('b', [5, 6], [7, 8])
+    normal_low, normal_high = cache.get('a')
+    assert list(normal_low) == [1, 2]
+    assert list(normal_high) == [3, 4]
+    cache.put('c', [9, 10], [11, 12])
+    assert cache.get('b') is None
+    assert list(cache.memory) == ['a', 'c']
+    assert cache.get('missing') is None
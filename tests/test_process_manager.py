@@ -0,0 +1,102 @@
+import os
+import time
+import concurrent.futures
+
+import pytest
+
+import process_manager
+
+
+class Square(object):
+    """Task returning n * n, raising for n == 3 and killing its worker for n == 5"""
+    def __init__(self, n):
+        self.n = n
+
+    def __call__(self):
+        if self.n == 3:
+            raise ValueError('boom')
+        if self.n == 5:
+            os._exit(1)
+        return self.n * self.n
+
+
+class SlowToSend(object):
+    """Result that takes a while to pickle, so a retiring worker reports it well after its 'maxed' report"""
+    def __init__(self, value):
+        self.value = value
+
+    def __reduce__(self):
+        time.sleep(0.3)
+        return (int, (self.value,))
+
+
+class SlowResult(object):
+    """Task returning n (Unpickled as an int)"""
+    def __init__(self, n):
+        self.n = n
+
+    def __call__(self):
+        return SlowToSend(self.n)
+
+
+class LateCheckPool(process_manager.WorkerPool):
+    """Checks for dead workers late enough that a retiring worker has reported and exited"""
+    def fail_lost_tasks(self):
+        time.sleep(1)
+        return process_manager.WorkerPool.fail_lost_tasks(self)
+
+
+@pytest.fixture
+def pool():
+    worker_pool = process_manager.WorkerPool(num_workers=2)
+    yield worker_pool
+    worker_pool.shutdown()
+
+
+def outcome(future):
+    try:
+        return future.result()
+    except process_manager.WorkerError as error:
+        return str(error)
+
+
+def test_results_and_failures(pool):
+    futures = [pool.submit(Square(n)) for n in (1, 2, 3, 4)]
+    outcomes = [outcome(future) for future in futures]
+    assert outcomes[0:2] == [1, 4]
+    assert 'ValueError: boom' in outcomes[2]
+    assert outcomes[3] == 16
+
+
+def test_dead_worker_fails_its_task_and_is_replaced(pool):
+    futures = [pool.submit(Square(n)) for n in range(10)]
+    done, not_done = concurrent.futures.wait(futures, timeout=60)
+    assert not not_done
+    assert outcome(futures[5]) == 'The sub-process running this task died'
+    for n in (0, 1, 2, 4, 6, 7, 8, 9):
+        assert outcome(futures[n]) == n * n
+    # Replacement workers keep taking tasks
+    assert pool.submit(Square(7)).result(timeout=60) == 49
+
+
+def test_every_task_resolves_when_workers_keep_dying(pool):
+    futures = [pool.submit(Square(5)) for _ in range(6)] + [pool.submit(Square(2))]
+    done, not_done = concurrent.futures.wait(futures, timeout=60)
+    assert not not_done
+    assert all(isinstance(future.exception(), process_manager.WorkerError) for future in futures[:6])
+    assert futures[6].result() == 4
+
+
+def test_closed_pool_starts_no_workers():
+    worker_pool = process_manager.WorkerPool(num_workers=1)
+    worker_pool.shutdown()
+    assert worker_pool.ensure_workers() == 0
+
+
+def test_retiring_worker_keeps_its_last_result():
+    worker_pool = LateCheckPool(num_workers=1, max_jobs=1)
+    try:
+        futures = [worker_pool.submit(SlowResult(n)) for n in range(2)]
+        assert [future.result(timeout=60) for future in futures] == [0, 1]
+    finally:
+        worker_pool.shutdown()
@@ -0,0 +1,50 @@
+import station_coverage
+import ghcn_daily
+
+INVENTORY = [('USC00000001', 'PRCP', 1900, 2021), # Covers everything
+             ('USC00000001', 'SNOW', 1950, 1960),
+             ('USC00000002', 'PRCP', 1950, 1985), # Ends before the window
+             ('USC00000002', 'SNOW', 1950, 2021),
+             ('USC00000003', 'PRCP', 2019, 2021), # Starts after the window
+             ('USC00000004', 'PRCP', 1987, 1987), # Overlaps only the window's first year
+             ('USC00000005', 'SNOW', 1950, 2021)] # No PRCP record
+
+
+def write_inventory(folder):
+    inventory_path = str(folder / 'ghcnd-inventory.txt')
+    with open(inventory_path, 'w') as inventory_file:
+        for station_id, element, first_year, last_year in INVENTORY:
+            inventory_file.write('{:11} {:8.4f} {:9.4f} {:4} {:4d} {:4d}\n'.format(station_id, 38.5, -92.1, element,
+                                                                                   first_year, last_year))
+    return inventory_path
+
+
+def test_parse_inventory(tmp_path):
+    station_ids, elements, first_years, last_years = station_coverage.parse_inventory(write_inventory(tmp_path))
+    assert list(station_ids) == [record[0].encode() for record in INVENTORY]
+    assert list(elements) == [record[1].encode() for record in INVENTORY]
+    assert list(first_years) == [record[2] for record in INVENTORY]
+    assert list(last_years) == [record[3] for record in INVENTORY]
+
+
+def test_stations_without_coverage(tmp_path):
+    coverage_index = station_coverage.CoverageIndex.from_inventory(write_inventory(tmp_path))
+    assert coverage_index.stations_without_coverage('PRCP', 1987, 2018) == {'USC00000002', 'USC00000003'}
+    # Stations without any record of the element are left for the download to reject
+    assert coverage_index.stations_without_coverage('SNOW', 1987, 2018) == {'USC00000001'}
+    assert coverage_index.stations_without_coverage('PRCP', 1900, 2021) == set()
+
+
+def test_index_save_and_load(tmp_path):
+    index_path = str(tmp_path / 'inventory_index.npz')
+    station_coverage.CoverageIndex.from_inventory(write_inventory(tmp_path)).save(index_path)
+    loaded = station_coverage.CoverageIndex.load(index_path)
+    assert loaded.stations_without_coverage('PRCP', 1987, 2018) == {'USC00000002', 'USC00000003'}
+
+
+def test_get_index_reads_the_mirror(tmp_path, monkeypatch):
+    write_inventory(tmp_path)
+    monkeypatch.setenv(ghcn_daily.MIRROR_ENVIRONMENT_VARIABLE, str(tmp_path))
+    monkeypatch.setattr(station_coverage, 'INDEX_PATH', str(tmp_path / 'cached' / 'inventory_index.npz'))
+    coverage_index = station_coverage.get_index()
+    assert coverage_index.stations_without_coverage('PRCP', 2020, 2021) == {'USC00000002', 'USC00000004'}
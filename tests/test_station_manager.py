@@ -0,0 +1,41 @@
+import types
+
+import station_manager
+
+
+def station(station_id, name, data=None, retrieved_date=None):
+    return types.SimpleNamespace(index=station_id, name=name, data=data, retrieved_date=retrieved_date)
+
+
+def test_registry_keys_stations_by_id():
+    first = station('USC00000001', 'SPRINGFIELD')
+    second = station('USC00000002', 'SPRINGFIELD')
+    registry = station_manager.Registry([first, second])
+    assert len(registry) == 2
+    assert registry.get('USC00000001') is first
+    assert registry.get('USC00000002') is second
+    assert registry.get('USC00000003') is None
+    assert 'USC00000002' in registry
+    assert [item.name for item in registry] == ['SPRINGFIELD', 'SPRINGFIELD']
+    assert list(registry)[1] is second
+
+
+def test_registry_add_replaces_station():
+    registry = station_manager.Registry()
+    registry.add(station('USC00000001', 'OLD'))
+    newer = station('USC00000001', 'NEW')
+    registry.add(newer)
+    assert len(registry) == 1
+    assert registry.get('USC00000001') is newer
+
+
+def test_registry_has_data():
+    registry = station_manager.Registry([station('USC00000001', 'A', data=[1], retrieved_date='2020-06-01'),
+                                         station('USC00000002', 'B', data=None, retrieved_date='2020-06-01'),
+                                         station('USC00000003', 'C', data=[1])])
+    assert registry.has_data('USC00000001', '2020-05-31')
+    assert registry.has_data('USC00000001', '2020-06-01')
+    assert not registry.has_data('USC00000001', '2020-06-02')
+    assert not registry.has_data('USC00000002', '2020-05-01')
+    assert not registry.has_data('USC00000003', '2020-05-01')
+    assert not registry.has_data('USC00000004', '2020-05-01')
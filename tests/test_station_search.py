@@ -0,0 +1,168 @@
+import numpy
+import pandas
+import pytest
+
+import station_search
+
+
+@pytest.fixture
+def station_list():
+    """Synthetic GHCN station list (Clustered in the central US, with a few far away)"""
+    rng = numpy.random.default_rng(0)
+    num_stations = 2000
+    latitudes = rng.uniform(35, 42, num_stations)
+    longitudes = rng.uniform(-98, -88, num_stations)
+    latitudes[:5] = [64.8, -33.9, 89.5, 0.0, 38.5]
+    longitudes[:5] = [-147.7, 151.2, 10.0, 179.9, -180.0]
+    station_ids = ['USC{:08d}'.format(number) for number in range(num_stations)]
+    return pandas.DataFrame({'id': station_ids,
+                             'latitude': latitudes.round(4),
+                             'longitude': longitudes.round(4),
+                             'elevation': rng.uniform(0, 1500, num_stations).round(1)},
+                            index=pandas.Index(station_ids, name='id'))
+
+
+def test_index_load_checks_the_station_list(station_list, tmp_path):
+    index_path = str(tmp_path / 'stations_index.npz')
+    station_search.StationIndex.from_station_list(station_list).save(index_path)
+    loaded = station_search.StationIndex.load(index_path, station_list)
+    assert numpy.array_equal(loaded.latitudes, station_list['latitude'].values)
+    # A station that moved, or a changed list of stations, needs a new index
+    moved = station_list.copy()
+    moved.iloc[10, moved.columns.get_loc('latitude')] += 0.01
+    assert station_search.StationIndex.load(index_path, moved) is None
+    assert station_search.StationIndex.load(index_path, station_list.iloc[1:]) is None
+    assert station_search.StationIndex.load(str(tmp_path / 'missing.npz'), station_list) is None
+
+
+def brute_force_miles(station_list, lat, lon):
+    return station_search.great_circle_miles(lat, lon, station_list['latitude'].values,
+                                             station_list['longitude'].values)
+
+
+@pytest.mark.parametrize('lat, lon, miles', [(38.5, -92.1, 30),
+                                             (64.8, -147.7, 300), # Alaska
+                                             (38.5, 179.95, 60),  # Across the antimeridian
+                                             (89.9, 0.0, 100),    # Past the pole
+                                             (10.0, 10.0, 5)])    # No stations
+def test_query_radius_matches_brute_force(station_list, lat, lon, miles):
+    index = station_search.StationIndex.from_station_list(station_list)
+    rows, distances = index.query_radius(lat, lon, miles)
+    all_distances = brute_force_miles(station_list, lat, lon)
+    assert list(rows) == list(numpy.flatnonzero(all_distances < miles))
+    assert numpy.allclose(distances, all_distances[rows])
+
+
+@pytest.mark.parametrize('lat, lon, k', [(38.5, -92.1, 10), (-33.0, 150.0, 3), (38.5, -92.1, 1)])
+def test_query_nearest_matches_brute_force(station_list, lat, lon, k):
+    index = station_search.StationIndex.from_station_list(station_list)
+    rows, distances = index.query_nearest(lat, lon, k)
+    all_distances = brute_force_miles(station_list, lat, lon)
+    assert list(rows) == list(numpy.argsort(all_distances, kind='mergesort')[:k])
+    assert numpy.allclose(distances, numpy.sort(all_distances)[:k])
+
+
+def test_query_nearest_limits_k(station_list):
+    index = station_search.StationIndex.from_station_list(station_list.iloc[:3])
+    assert len(index.query_nearest(38.5, -92.1, 10)[0]) == 3
+    assert len(index.query_nearest(38.5, -92.1, 0)[0]) == 0
+
+
+def geopy_search(station_list, site_loc, site_elevation, search_distance, sampling_coordinates=None):
+    """The per-station geopy loop find_stations replaced (Rows kept in station list order)"""
+    from geopy.distance import great_circle
+    rows = []
+    for position, (index, row) in enumerate(station_list.iterrows()):
+        location_tuple = (row['latitude'], row['longitude'])
+        distance = great_circle(site_loc, location_tuple).miles
+        if sampling_coordinates is None:
+            include_station = distance < search_distance
+            nearest = None
+        else:
+            sampling_distances = [great_circle(point, location_tuple).miles for point in sampling_coordinates]
+            include_station = min(sampling_distances) < search_distance
+            nearest = (int(numpy.argmin(sampling_distances)), min(sampling_distances))
+        if include_station:
+            elevation = row['elevation']*3.28084
+            elevDiff = abs(site_elevation - elevation)
+            rows.append((index, distance, elevDiff, distance*((elevDiff/1000)+0.45), nearest))
+    return rows
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+@pytest.mark.parametrize('site_loc, search_distance', [((38.5, -92.1), 30), ((36.0, -97.5), 60)])
+def test_find_stations_matches_geopy_loop(station_list, use_index, site_loc, search_distance):
+    station_index = station_search.StationIndex.from_station_list(station_list) if use_index else None
+    candidates = station_search.find_stations(station_list, site_loc, 700.0, search_distance,
+                                              station_index=station_index)
+    expected = geopy_search(station_list, site_loc, 700.0, search_distance)
+    assert len(expected) > 10
+    assert list(candidates.index) == [row[0] for row in expected]
+    assert numpy.allclose(candidates['distance'], [row[1] for row in expected], rtol=1e-12)
+    assert numpy.allclose(candidates['elevDiff'], [row[2] for row in expected], rtol=1e-12)
+    assert numpy.allclose(candidates['weightedDiff'], [row[3] for row in expected], rtol=1e-12)
+
+
+def test_find_stations_inner_distance_leaves_the_ring(station_list):
+    site_loc = (38.5, -92.1)
+    everything = station_search.find_stations(station_list, site_loc, 700.0, 60)
+    ring = station_search.find_stations(station_list, site_loc, 700.0, 60, inner_distance=30)
+    assert list(ring.index) == list(everything.index[everything['distance'] >= 30])
+
+
+def sampling_points(count):
+    """Watershed sampling points spread over part of the synthetic station cluster"""
+    rng = numpy.random.default_rng(1)
+    return [(lat, lon) for lat, lon in zip(rng.uniform(37, 39, count).round(5), rng.uniform(-93, -90, count).round(5))]
+
+
+def test_great_circle_matrix_matches_geopy():
+    from geopy.distance import great_circle
+    points = [(38.5, -92.1), (64.8, -147.7), (-33.9, 151.2)]
+    stations = [(38.6, -92.0), (0.0, 179.9), (89.5, 10.0), (38.5, -92.1)]
+    matrix = station_search.great_circle_matrix([point[0] for point in points], [point[1] for point in points],
+                                                [station[0] for station in stations], [station[1] for station in stations])
+    assert matrix.shape == (3, 4)
+    for row, point in enumerate(points):
+        for column, station in enumerate(stations):
+            assert matrix[row, column] == pytest.approx(great_circle(point, station).miles, rel=1e-12, abs=1e-9)
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+def test_nearest_sampling_points(station_list, use_index):
+    points = sampling_points(12)
+    station_index = station_search.StationIndex.from_station_list(station_list) if use_index else None
+    rows, nearest_point, distance = station_search.nearest_sampling_points(points, 10,
+                                                                          latitudes=station_list['latitude'].values,
+                                                                          longitudes=station_list['longitude'].values,
+                                                                          station_index=station_index)
+    matrix = station_search.great_circle_matrix([point[0] for point in points], [point[1] for point in points],
+                                                station_list['latitude'].values, station_list['longitude'].values)
+    expected_rows = numpy.flatnonzero(matrix.min(axis=0) < 10)
+    assert len(expected_rows) > 10
+    assert list(rows) == list(expected_rows)
+    assert list(nearest_point) == list(matrix.argmin(axis=0)[expected_rows])
+    assert numpy.allclose(distance, matrix.min(axis=0)[expected_rows])
+
+
+def test_nearest_sampling_points_without_points(station_list):
+    rows, nearest_point, distance = station_search.nearest_sampling_points([], 10,
+                                                                          latitudes=station_list['latitude'].values,
+                                                                          longitudes=station_list['longitude'].values)
+    assert len(rows) == len(nearest_point) == len(distance) == 0
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+def test_find_stations_watershed_matches_geopy_loop(station_list, use_index):
+    points = sampling_points(20)
+    site_loc = (38.0, -91.5)
+    station_index = station_search.StationIndex.from_station_list(station_list) if use_index else None
+    candidates = station_search.find_stations(station_list, site_loc, 700.0, 10,
+                                              sampling_coordinates=points, station_index=station_index)
+    expected = geopy_search(station_list, site_loc, 700.0, 10, sampling_coordinates=points)
+    assert len(expected) > 10
+    assert list(candidates.index) == [row[0] for row in expected]
+    assert numpy.allclose(candidates['distance'], [row[1] for row in expected], rtol=1e-12)
+    assert numpy.allclose(candidates['weightedDiff'], [row[3] for row in expected], rtol=1e-12)
+    assert list(candidates['nearest_sampling_point']) == [row[4][0] for row in expected]
+    assert numpy.allclose(candidates['sampling_distance'], [row[4][1] for row in expected], rtol=1e-12)
@@ -0,0 +1,107 @@
+import os
+import pickle
+
+import numpy
+import pandas
+import pytest
+
+import ghcn_daily
+import station_store
+
+
+@pytest.fixture
+def store_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(station_store, 'STORE_FOLDER', str(tmp_path / 'station_store'))
+    return tmp_path
+
+
+def daily_values(dates, values):
+    return pandas.Series(values, index=pandas.to_datetime(dates), dtype=numpy.float64)
+
+
+def test_day_number():
+    assert station_store.day_number('1700-01-01') == 0
+    assert station_store.day_number('1700-01-02') == 1
+    assert station_store.day_number(numpy.datetime64('1701-01-01')) == 365
+
+
+def test_write_and_read_back(store_folder):
+    series = daily_values(['2020-01-01', '2020-01-02', '2020-01-05', '2020-01-11'], [5, 0, -3, 12])
+    file_path = station_store.write('USC00000001', 'PRCP', series, stamp=7)
+    assert os.path.basename(file_path) == 'USC00000001.PRCP.00000007.i2'
+    stored = station_store.StoredValues(file_path)
+    assert stored.source_stamp == 7
+    assert len(stored) == 11
+    assert stored.first_day == station_store.day_number('2020-01-01')
+    pandas.testing.assert_series_equal(stored.window('2019-01-01', '2021-01-01').to_series(), series,
+                                       check_names=False, check_freq=False, check_index_type=False)
+
+
+def test_window_valid_mask(store_folder):
+    series = daily_values(['2020-01-01', '2020-01-03', '2020-01-12'], [1, 3, 12])
+    stored = station_store.StoredValues(station_store.write('USC00000001', 'PRCP', series))
+    window = stored.window('2020-01-02', '2020-01-12')
+    assert window.first_day == station_store.day_number('2020-01-02')
+    assert list(window.valid) == [False, True] + [False] * 8 + [True]
+    assert list(window.valid_values()) == [3, 12]
+    assert len(window) == 2
+    assert window.dates[0] == numpy.datetime64('2020-01-02')
+    assert len(stored.window('2021-01-01', '2021-02-01').values) == 0
+
+
+def test_window_pickles_as_a_copy(store_folder):
+    series = daily_values(['2020-01-01', '2020-01-02'], [1, 2])
+    window = station_store.StoredValues(station_store.write('USC00000001', 'PRCP', series)).window('2020-01-01', '2020-01-02')
+    copied = pickle.loads(pickle.dumps(window))
+    assert not isinstance(copied.values, numpy.memmap)
+    assert list(copied.valid_values()) == [1, 2]
+
+
+def test_write_rejects_values_outside_int16(store_folder):
+    with pytest.raises(ValueError):
+        station_store.write('USC00000001', 'PRCP', daily_values(['2020-01-01'], [40000]))
+
+
+def test_write_empty_series(store_folder):
+    stored = station_store.StoredValues(station_store.write('USC00000001', 'PRCP', daily_values([], [])))
+    assert len(stored) == 0
+    assert len(stored.window('2020-01-01', '2020-12-31')) == 0
+    assert stored.summary().count('2020-01-01', '2020-12-31') == 0
+
+
+def test_summary_counts(store_folder):
+    dates = pandas.date_range('2019-01-01', '2020-12-31')
+    values = numpy.ones(len(dates))
+    series = daily_values(dates, values)[::2]
+    summary = station_store.StoredValues(station_store.write('USC00000001', 'PRCP', series)).summary()
+    assert summary.count('2019-01-01', '2019-01-10') == 5
+    assert summary.count('2018-01-01', '2030-01-01') == len(series)
+    assert summary.count('2030-01-01', '2031-01-01') == 0
+    assert not summary.has_zero_year('2019-01-01', '2020-12-31')
+
+
+def test_summary_has_zero_year(store_folder):
+    dates = pandas.date_range('2019-01-01', '2020-12-31')
+    values = numpy.zeros(len(dates))
+    values[-1] = 5
+    summary = station_store.StoredValues(station_store.write('USC00000001', 'PRCP', daily_values(dates, values))).summary()
+    assert summary.has_zero_year('2019-01-01', '2020-12-31')
+    # Under two years of values leaves no block of 365 followed by another value
+    assert not summary.has_zero_year('2019-01-01', '2019-12-31')
+
+
+def test_get_builds_and_reuses_store(store_folder):
+    dly_path = str(store_folder / 'USC00000001.dly')
+    line = '{:11}{:04d}{:02d}{:4}'.format('USC00000001', 2020, 1, 'PRCP')
+    line += ''.join('{:>5}   '.format(day) for day in range(1, 32))
+    with open(dly_path, 'wb') as dly_file:
+        dly_file.write(line.encode())
+    ghcn_daily.save_validators(dly_path, '"abc"', None)
+    stored = station_store.get('USC00000001', 'PRCP', dly_path)
+    assert list(stored.window('2020-01-01', '2020-01-31').valid_values()) == list(range(1, 32))
+    assert station_store.get('USC00000001', 'PRCP', dly_path).file_path == stored.file_path
+    # A new .dly file is stored under a new stamp and replaces the old store
+    ghcn_daily.save_validators(dly_path, '"def"', None)
+    rebuilt = station_store.get('USC00000001', 'PRCP', dly_path)
+    assert rebuilt.file_path != stored.file_path
+    assert os.listdir(station_store.STORE_FOLDER) == [os.path.basename(rebuilt.file_path)]